@@ -1,6 +1,7 @@
 from flask import Flask, request, jsonify, Response, stream_template, make_response
 from flask_cors import CORS
 import os
+import hmac
 import json
 import logging
 import numpy as np
@@ -42,9 +43,34 @@ CORS(app)  # Enable CORS for all routes
 # Use absolute path for data directory to ensure it works regardless of CWD
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(BASE_DIR, 'data')
-data_manager = DataManager(data_dir=data_dir)
+# Large baskets are loaded through a worker pool ('thread', 'process' or 'none')
+load_executor = os.getenv('DATA_LOAD_EXECUTOR', 'thread').lower()
+data_manager = DataManager(
+    data_dir=data_dir,
+    load_executor=None if load_executor == 'none' else load_executor,
+    max_load_workers=int(os.getenv('DATA_LOAD_WORKERS', '0')) or None,
+    stats_mode=os.getenv('STATS_MODE', 'welford'),
+    ewma_halflife=float(os.getenv('EWMA_HALFLIFE', '63')),
+    index_poll_interval=float(os.getenv('DATA_INDEX_POLL_SECONDS', '5'))
+)
+# Keep the data directory index fresh in the background so /stocks answers from memory
+data_manager.directory_index.start_watcher()
 optimizer = PortfolioOptimizer()
 vis_generator = VisualizationDataGenerator()
+# Bearer token for POST /prices; the endpoint is only registered when it is set
+price_ingest_token = os.getenv('PRICE_INGEST_TOKEN', '')
+
+
+def parse_positive_int(value):
+    """Positive integer from a request field (an int or a string of digits), or None if it is not one"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, int) and value > 0:
+        return value
+    return None
+
 
 # Google AI Analysis endpoint
 @app.route('/generate-google-analysis', methods=['POST', 'OPTIONS'])
@@ -75,17 +101,24 @@ def health_check():
     return jsonify({
         'status': 'ok',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'frame_cache': data_manager.get_cache_stats()
     })
 
 # Get available stocks endpoint
 @app.route('/stocks', methods=['GET'])
 def get_stocks():
     try:
-        available_stocks = data_manager.get_available_stocks()
-        return jsonify({
-            'stocks': available_stocks
+        etag, metadata = data_manager.get_stock_listing()
+        if etag in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+
+        response = jsonify({
+            'stocks': list(metadata.keys()),
+            'metadata': metadata
         })
+        response.set_etag(etag)
+        return response
     except Exception as e:
         logger.error(f"Error retrieving stocks: {str(e)}")
         return jsonify({
@@ -93,6 +126,36 @@ def get_stocks():
             'message': str(e)
         }), 500
 
+# Append-only price ingestion endpoint (registered below only when ingestion is enabled)
+def ingest_prices():
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {price_ingest_token}'.encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401
+    try:
+        data = request.json
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        # Accept either {"rows": [...]} or a bare list of rows
+        rows = data.get('rows') if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not rows:
+            return jsonify({'error': 'No price rows provided'}), 400
+
+        result = data_manager.ingest_prices(rows)
+        status = 200 if result['accepted'] else 400
+        return jsonify(result), status
+    except Exception as e:
+        logger.error(f"Price ingestion error: {str(e)}")
+        return jsonify({
+            'error': 'Price ingestion failed',
+            'message': str(e)
+        }), 500
+
+if price_ingest_token:
+    app.add_url_rule('/prices', view_func=ingest_prices, methods=['POST'])
+else:
+    logger.info("PRICE_INGEST_TOKEN not set; price ingestion endpoint disabled")
+
 # Portfolio optimization endpoint with Server-Sent Events
 @app.route('/optimize', methods=['POST'])
 def optimize_portfolio():
@@ -124,15 +187,45 @@ def optimize_portfolio():
         return_weight = data.get('return_weight', 1.0)
         budget_penalty = data.get('budget_penalty', 1.0)
         min_assets = data.get('min_assets', 2)
+        max_assets = data.get('max_assets')
         min_assets_penalty = data.get('min_assets_penalty', 1.0)
         correlation_threshold = data.get('correlation_threshold', 0.8)
         reps = data.get('reps', 3)
         shots = data.get('shots', 1024)
         backend_name = data.get('backend', 'Aer Simulator')
         
+        # Optional estimation window: trailing trading days or a date range
+        lookback_days = data.get('lookback_days')
+        window_start = data.get('start_date')
+        if lookback_days is not None:
+            lookback = parse_positive_int(lookback_days)
+            if lookback is None:
+                return jsonify({
+                    'error': 'Invalid lookback_days',
+                    'message': f'lookback_days must be a positive integer, got {lookback_days!r}.'
+                }), 400
+            window_start = -lookback
+        window_end = data.get('end_date')
+        
+        # Optional cap on the portfolio size
+        if max_assets is not None:
+            max_assets_cap = parse_positive_int(max_assets)
+            if max_assets_cap is None:
+                return jsonify({
+                    'error': 'Invalid max_assets',
+                    'message': f'max_assets must be a positive integer, got {max_assets!r}.'
+                }), 400
+            max_assets = max_assets_cap
+        
         # Validate inputs
         if not tickers:
             return jsonify({'error': 'No tickers provided'}), 400
+        max_tickers = optimizer.BACKEND_MAX_ASSETS.get(backend_name)
+        if max_tickers is not None and len(tickers) > max_tickers:
+            return jsonify({
+                'error': 'Too many tickers',
+                'message': f'{backend_name} supports at most {max_tickers} tickers, got {len(tickers)}.'
+            }), 400
             
         # Scale QAOA parameters based on number of stocks
         num_stocks = len(tickers)
@@ -157,7 +250,15 @@ def optimize_portfolio():
             return jsonify({'error': 'Failed to load stock data'}), 400
             
         # Compute returns and risk
-        returns, cov_matrix, latest_prices = data_manager.compute_financial_metrics(stock_data)
+        returns, cov_matrix, latest_prices = data_manager.compute_financial_metrics(
+            stock_data, start=window_start, end=window_end)
+        
+        # A window with fewer than 2 returns for some ticker leaves NaN statistics
+        if not (np.isfinite(returns).all() and np.isfinite(cov_matrix).all()):
+            return jsonify({
+                'error': 'Insufficient data in window',
+                'message': 'Every ticker needs at least 2 daily returns in the estimation window.'
+            }), 400
         
         # Use only the tickers that have sufficient data (keys in stock_data)
         valid_tickers = list(stock_data.keys())
@@ -172,6 +273,8 @@ def optimize_portfolio():
         # Adjust min_assets if needed
         if min_assets > len(valid_tickers):
             min_assets = len(valid_tickers)
+        if max_assets is not None:
+            max_assets = max(max_assets, min_assets)
         
         # Prepare all parameters as a single dictionary
         optimization_params = {
@@ -186,6 +289,7 @@ def optimize_portfolio():
             'return_weight': return_weight,
             'budget_penalty': budget_penalty,
             'min_assets': min_assets,
+            'max_assets': max_assets,
             'min_assets_penalty': min_assets_penalty,
             'correlation_threshold': correlation_threshold,
             'reps': reps,
@@ -202,7 +306,8 @@ def optimize_portfolio():
             stock_data=stock_data,
             tickers=valid_tickers,  # Use valid tickers instead of original tickers
             budget=budget,
-            risk_free_rate=risk_free_rate
+            risk_free_rate=risk_free_rate,
+            returns_matrix=data_manager.build_returns_matrix(stock_data)
         )
         
         # Combine results
@@ -249,16 +354,45 @@ def optimize_portfolio_stream():
         return_weight = data.get('return_weight', 1.0)
         budget_penalty = data.get('budget_penalty', 1.0)
         min_assets = data.get('min_assets', 2)
+        max_assets = data.get('max_assets')
         min_assets_penalty = data.get('min_assets_penalty', 1.0)
         correlation_threshold = data.get('correlation_threshold', 0.8)
         reps = data.get('reps', 3)
         shots = data.get('shots', 1024)
         backend_name = data.get('backend', 'Aer Simulator')
         
+        # Optional estimation window: trailing trading days or a date range
+        lookback_days = data.get('lookback_days')
+        window_start = data.get('start_date')
+        if lookback_days is not None:
+            lookback = parse_positive_int(lookback_days)
+            if lookback is None:
+                return jsonify({
+                    'error': 'Invalid lookback_days',
+                    'message': f'lookback_days must be a positive integer, got {lookback_days!r}.'
+                }), 400
+            window_start = -lookback
+        window_end = data.get('end_date')
+        
+        # Optional cap on the portfolio size
+        if max_assets is not None:
+            max_assets_cap = parse_positive_int(max_assets)
+            if max_assets_cap is None:
+                return jsonify({
+                    'error': 'Invalid max_assets',
+                    'message': f'max_assets must be a positive integer, got {max_assets!r}.'
+                }), 400
+            max_assets = max_assets_cap
+        
         # Validate inputs
         if not tickers:
             return jsonify({'error': 'No tickers provided'}), 400
-        # No limit on number of tickers
+        max_tickers = optimizer.BACKEND_MAX_ASSETS.get(backend_name)
+        if max_tickers is not None and len(tickers) > max_tickers:
+            return jsonify({
+                'error': 'Too many tickers',
+                'message': f'{backend_name} supports at most {max_tickers} tickers, got {len(tickers)}.'
+            }), 400
             
         # Load and validate data (within request context)
         try:
@@ -267,10 +401,19 @@ def optimize_portfolio_stream():
                 return jsonify({'error': 'Failed to load stock data'}), 400
                 
             # Compute returns and risk
-            returns, cov_matrix, latest_prices = data_manager.compute_financial_metrics(stock_data)
+            returns, cov_matrix, latest_prices = data_manager.compute_financial_metrics(
+                stock_data, start=window_start, end=window_end)
+            returns_matrix = data_manager.build_returns_matrix(stock_data)
         except Exception as e:
             logger.error(f"Data loading error: {str(e)}")
             return jsonify({'error': 'Data loading failed', 'message': str(e)}), 400
+        
+        # A window with fewer than 2 returns for some ticker leaves NaN statistics
+        if not (np.isfinite(returns).all() and np.isfinite(cov_matrix).all()):
+            return jsonify({
+                'error': 'Insufficient data in window',
+                'message': 'Every ticker needs at least 2 daily returns in the estimation window.'
+            }), 400
             
         # Use only the tickers that have sufficient data (keys in stock_data)
         valid_tickers = list(stock_data.keys())
@@ -282,6 +425,8 @@ def optimize_portfolio_stream():
         # Adjust min_assets if needed
         if min_assets > len(valid_tickers):
             min_assets = len(valid_tickers)
+        if max_assets is not None:
+            max_assets = max(max_assets, min_assets)
         
         def generate():
             try:
@@ -301,6 +446,7 @@ def optimize_portfolio_stream():
                     'return_weight': return_weight,
                     'budget_penalty': budget_penalty,
                     'min_assets': min_assets,
+                    'max_assets': max_assets,
                     'min_assets_penalty': min_assets_penalty,
                     'correlation_threshold': correlation_threshold,
                     'reps': reps,
@@ -329,7 +475,8 @@ def optimize_portfolio_stream():
                     stock_data=stock_data,
                     tickers=valid_tickers,
                     budget=budget,
-                    risk_free_rate=risk_free_rate
+                    risk_free_rate=risk_free_rate,
+                    returns_matrix=returns_matrix
                 )
                 
                 # Send final progress step
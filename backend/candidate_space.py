@@ -0,0 +1,262 @@
+import math
+import logging
+import numpy as np
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Byte -> number of set bits, for NumPy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint8)
+
+
+def mask_dtype(n_assets: int) -> np.dtype:
+    """Smallest unsigned integer dtype holding one bit per asset"""
+    if n_assets <= 32:
+        return np.dtype(np.uint32)
+    if n_assets <= 64:
+        return np.dtype(np.uint64)
+    raise ValueError(f"Bitmask candidates support at most 64 assets, got {n_assets}")
+
+
+def enumerate_subset_masks(n_assets: int) -> np.ndarray:
+    """
+    All 2^N - 1 non-empty subsets of N assets as bitmasks.
+
+    Bit i of a mask is set when asset i is selected, so each candidate costs
+    4 bytes (N <= 32) or 8 bytes (N <= 64) instead of a Python list.
+    """
+    dtype = mask_dtype(n_assets)
+    return np.arange(1, 1 << n_assets, dtype=dtype)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """Number of selected assets in each mask"""
+    masks = np.asarray(masks)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks)
+    # Sum the per-byte counts of each mask's little-endian byte view
+    as_bytes = masks.astype(masks.dtype.newbyteorder('<'), copy=False).view(np.uint8)
+    return _BYTE_POPCOUNT[as_bytes.reshape(masks.shape + (masks.dtype.itemsize,))].sum(axis=-1, dtype=np.uint8)
+
+
+def masks_to_selections(masks: np.ndarray, n_assets: int) -> np.ndarray:
+    """Expand masks (M,) into a (M x N) 0/1 selection matrix"""
+    masks = np.asarray(masks)
+    shifts = np.arange(n_assets, dtype=masks.dtype)
+    return ((masks[:, None] >> shifts) & masks.dtype.type(1)).astype(np.uint8)
+
+
+def selections_to_masks(selections: np.ndarray) -> np.ndarray:
+    """Pack a (M x N) 0/1 selection matrix into masks (M,)"""
+    selections = np.asarray(selections)
+    dtype = mask_dtype(selections.shape[1])
+    weights = np.left_shift(dtype.type(1), np.arange(selections.shape[1], dtype=dtype))
+    return (selections.astype(dtype) * weights).sum(axis=1, dtype=dtype)
+
+
+def mask_to_indices(mask: int) -> List[int]:
+    """Selected asset indices of one mask, in ascending order"""
+    mask = int(mask)
+    indices = []
+    i = 0
+    while mask:
+        if mask & 1:
+            indices.append(i)
+        mask >>= 1
+        i += 1
+    return indices
+
+
+def indices_to_mask(indices: List[int]) -> int:
+    """Mask with the bits of the given asset indices set"""
+    mask = 0
+    for i in indices:
+        mask |= 1 << int(i)
+    return mask
+
+
+def conflict_matrix(correlation_matrix: np.ndarray, correlation_threshold: float) -> np.ndarray:
+    """
+    Correlation conflicts as a boolean (N x N) matrix.
+
+    Entry (i, j) is True when |corr(i, j)| exceeds the threshold, i.e. assets
+    i and j may not be held together.
+    """
+    conflicts = np.abs(correlation_matrix) > correlation_threshold
+    np.fill_diagonal(conflicts, False)
+    return conflicts
+
+
+def conflict_masks(correlation_matrix: np.ndarray, correlation_threshold: float) -> np.ndarray:
+    """Correlation conflicts per asset as bitmasks; bit j of entry i marks a conflict of i and j"""
+    return selections_to_masks(conflict_matrix(correlation_matrix, correlation_threshold))
+
+
+def correlation_feasible(masks: np.ndarray, conflicts: np.ndarray) -> np.ndarray:
+    """Boolean array marking masks that hold no conflicting pair of assets"""
+    masks = np.asarray(masks)
+    one = masks.dtype.type(1)
+    feasible = np.ones(len(masks), dtype=bool)
+    for i, conflict in enumerate(conflicts):
+        if not conflict:
+            continue
+        holds_i = ((masks >> masks.dtype.type(i)) & one).astype(bool)
+        feasible &= ~(holds_i & ((masks & masks.dtype.type(conflict)) != 0))
+    return feasible
+
+
+def bitstrings_to_masks(bitstrings: List[str], n_assets: int) -> np.ndarray:
+    """
+    Convert measured bitstrings to masks in one pass.
+
+    Bitstrings use Qiskit's ordering, with qubit 0 as the rightmost character,
+    so bit i of the mask is the measurement of qubit i (asset i).
+    """
+    if not bitstrings:
+        return np.zeros(0, dtype=mask_dtype(n_assets))
+    raw = ''.join(bitstring.replace(' ', '') for bitstring in bitstrings).encode('ascii')
+    bits = (np.frombuffer(raw, dtype=np.uint8) - ord('0')).reshape(len(bitstrings), -1)
+    if bits.shape[1] != n_assets:
+        raise ValueError(f"Expected {n_assets}-bit measurements, got {bits.shape[1]} bits")
+    return selections_to_masks(bits[:, ::-1])
+
+
+class PortfolioIndex:
+    """Constant-time membership test for a set of portfolio masks
+
+    Small universes use a bitmap with one flag per possible subset; larger
+    ones fall back to a hash set of the masks as Python integers.
+    """
+
+    # Largest universe indexed by a bitmap (2^22 flags = 4 MB)
+    BITMAP_MAX_ASSETS = 22
+
+    def __init__(self, masks: np.ndarray, n_assets: int):
+        """
+        Build the index.
+
+        Args:
+            masks: Portfolio masks to index
+            n_assets: Number of assets in the universe
+        """
+        masks = np.asarray(masks)
+        self.n_assets = n_assets
+        self.size = len(masks)
+        if n_assets <= self.BITMAP_MAX_ASSETS:
+            self._bitmap = np.zeros(1 << n_assets, dtype=bool)
+            self._bitmap[masks.astype(np.intp)] = True
+            self._members = None
+        else:
+            self._bitmap = None
+            self._members = set(masks.tolist())
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, mask: int) -> bool:
+        mask = int(mask)
+        if self._bitmap is not None:
+            return 0 <= mask < len(self._bitmap) and bool(self._bitmap[mask])
+        return mask in self._members
+
+    def contains(self, masks: np.ndarray) -> np.ndarray:
+        """Boolean array marking which of the given masks are indexed"""
+        masks = np.asarray(masks)
+        if self._bitmap is not None:
+            return self._bitmap[masks.astype(np.intp)]
+        return np.fromiter((mask in self._members for mask in masks.tolist()), dtype=bool, count=len(masks))
+
+
+def enumerate_independent_sets(conflicts: np.ndarray,
+                               n_assets: int,
+                               min_assets: int = 1,
+                               max_assets: Optional[int] = None) -> np.ndarray:
+    """
+    Enumerate every feasible portfolio of the correlation conflict graph.
+
+    A portfolio is feasible when it is an independent set of the graph (no two
+    held assets conflict) with at least min_assets members. Assets are decided
+    one at a time over a frontier of partial sets held as arrays: an asset is
+    only added to partial sets it does not conflict with, and partial sets that
+    cannot reach min_assets even by taking every remaining compatible asset are
+    dropped with their whole subtree; partial sets already holding max_assets
+    take no further assets. Infeasible portfolios are never generated.
+
+    Args:
+        conflicts: Conflict bitmask per asset (see conflict_masks)
+        n_assets: Number of assets
+        min_assets: Minimum portfolio size
+        max_assets: Optional maximum portfolio size
+
+    Returns:
+        np.ndarray: Sorted masks of all feasible non-empty portfolios
+    """
+    dtype = mask_dtype(n_assets)
+    conflicts = np.asarray(conflicts).astype(dtype)
+    masks = np.zeros(1, dtype=dtype)     # assets taken so far
+    blocked = np.zeros(1, dtype=dtype)   # assets conflicting with those taken
+
+    for v in range(n_assets):
+        bit = dtype.type(1 << v)
+        can_take = (blocked & bit) == 0
+        if max_assets is not None:
+            can_take &= popcount(masks) < max_assets
+        masks = np.concatenate([masks, masks[can_take] | bit])
+        blocked = np.concatenate([blocked, blocked[can_take] | conflicts[v]])
+
+        # Upper bound on the final size: taken assets plus every later asset
+        # not yet blocked
+        later = dtype.type(((1 << n_assets) - 1) ^ ((1 << (v + 1)) - 1))
+        reachable = popcount(masks).astype(np.int64) + popcount(later & ~blocked)
+        keep = reachable >= max(min_assets, 1)
+        masks, blocked = masks[keep], blocked[keep]
+
+    masks = np.sort(masks[masks != 0])
+    logger.info(f"Enumerated {len(masks)} feasible portfolios of {(1 << n_assets) - 1} subsets")
+    return masks
+
+
+def binomial_table(n_assets: int) -> np.ndarray:
+    """Table of C(c, i) for 0 <= i, c <= N as int64 (exact up to 64 assets)"""
+    table = np.zeros((n_assets + 1, n_assets + 1), dtype=np.int64)
+    for i in range(n_assets + 1):
+        for c in range(i, n_assets + 1):
+            table[i, c] = math.comb(c, i)
+    return table
+
+
+def unrank_combinations(n_assets: int, size: int, start: int, stop: int) -> np.ndarray:
+    """
+    Masks of the size-k subsets with ranks in [start, stop).
+
+    Ranks follow the combinatorial number system: the subset with elements
+    c_k > ... > c_1 has rank C(c_k, k) + ... + C(c_1, 1). This is colex order,
+    which for masks is ascending numeric order, so any rank range of a layer
+    can be produced independently (and in parallel) without visiting the
+    ranks before it. Each element is found for all ranks at once by a binary
+    search in the binomial table.
+    """
+    dtype = mask_dtype(n_assets)
+    table = binomial_table(n_assets)
+    ranks = np.arange(start, stop, dtype=np.int64)
+    masks = np.zeros(len(ranks), dtype=dtype)
+    for i in range(size, 0, -1):
+        # Largest c with C(c, i) <= rank; the row is nondecreasing in c
+        c = np.searchsorted(table[i, :n_assets], ranks, side='right') - 1
+        masks |= np.left_shift(dtype.type(1), c.astype(dtype))
+        ranks -= table[i, c]
+    return masks
+
+
+def layer_ranges(n_assets: int,
+                 min_assets: int,
+                 max_assets: int,
+                 chunk_size: int) -> List[Tuple[int, int, int]]:
+    """Split the layers of sizes [min_assets, max_assets] into (size, start, stop) rank ranges"""
+    ranges = []
+    for size in range(max(min_assets, 1), min(max_assets, n_assets) + 1):
+        count = math.comb(n_assets, size)
+        for start in range(0, count, chunk_size):
+            ranges.append((size, start, min(start + chunk_size, count)))
+    return ranges
+
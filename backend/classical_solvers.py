@@ -0,0 +1,695 @@
+import time
+import heapq
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from backend.candidate_space import (
+    correlation_feasible, mask_dtype, mask_to_indices, masks_to_selections, popcount
+)
+from backend.portfolio_metrics import PortfolioMetricsEngine, PortfolioRanking, TopKSelector
+
+logger = logging.getLogger(__name__)
+
+# Portfolios kept per ranking criterion by the exact solvers
+DEFAULT_TOP_K = 100
+
+# Largest universe enumerated exhaustively on the request path (2^25 subsets);
+# the same limit the frontend advertises for the exhaustive backends
+EXHAUSTIVE_MAX_ASSETS = 25
+
+# Largest universe the Gray-code enumeration accepts
+GRAY_CODE_MAX_ASSETS = EXHAUSTIVE_MAX_ASSETS
+
+# Default search budget of the branch-and-bound solver
+BRANCH_AND_BOUND_TIME_LIMIT = 30.0
+
+
+def solutions_to_portfolios(masks: np.ndarray, n_assets: int) -> List[Dict[str, Any]]:
+    """Turn solver masks into the {'selection', 'selected_indices', 'probability'} shape of the QAOA paths"""
+    portfolios = []
+    for mask in masks:
+        indices = mask_to_indices(mask)
+        selection = [0] * n_assets
+        for i in indices:
+            selection[i] = 1
+        portfolios.append({
+            'selection': selection,
+            'selected_indices': indices,
+            'probability': 1.0 / len(masks)
+        })
+    return portfolios
+
+
+def gray_code_search(qubo_matrix: np.ndarray,
+                     conflicts: np.ndarray,
+                     min_assets: int,
+                     max_assets: Optional[int] = None,
+                     top_k: int = DEFAULT_TOP_K,
+                     metrics_engine: Optional[PortfolioMetricsEngine] = None,
+                     block_bits: int = 16) -> Dict[str, Any]:
+    """
+    Exact QUBO minimization by walking every subset in Gray-code order.
+
+    The assets are split into L low bits (L = min(N, block_bits)) and H = N - L
+    high bits. The high bits are walked in Gray-code order, so consecutive
+    states differ by one flipped asset j and the energy of the high part and
+    the coupling field it induces on every other asset are updated in O(N) from
+    row j of the QUBO matrix. For each high state, all 2^L low completions are
+    scored at once from a precomputed table of low-part energies plus one
+    matrix-vector product with the field. min_assets, max_assets and the
+    correlation conflicts are applied on the fly: conflict counts are updated with each
+    flip, and infeasible completions are masked out before scoring. With a
+    metrics engine, each block of feasible portfolios is also streamed into a
+    PortfolioRanking, so the best Sharpe ratio, return and risk over the whole
+    space are found in memory bounded by top_k and the block size.
+
+    Args:
+        qubo_matrix: (N x N) QUBO matrix; the energy of x is x^T Q x
+        conflicts: Correlation conflict bitmask per asset (see conflict_masks)
+        min_assets: Minimum portfolio size
+        max_assets: Optional maximum portfolio size
+        top_k: Portfolios kept by lowest energy and, with a metrics engine, per ranking criterion
+        metrics_engine: Optional engine used to rank feasible portfolios by Sharpe ratio, return and risk
+        block_bits: Number of low bits scored per vectorized block
+
+    Returns:
+        Dict with 'portfolios' (lowest energy first, then the best portfolios of
+        the other criteria not already included), 'feasible_count',
+        'best_energy' and 'elapsed_sec'
+    """
+    start_time = time.time()
+    qubo_matrix = np.asarray(qubo_matrix, dtype=np.float64)
+    n_assets = qubo_matrix.shape[0]
+    max_assets = n_assets if max_assets is None else max_assets
+    if n_assets > GRAY_CODE_MAX_ASSETS:
+        raise ValueError(f"Gray-code enumeration supports at most {GRAY_CODE_MAX_ASSETS} assets, got {n_assets}")
+
+    dtype = mask_dtype(n_assets)
+    conflicts = np.asarray(conflicts).astype(dtype)
+    n_low = min(n_assets, block_bits)
+    n_high = n_assets - n_low
+
+    # Pairwise coupling seen by one flipped asset: Q_ij + Q_ji, without the diagonal
+    coupling = qubo_matrix + qubo_matrix.T
+    np.fill_diagonal(coupling, 0.0)
+    diagonal = np.diag(qubo_matrix).copy()
+
+    # Tables over every low completion
+    low_masks = np.arange(1 << n_low, dtype=dtype)
+    low_x = masks_to_selections(low_masks, n_low).astype(np.float64)
+    low_energy = np.einsum('ij,ij->i', low_x @ qubo_matrix[:n_low, :n_low], low_x)
+    low_count = popcount(low_masks).astype(np.int64)
+    low_bits = dtype.type((1 << n_low) - 1)
+    low_feasible = correlation_feasible(low_masks, conflicts[:n_low] & low_bits)
+    low_conflicts = masks_to_selections(conflicts & low_bits, n_low).astype(np.int64)
+    low_weights = np.left_shift(dtype.type(1), np.arange(n_low, dtype=dtype))
+
+    # State of the high part, updated on each Gray-code flip
+    field = np.zeros(n_assets)              # sum of coupling to the selected high assets
+    high_energy = 0.0
+    high_mask = 0
+    high_count = 0
+    high_conflict_pairs = 0
+    blocked = np.zeros(n_low, dtype=np.int64)   # selected high assets conflicting with each low asset
+
+    by_energy = TopKSelector(top_k, dtype)
+    ranking = PortfolioRanking(top_k, dtype, metrics_engine) if metrics_engine is not None else None
+    feasible_count = 0
+
+    for step in range(1 << n_high):
+        if step:
+            # Gray code g(k) = k ^ (k >> 1) flips the lowest set bit of k
+            j = n_low + (step & -step).bit_length() - 1
+            bit = 1 << j
+            sign = -1.0 if high_mask & bit else 1.0
+            high_mask ^= bit
+            high_energy += sign * (diagonal[j] + field[j])
+            field += sign * coupling[:, j]
+            high_count += int(sign)
+            shared = bin(int(conflicts[j]) & high_mask & ~bit).count('1')
+            high_conflict_pairs += int(sign) * shared
+            blocked += int(sign) * low_conflicts[j]
+
+        if high_conflict_pairs or high_count > max_assets:
+            continue
+
+        blocked_mask = dtype.type(np.sum(low_weights[blocked > 0], dtype=dtype))
+        size = low_count + high_count
+        valid = low_feasible & ((low_masks & blocked_mask) == 0) & (size >= min_assets) & (size <= max_assets)
+        valid[0] &= high_mask != 0   # the empty portfolio is not a candidate
+        idx = np.flatnonzero(valid)
+        if len(idx) == 0:
+            continue
+
+        masks = low_masks[idx] | dtype.type(high_mask)
+        energies = low_energy[idx] + low_x[idx] @ field[:n_low] + high_energy
+        feasible_count += len(idx)
+        by_energy.push(masks, energies)
+        if ranking is not None:
+            ranking.push(masks)
+
+    solutions = by_energy.masks
+    if ranking is not None:
+        ranked = ranking.ids()
+        extra = ranked[~np.isin(ranked, solutions)]
+        solutions = np.concatenate([solutions, extra])
+
+    elapsed = time.time() - start_time
+    logger.info(f"Gray-code search visited {(1 << n_assets) - 1} subsets ({feasible_count} feasible) "
+                f"in {elapsed:.2f} seconds")
+    return {
+        'portfolios': solutions_to_portfolios(solutions, n_assets) if len(solutions) else [],
+        'feasible_count': feasible_count,
+        'best_energy': float(by_energy.keys[0]) if len(by_energy.keys) else None,
+        'elapsed_sec': elapsed
+    }
+
+
+def branch_and_bound_search(qubo_matrix: np.ndarray,
+                            conflicts: np.ndarray,
+                            min_assets: int,
+                            max_assets: Optional[int] = None,
+                            top_k: int = 10,
+                            time_limit: float = BRANCH_AND_BOUND_TIME_LIMIT,
+                            node_limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Exact QUBO minimization by depth-first branch and bound.
+
+    Assets are branched on in order of increasing diagonal term, taking the
+    asset before leaving it out. A node fixes the assets before its depth; the
+    assets still free are the unfixed ones that do not conflict with any taken
+    asset. With d_j the energy change of adding free asset j alone and the
+    negative couplings of each free pair counted once, every completion T of
+    the node satisfies
+
+        E(S + T) >= E(S) + sum over j in T of (d_j + negative couplings of j)
+
+    so the bound sums the negative terms, plus the smallest non-negative ones
+    when min_assets forces more assets in, and at most as many terms as
+    max_assets still allows. Nodes whose bound cannot beat the k-th best
+    portfolio found are pruned, as are nodes with too few free assets left to
+    reach min_assets. Conflicting assets are never taken together and no
+    portfolio grows past max_assets, so every visited portfolio is feasible.
+
+    The search stops when the tree is exhausted (the top-K are then proven
+    optimal) or when the time or node budget runs out, in which case the
+    lower bound over the unexplored nodes gives the optimality gap.
+
+    Args:
+        qubo_matrix: (N x N) QUBO matrix; the energy of x is x^T Q x
+        conflicts: (N x N) boolean matrix, True where two assets may not be held together
+        min_assets: Minimum portfolio size
+        max_assets: Optional maximum portfolio size
+        top_k: Portfolios kept by lowest energy
+        time_limit: Search budget in seconds
+        node_limit: Optional budget in explored nodes
+
+    Returns:
+        Dict with 'portfolios' (lowest energy first), 'best_energy',
+        'lower_bound', 'gap', 'proven_optimal', 'nodes' and 'elapsed_sec'
+    """
+    start_time = time.time()
+    qubo_matrix = np.asarray(qubo_matrix, dtype=np.float64)
+    n_assets = qubo_matrix.shape[0]
+    min_assets = max(min_assets, 1)
+    max_assets = n_assets if max_assets is None else max_assets
+
+    # Branch in order of increasing diagonal; work in that order throughout
+    order = np.argsort(np.diag(qubo_matrix), kind='stable')
+    q = qubo_matrix[np.ix_(order, order)]
+    coupling = q + q.T
+    np.fill_diagonal(coupling, 0.0)
+    diagonal = np.diag(q).copy()
+    # Negative coupling of each pair, counted once on the earlier asset
+    negative = np.triu(np.minimum(coupling, 0.0), k=1)
+    conflicts = np.asarray(conflicts, dtype=bool)[np.ix_(order, order)]
+
+    # Max-heap (negated energy) of the best portfolios found, as original-order masks
+    best = []
+    counter = 0
+
+    def threshold() -> float:
+        return -best[0][0] if len(best) >= top_k else np.inf
+
+    def bound(node) -> Optional[float]:
+        """Lower bound of a node, or None when it cannot reach min_assets"""
+        depth, _, count, energy, field, blocked = node
+        free = ~blocked
+        free[:depth] = False
+        idx = np.flatnonzero(free)
+        needed = min_assets - count
+        room = min(len(idx), max_assets - count)
+        if room < needed:
+            return None
+        if room == 0:
+            return energy
+        needed = max(needed, 0)
+        terms = np.sort(field[idx] + (negative[idx] @ free))
+        pair_bound = terms[:needed].sum() + np.minimum(terms[needed:room], 0.0).sum()
+
+        # Adding t assets: each pays half its t - 1 cheapest couplings to other free assets
+        rows = coupling[np.ix_(idx, idx)]
+        np.fill_diagonal(rows, np.inf)   # an asset's own entry sorts last and is never counted
+        rows = np.sort(rows, axis=1)
+        half_rows = np.concatenate([np.zeros((len(idx), 1)), 0.5 * np.cumsum(rows[:, :-1], axis=1)], axis=1)
+        per_size = np.cumsum(np.sort(field[idx][:, None] + half_rows, axis=0), axis=0)
+        sizes = np.arange(max(needed, 1), room + 1)
+        size_bound = per_size[sizes - 1, sizes - 1].min()
+        if needed == 0:
+            size_bound = min(size_bound, 0.0)
+        return energy + max(pair_bound, size_bound)
+
+    root = (0, 0, 0, 0.0, diagonal.copy(), np.zeros(n_assets, dtype=bool))
+    stack = [root]
+    nodes = 0
+    exhausted = True
+
+    while stack:
+        if (nodes & 1023) == 0 and nodes and (
+                time.time() - start_time > time_limit or (node_limit is not None and nodes >= node_limit)):
+            exhausted = False
+            break
+        node = stack.pop()
+        nodes += 1
+        node_bound = bound(node)
+        if node_bound is None or node_bound >= threshold() - 1e-12:
+            continue
+
+        depth, mask, count, energy, field, blocked = node
+        free = np.flatnonzero(~blocked[depth:])
+        if len(free) == 0 or count >= max_assets:
+            continue
+        j = depth + free[0]
+
+        # Leave asset j out (explored second)
+        stack.append((j + 1, mask, count, energy, field, blocked))
+
+        # Take asset j (explored first); the portfolio itself is a candidate
+        child_mask = mask | (1 << int(order[j]))
+        child_energy = energy + field[j]
+        if count + 1 >= min_assets and child_energy < threshold():
+            counter += 1
+            heapq.heappush(best, (-child_energy, counter, child_mask))
+            if len(best) > top_k:
+                heapq.heappop(best)
+        stack.append((j + 1, child_mask, count + 1, child_energy,
+                      field + coupling[:, j], blocked | conflicts[j]))
+
+    solutions = [entry for entry in sorted(best, key=lambda entry: (-entry[0], entry[1]))]
+    best_energy = -solutions[0][0] if solutions else None
+
+    # Unexplored nodes bound what remains; pruned ones could not beat the incumbents
+    lower_bound = best_energy
+    if not exhausted:
+        open_bounds = [b for b in (bound(node) for node in stack) if b is not None]
+        if open_bounds:
+            lower_bound = min(open_bounds) if best_energy is None else min(best_energy, min(open_bounds))
+    gap = None
+    if best_energy is not None and lower_bound is not None:
+        gap = (best_energy - lower_bound) / max(abs(best_energy), 1e-12)
+    proven_optimal = bool(exhausted or gap == 0.0)
+
+    elapsed = time.time() - start_time
+    if proven_optimal:
+        logger.info(f"Branch and bound proved the top {len(solutions)} portfolios optimal "
+                    f"after {nodes} nodes in {elapsed:.2f} seconds")
+    else:
+        logger.info(f"Branch and bound stopped after {nodes} nodes in {elapsed:.2f} seconds "
+                    f"with best energy {best_energy} and gap {gap}")
+    return {
+        'portfolios': solutions_to_portfolios([mask for _, _, mask in solutions], n_assets) if solutions else [],
+        'best_energy': best_energy,
+        'lower_bound': lower_bound,
+        'gap': gap,
+        'proven_optimal': proven_optimal,
+        'nodes': nodes,
+        'elapsed_sec': elapsed
+    }
+
+
+def annealing_search(qubo_matrix: np.ndarray,
+                     conflicts: np.ndarray,
+                     min_assets: int,
+                     max_assets: Optional[int] = None,
+                     n_replicas: int = 64,
+                     sweeps: int = 1000,
+                     time_limit: Optional[float] = None,
+                     tempering: bool = False,
+                     max_portfolios: int = 1024,
+                     seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Heuristic QUBO minimization with many single-flip Metropolis chains at once.
+
+    All replicas are held as one (R x N) 0/1 matrix together with their local
+    fields, so a sweep visits each asset once and decides the flip for every
+    replica with a few vectorized operations; accepted flips update the
+    fields from the flipped asset's row of the coupling matrix. Taking an
+    asset that conflicts with a held one, or growing past max_assets, is never
+    proposed, so every state is correlation-feasible; min_assets is enforced
+    when sampling.
+
+    In annealing mode every replica cools geometrically from a hot to a cold
+    temperature. In tempering mode the replicas sit on a fixed geometric
+    temperature ladder and adjacent replicas swap temperatures after each
+    sweep with the parallel-tempering acceptance rule.
+
+    Args:
+        qubo_matrix: (N x N) QUBO matrix; the energy of x is x^T Q x
+        conflicts: (N x N) boolean matrix, True where two assets may not be held together
+        min_assets: Minimum portfolio size
+        max_assets: Optional maximum portfolio size
+        n_replicas: Number of chains run together
+        sweeps: Sweep budget
+        time_limit: Optional budget in seconds; the run stops at whichever budget ends first
+        tempering: Use parallel tempering instead of annealing
+        max_portfolios: Most distinct portfolios returned
+        seed: Seed of the random generator
+
+    Returns:
+        Dict with 'portfolios' (most sampled first, probability = share of the
+        samples), 'best_energy', 'sweeps', 'samples' and 'elapsed_sec'
+    """
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+    qubo_matrix = np.asarray(qubo_matrix, dtype=np.float64)
+    n_assets = qubo_matrix.shape[0]
+    min_assets = max(min_assets, 1)
+    max_assets = n_assets if max_assets is None else max_assets
+    conflicts = np.asarray(conflicts, dtype=bool)
+
+    coupling = qubo_matrix + qubo_matrix.T
+    np.fill_diagonal(coupling, 0.0)
+    diagonal = np.diag(qubo_matrix).copy()
+    conflict_counts = conflicts.astype(np.int64)
+
+    # Random feasible start: take assets in random order unless they conflict
+    x = np.zeros((n_replicas, n_assets), dtype=np.int8)
+    blocked = np.zeros((n_replicas, n_assets), dtype=np.int64)
+    count = np.zeros(n_replicas, dtype=np.int64)
+    for j in rng.permuted(np.tile(np.arange(n_assets), (n_replicas, 1)), axis=1).T:
+        take = np.flatnonzero((blocked[np.arange(n_replicas), j] == 0) & (count < max_assets)
+                              & (rng.random(n_replicas) < 0.5))
+        x[take, j[take]] = 1
+        blocked[take] += conflict_counts[j[take]]
+        count[take] += 1
+    field = x @ coupling + diagonal     # energy change of taking each asset
+    energy = np.einsum('ij,ij->i', x @ qubo_matrix, x)
+
+    # Temperatures from the typical size of a single flip
+    scale = np.median(np.abs(field)) or 1.0
+    hot, cold = scale, scale * 1e-6
+    if tempering:
+        ladder = hot * (cold / hot) ** np.linspace(0.0, 1.0, n_replicas)
+        temperature = ladder[::-1].copy()   # replica r starts at ladder slot n_replicas - 1 - r
+        slot = np.arange(n_replicas)[::-1].copy()
+    else:
+        temperature = np.full(n_replicas, hot)
+
+    best_energy = np.inf
+    best_state = None
+    samples = []
+    rows = np.arange(n_replicas)
+    sweep = 0
+
+    while sweep < sweeps:
+        elapsed = time.time() - start_time
+        if time_limit is not None and elapsed >= time_limit:
+            break
+        progress = sweep / sweeps
+        if time_limit is not None:
+            progress = max(progress, elapsed / time_limit)
+        if not tempering:
+            temperature[:] = hot * (cold / hot) ** progress
+
+        for j in rng.permutation(n_assets):
+            held = x[:, j] == 1
+            delta = np.where(held, -field[:, j], field[:, j])
+            allowed = held | ((blocked[:, j] == 0) & (count < max_assets))
+            with np.errstate(over='ignore'):
+                accept = allowed & ((delta <= 0) | (rng.random(n_replicas) < np.exp(-delta / temperature)))
+            flipped = rows[accept]
+            if len(flipped) == 0:
+                continue
+            sign = np.where(held[flipped], -1, 1)
+            x[flipped, j] += sign.astype(np.int8)
+            count[flipped] += sign
+            energy[flipped] += delta[flipped]
+            field[flipped] += sign[:, None] * coupling[j]
+            blocked[flipped] += sign[:, None] * conflict_counts[j]
+
+        if tempering:
+            # Swap temperatures of replicas on adjacent ladder slots, even or odd pairs in turn
+            by_slot = np.argsort(slot)
+            lower = by_slot[sweep % 2:-1:2]
+            upper = by_slot[sweep % 2 + 1::2][:len(lower)]
+            with np.errstate(over='ignore'):
+                log_ratio = (1.0 / temperature[lower] - 1.0 / temperature[upper]) * (energy[lower] - energy[upper])
+                swap = rng.random(len(lower)) < np.exp(np.minimum(log_ratio, 0.0))
+            a, b = lower[swap], upper[swap]
+            temperature[a], temperature[b] = temperature[b], temperature[a].copy()
+            slot[a], slot[b] = slot[b], slot[a].copy()
+
+        feasible = count >= min_assets
+        if np.any(feasible):
+            r = rows[feasible][np.argmin(energy[feasible])]
+            if energy[r] < best_energy:
+                best_energy, best_state = energy[r], x[r].copy()
+
+        # Sample the cold half of the schedule, or the coldest replicas when tempering
+        sampled = feasible & (temperature <= np.quantile(temperature, 0.25)) if tempering else (
+            feasible if progress >= 0.5 else np.zeros(n_replicas, dtype=bool))
+        if np.any(sampled):
+            samples.append(np.packbits(x[sampled], axis=1))
+        sweep += 1
+
+    portfolios = []
+    n_samples = 0
+    if best_state is not None:
+        packed = np.concatenate(samples + [np.packbits(best_state[None, :], axis=1)])
+        states, counts = np.unique(packed, axis=0, return_counts=True)
+        n_samples = int(counts.sum())
+        order = np.argsort(-counts, kind='stable')[:max_portfolios]
+        best_packed = np.packbits(best_state[None, :], axis=1)[0]
+        if not np.any(np.all(states[order] == best_packed, axis=1)):
+            order = np.concatenate([order[:max_portfolios - 1],
+                                    np.flatnonzero(np.all(states == best_packed, axis=1))])
+        selections = np.unpackbits(states[order], axis=1, count=n_assets)
+        for selection, count in zip(selections, counts[order]):
+            portfolios.append({
+                'selection': selection.astype(int).tolist(),
+                'selected_indices': np.flatnonzero(selection).tolist(),
+                'probability': count / n_samples
+            })
+
+    elapsed = time.time() - start_time
+    logger.info(f"{'Parallel tempering' if tempering else 'Simulated annealing'} ran {sweep} sweeps of "
+                f"{n_replicas} replicas in {elapsed:.2f} seconds")
+    return {
+        'portfolios': portfolios,
+        'best_energy': float(best_state @ qubo_matrix @ best_state) if best_state is not None else None,
+        'sweeps': sweep,
+        'samples': n_samples,
+        'elapsed_sec': elapsed
+    }
+
+
+def tabu_search(qubo_matrix: np.ndarray,
+                conflicts: np.ndarray,
+                min_assets: int,
+                max_assets: Optional[int] = None,
+                top_k: int = DEFAULT_TOP_K,
+                iterations: int = 20000,
+                time_limit: Optional[float] = None,
+                tenure: Optional[int] = None,
+                restart_after: Optional[int] = None,
+                seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Heuristic QUBO minimization by tabu search over flips and swaps.
+
+    The one-flip energy delta of every asset is read from a local field
+    vector that is updated in O(N) from the flipped asset's coupling row after
+    each move, so choosing a move never re-evaluates the QUBO. A swap (drop
+    one held asset and take one that is not held) costs the two flip deltas
+    less their coupling, and keeps the portfolio size, so the search can move
+    when the size sits at min_assets or max_assets (or both). Each iteration
+    takes the best allowed non-tabu move, even when it raises the energy; a
+    moved asset stays tabu for the tenure plus a small random extra, unless
+    the move would beat the best energy found (aspiration). Taking an asset
+    that conflicts with a held one, dropping below min_assets or growing past
+    max_assets are not allowed moves. The search starts from a greedy
+    portfolio; after restart_after iterations without improvement it restarts
+    from a random perturbation of the best portfolio, or from a randomized
+    greedy portfolio while none has been feasible.
+
+    Args:
+        qubo_matrix: (N x N) QUBO matrix; the energy of x is x^T Q x
+        conflicts: (N x N) boolean matrix, True where two assets may not be held together
+        min_assets: Minimum portfolio size
+        max_assets: Optional maximum portfolio size
+        top_k: Distinct portfolios kept by lowest energy
+        iterations: Move budget
+        time_limit: Optional budget in seconds; the run stops at whichever budget ends first
+        tenure: Iterations a moved asset stays tabu (default max(5, N // 8))
+        restart_after: Iterations without improvement before a restart (default 10 * N)
+        seed: Seed of the random generator
+
+    Returns:
+        Dict with 'portfolios' (lowest energy first), 'best_energy',
+        'iterations', 'restarts' and 'elapsed_sec'
+    """
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+    qubo_matrix = np.asarray(qubo_matrix, dtype=np.float64)
+    n_assets = qubo_matrix.shape[0]
+    min_assets = max(min_assets, 1)
+    max_assets = n_assets if max_assets is None else max_assets
+    conflict_counts = np.asarray(conflicts, dtype=bool).astype(np.int64)
+    tenure = tenure or max(5, n_assets // 8)
+    restart_after = restart_after or 10 * n_assets
+
+    coupling = qubo_matrix + qubo_matrix.T
+    np.fill_diagonal(coupling, 0.0)
+    diagonal = np.diag(qubo_matrix).copy()
+
+    # Current state: selection, local fields, conflict counts, energy, size and mask
+    x = np.zeros(n_assets, dtype=bool)
+    field = diagonal.copy()
+    blocked = np.zeros(n_assets, dtype=np.int64)
+    energy = 0.0
+    count = 0
+    mask = 0
+
+    def flip(j: int) -> None:
+        nonlocal energy, count, mask
+        sign = -1 if x[j] else 1
+        energy += field[j] if sign > 0 else -field[j]
+        x[j] = not x[j]
+        count += sign
+        mask ^= 1 << int(j)
+        field[:] += sign * coupling[j]
+        blocked[:] += sign * conflict_counts[j]
+
+    def greedy(noise: float = 0.0) -> None:
+        """Grow the current portfolio by the lowest-energy allowed additions (optionally jittered)"""
+        while count < max_assets:
+            addable = ~x & (blocked == 0)
+            if not np.any(addable):
+                return
+            scores = field + noise * np.abs(field).max() * rng.standard_normal(n_assets)
+            j = int(np.argmin(np.where(addable, scores, np.inf)))
+            if count >= min_assets and field[j] >= 0:
+                return
+            flip(j)
+
+    def perturb(n_moves: int) -> None:
+        """Apply up to n_moves random flips or swaps, skipping moves that break the constraints"""
+        for j in rng.permutation(n_assets)[:n_moves]:
+            if x[j]:
+                if count - 1 >= min_assets:
+                    flip(j)
+                    continue
+                partners = np.flatnonzero(~x & (blocked - conflict_counts[j] == 0))
+            else:
+                if blocked[j] == 0 and count < max_assets:
+                    flip(j)
+                    continue
+                partners = np.flatnonzero(x & (blocked[j] - conflict_counts[:, j] == 0))
+            if len(partners):
+                flip(j)
+                flip(int(rng.choice(partners)))
+
+    best = []            # max-heap (negated energy) of the best distinct portfolios
+    kept = set()
+    counter = 0
+    best_energy = np.inf
+    best_x = None
+
+    def record() -> bool:
+        """Keep the current portfolio if it is feasible; returns True when it is a new best"""
+        nonlocal counter, best_energy, best_x
+        if count < min_assets:
+            return False
+        if mask not in kept and (len(best) < top_k or energy < -best[0][0]):
+            counter += 1
+            heapq.heappush(best, (-energy, counter, mask))
+            kept.add(mask)
+            if len(best) > top_k:
+                kept.discard(heapq.heappop(best)[2])
+        if energy < best_energy - 1e-12:
+            best_energy, best_x = energy, x.copy()
+            return True
+        return False
+
+    greedy()
+    record()
+    tabu_until = np.zeros(n_assets, dtype=np.int64)
+    since_improvement = 0
+    restarts = 0
+    iteration = 0
+
+    while iteration < iterations:
+        if (iteration & 255) == 0 and time_limit is not None and time.time() - start_time >= time_limit:
+            break
+        iteration += 1
+        free = (tabu_until < iteration)
+
+        # Single flips
+        delta = np.where(x, -field, field)
+        allowed = np.where(x, count - 1 >= min_assets, (blocked == 0) & (count < max_assets))
+        aspiration = (count + np.where(x, -1, 1) >= min_assets) & (energy + delta < best_energy - 1e-12)
+        flip_scores = np.where(allowed & (free | aspiration), delta, np.inf)
+        move_delta = flip_scores.min() if n_assets else np.inf
+        move = (int(np.argmin(flip_scores)),) if np.isfinite(move_delta) else ()
+
+        # Swaps: drop held asset i and take asset j in one move
+        held, others = np.flatnonzero(x), np.flatnonzero(~x)
+        if len(held) and len(others) and count <= max_assets:
+            swap_delta = -field[held][:, None] + field[others][None, :] - coupling[np.ix_(held, others)]
+            swap_allowed = blocked[others][None, :] - conflict_counts[np.ix_(held, others)] == 0
+            swap_free = free[held][:, None] & free[others][None, :]
+            swap_aspiration = (count >= min_assets) & (energy + swap_delta < best_energy - 1e-12)
+            swap_scores = np.where(swap_allowed & (swap_free | swap_aspiration), swap_delta, np.inf)
+            a, b = np.unravel_index(int(np.argmin(swap_scores)), swap_scores.shape)
+            if swap_scores[a, b] < move_delta:
+                move_delta, move = swap_scores[a, b], (int(held[a]), int(others[b]))
+
+        if not move:
+            since_improvement = restart_after
+        else:
+            for j in move:
+                flip(j)
+                tabu_until[j] = iteration + tenure + rng.integers(0, tenure // 2 + 1)
+
+            since_improvement = 0 if record() else since_improvement + 1
+
+        if since_improvement >= restart_after:
+            if best_x is not None:
+                # Restart from the best portfolio with a random share of its assets moved
+                for j in np.flatnonzero(x != best_x):
+                    flip(j)
+                perturb(max(2, n_assets // 4))
+            else:
+                # No feasible portfolio yet: rebuild one greedily from a random first asset
+                for j in np.flatnonzero(x):
+                    flip(j)
+                flip(int(rng.integers(n_assets)))
+                greedy(noise=0.5)
+            record()
+            tabu_until[:] = 0
+            since_improvement = 0
+            restarts += 1
+
+    masks = [entry[2] for entry in sorted(best, key=lambda entry: (-entry[0], entry[1]))]
+    portfolios = solutions_to_portfolios(masks, n_assets) if masks else []
+    best_energy = float(best_x @ qubo_matrix @ best_x) if best_x is not None else None
+
+    elapsed = time.time() - start_time
+    logger.info(f"Tabu search ran {iteration} iterations with {restarts} restarts in {elapsed:.2f} seconds")
+    return {
+        'portfolios': portfolios,
+        'best_energy': best_energy,
+        'iterations': iteration,
+        'restarts': restarts,
+        'elapsed_sec': elapsed
+    }
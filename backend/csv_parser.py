@@ -0,0 +1,130 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+UTF8_BOM = b'\xef\xbb\xbf'
+NEWLINE, CARRIAGE_RETURN = ord('\n'), ord('\r')
+COMMA, DASH, DOT, QUOTE = ord(','), ord('-'), ord('.'), ord('"')
+ZERO = ord('0')
+
+# Byte offsets of the DD, MM and YYYY digits within a DD-MM-YYYY date
+DATE_DIGIT_OFFSETS = np.array([0, 1, 3, 4, 6, 7, 8, 9])
+DATE_WIDTH = 10
+MAX_CLOSE_DIGITS = 15  # mantissas stay exactly representable as float64
+
+
+def parse_price_csv(file_path: str) -> Optional[pd.DataFrame]:
+    """Parse a Date/Close price file in the data/ layout, or return None if it does not match"""
+    with open(file_path, 'rb') as f:
+        return parse_price_bytes(f.read())
+
+
+def parse_price_bytes(raw: bytes) -> Optional[pd.DataFrame]:
+    """
+    Decode the contents of a Date/Close price file with vectorized NumPy operations.
+
+    The expected layout is an optional UTF-8 BOM, a two-column Date/Close header
+    (case and surrounding spaces ignored), then DD-MM-YYYY dates and plain or
+    quoted closes with thousands separators, such as "3,111.50". Closes are
+    assembled as an integer mantissa divided by a power of ten, which gives the
+    same correctly rounded values as pandas' parser.
+
+    Args:
+        raw: File contents
+
+    Returns:
+        Optional[pd.DataFrame]: Unsorted Date/Close frame (NaN for empty closes),
+        or None if the contents do not follow the layout
+    """
+    if raw.startswith(UTF8_BOM):
+        raw = raw[len(UTF8_BOM):]
+    header_end = raw.find(b'\n')
+    if header_end < 0:
+        return None
+    header = raw[:header_end].decode('utf-8', errors='replace').split(',')
+    if [column.strip().lower() for column in header] != ['date', 'close']:
+        return None
+
+    body = np.frombuffer(raw, dtype=np.uint8, offset=header_end + 1)
+    body = body[body != CARRIAGE_RETURN]
+    if len(body) == 0:
+        return None
+    if body[-1] != NEWLINE:
+        body = np.append(body, np.uint8(NEWLINE))
+
+    # Line bounds, skipping blank lines
+    ends = np.flatnonzero(body == NEWLINE)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    nonblank = ends > starts
+    starts, ends = starts[nonblank], ends[nonblank]
+    if len(starts) == 0 or (ends - starts <= DATE_WIDTH).any():
+        return None
+
+    dates = _decode_dates(body, starts)
+    if dates is None:
+        return None
+    closes = _decode_closes(body, starts + DATE_WIDTH + 1, ends)
+    if closes is None:
+        return None
+
+    return pd.DataFrame({'Date': dates.astype('datetime64[ns]'), 'Close': closes})
+
+
+def _decode_dates(body: np.ndarray, starts: np.ndarray) -> Optional[np.ndarray]:
+    """Decode the DD-MM-YYYY date at the start of each line, or None on any malformed date"""
+    if not ((body[starts + 2] == DASH) & (body[starts + 5] == DASH) & (body[starts + DATE_WIDTH] == COMMA)).all():
+        return None
+
+    digits = body[starts[:, None] + DATE_DIGIT_OFFSETS].astype(np.int64) - ZERO
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 2] * 10 + digits[:, 3]
+    year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+    if ((month < 1) | (month > 12) | (day < 1)).any():
+        return None
+
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (day - 1)
+    # Days past the end of the month roll into the next one
+    if (dates.astype('datetime64[M]') != months).any():
+        return None
+    return dates
+
+
+def _decode_closes(body: np.ndarray, field_starts: np.ndarray, ends: np.ndarray) -> Optional[np.ndarray]:
+    """Decode the close field [field_starts, ends) of each line, or None on any malformed close"""
+    n_lines = len(field_starts)
+    lengths = ends - field_starts
+    line = np.repeat(np.arange(n_lines), lengths)
+    positions = np.arange(len(line)) - np.repeat(np.cumsum(lengths) - lengths, lengths) + field_starts[line]
+    chars = body[positions]
+
+    is_digit = (chars >= ZERO) & (chars <= ZERO + 9)
+    is_dot = chars == DOT
+    if not (is_digit | is_dot | (chars == COMMA) | (chars == QUOTE)).all():
+        return None
+
+    digit_counts = np.bincount(line, weights=is_digit, minlength=n_lines)
+    if (np.bincount(line, weights=is_dot, minlength=n_lines) > 1).any() or (digit_counts > MAX_CLOSE_DIGITS).any():
+        return None
+
+    # Mantissa: each digit weighted by the number of digits that follow it on its line
+    digit_line = line[is_digit]
+    following = np.cumsum(is_digit[::-1])[::-1][is_digit] - 1
+    following -= np.concatenate((np.cumsum(digit_counts[::-1])[::-1][1:], [0])).astype(np.int64)[digit_line]
+    mantissa = np.bincount(digit_line, weights=(chars[is_digit] - ZERO) * 10.0 ** following, minlength=n_lines)
+
+    # Scale: number of digits after the decimal point
+    dot_index = np.full(n_lines, len(chars))
+    dot_index[line[is_dot]] = np.flatnonzero(is_dot)
+    fraction_digits = np.bincount(line, weights=is_digit & (np.arange(len(chars)) > dot_index[line]),
+                                  minlength=n_lines)
+
+    closes = mantissa / 10.0 ** fraction_digits
+    closes[digit_counts == 0] = np.nan
+    return closes
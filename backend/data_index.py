@@ -0,0 +1,142 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DataDirectoryIndex:
+    """In-memory index of the ticker CSV files in a data directory
+
+    Keeps one entry per ticker with its file fingerprint (size, mtime) and
+    metadata (row count, first/last date, last close), plus a version hash over
+    all fingerprints. Only files whose fingerprint changed are re-read on
+    refresh. A background thread can poll the directory so readers always
+    answer from memory; without it, reads refresh the index once it is older
+    than the poll interval.
+    """
+
+    def __init__(self,
+                 data_dir: str,
+                 loader: Callable[[str, os.stat_result], Tuple[np.ndarray, np.ndarray]],
+                 poll_interval: float = 5.0):
+        """
+        Initialize the index.
+
+        Args:
+            data_dir: Directory containing <TICKER>.csv files
+            loader: Callable returning (dates, closes) arrays for a ticker and its stat result
+            poll_interval: Seconds between directory scans
+        """
+        self.data_dir = data_dir
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self.version = None
+        self._entries = {}  # ticker -> {'fingerprint': (size, mtime_ns), 'metadata': {...}}
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def refresh(self) -> bool:
+        """Rescan the directory, re-reading changed files; return True if anything changed"""
+        with self._lock:
+            try:
+                names = [f for f in os.listdir(self.data_dir) if f.endswith('.csv')]
+            except OSError:
+                logger.warning(f"Data directory {self.data_dir} does not exist")
+                names = []
+
+            entries = {}
+            changed = []
+            for name in names:
+                ticker = os.path.splitext(name)[0]
+                try:
+                    stat = os.stat(os.path.join(self.data_dir, name))
+                except OSError:
+                    continue
+                fingerprint = (stat.st_size, stat.st_mtime_ns)
+                entry = self._entries.get(ticker)
+                if entry is None or entry['fingerprint'] != fingerprint:
+                    entry = {'fingerprint': fingerprint, 'metadata': self._read_metadata(ticker, stat)}
+                    changed.append(ticker)
+                entries[ticker] = entry
+
+            removed = set(self._entries) - set(entries)
+            self._entries = entries
+            self._refreshed_at = time.monotonic()
+            if not changed and not removed and self.version is not None:
+                return False
+
+            fingerprints = [f"{ticker}:{size}:{mtime_ns}"
+                            for ticker, (size, mtime_ns) in sorted((t, e['fingerprint']) for t, e in entries.items())]
+            self.version = hashlib.sha1('|'.join(fingerprints).encode('utf-8')).hexdigest()
+            logger.info(f"Indexed {len(entries)} tickers in {self.data_dir} "
+                        f"({len(changed)} changed, {len(removed)} removed)")
+            return True
+
+    def _read_metadata(self, ticker: str, stat: os.stat_result) -> Dict[str, Any]:
+        """Row count, first/last date and last close of one ticker file"""
+        try:
+            dates, closes = self.loader(ticker, stat)
+        except Exception as e:
+            logger.error(f"Error indexing {ticker}: {str(e)}")
+            return {'rows': 0, 'first_date': None, 'last_date': None, 'last_close': None}
+
+        if len(dates) == 0:
+            return {'rows': 0, 'first_date': None, 'last_date': None, 'last_close': None}
+        dates = dates.view('datetime64[ns]')
+        return {
+            'rows': int(len(dates)),
+            'first_date': pd.Timestamp(dates[0]).strftime('%Y-%m-%d'),
+            'last_date': pd.Timestamp(dates[-1]).strftime('%Y-%m-%d'),
+            'last_close': float(closes[-1])
+        }
+
+    def ensure_fresh(self) -> None:
+        """Refresh now unless the watcher is running or the last scan is recent"""
+        if self._watcher is not None and self._watcher.is_alive() and self.version is not None:
+            return
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.poll_interval:
+            self.refresh()
+
+    def tickers(self) -> List[str]:
+        """Sorted tickers with a CSV file in the data directory"""
+        self.ensure_fresh()
+        with self._lock:
+            return sorted(self._entries)
+
+    def metadata(self) -> Dict[str, Dict[str, Any]]:
+        """Per-ticker metadata, keyed by ticker"""
+        self.ensure_fresh()
+        with self._lock:
+            return {ticker: dict(self._entries[ticker]['metadata']) for ticker in sorted(self._entries)}
+
+    def start_watcher(self) -> None:
+        """Poll the directory from a daemon thread every poll_interval seconds"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self.refresh()
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name='data-index-watcher', daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.data_dir} every {self.poll_interval}s")
+
+    def stop_watcher(self) -> None:
+        """Stop the polling thread"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing data index: {str(e)}")
@@ -1,81 +1,373 @@
 import os
+import hashlib
+import threading
+import concurrent.futures
 import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
 
+from backend.csv_parser import parse_price_csv
+from backend.data_index import DataDirectoryIndex
+from backend.frame_cache import FrameCache, get_shared_frame_cache
+from backend.price_log import PriceLog
+from backend.price_panel import PricePanel
+from backend.price_store import PriceStore
+from backend.returns_matrix import ReturnsMatrix
+from backend.universe_stats import UniverseStatistics
+from backend.window_index import RollingWindowIndex
+
 logger = logging.getLogger(__name__)
 
+# Baskets smaller than this are loaded sequentially; pool dispatch costs more than it saves
+PARALLEL_LOAD_MIN_TICKERS = 8
+
+# Per-process DataManager used by process-pool loading workers
+_process_managers = {}
+
+
+def _load_store_arrays(data_dir: str, store_dir: str, ticker: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Process-pool entry point: read a ticker's (dates, closes) from the price store"""
+    manager = _process_managers.get((data_dir, store_dir))
+    if manager is None:
+        manager = DataManager(data_dir=data_dir, store_dir=store_dir, load_executor=None)
+        _process_managers[(data_dir, store_dir)] = manager
+    dates, closes = manager.price_store.load(ticker)
+    return np.array(dates), np.array(closes)
+
+
 class DataManager:
     """Handles data loading, parsing, and financial metrics calculation"""
     
-    def __init__(self, data_dir: str = 'data'):
-        """Initialize the DataManager with the data directory path"""
+    def __init__(self,
+                 data_dir: str = 'data',
+                 store_dir: Optional[str] = None,
+                 frame_cache: Optional[FrameCache] = None,
+                 load_executor: Optional[str] = 'thread',
+                 max_load_workers: Optional[int] = None,
+                 stats_mode: str = 'welford',
+                 ewma_halflife: float = 63.0,
+                 price_log_path: Optional[str] = None,
+                 index_poll_interval: float = 5.0,
+                 panel_path: Optional[str] = None):
+        """
+        Initialize the DataManager with the data directory path, binary price store and frame cache.
+        
+        load_executor selects how large baskets are loaded: 'thread', 'process', or None
+        for sequential loading. max_load_workers bounds the pool size (defaults to
+        min(8, CPU count)). stats_mode selects equal-weight ('welford') or exponentially
+        weighted ('ewma', with ewma_halflife in trading days) universe statistics.
+        price_log_path overrides the location of the ingested price log
+        (defaults to <data_dir>/.wal/prices.log). index_poll_interval is how often,
+        in seconds, the data directory is rescanned for changed files. panel_path
+        overrides the location of the memory-mapped price panel shared by worker
+        processes (defaults to <store_dir>/panel.bin); pass '' to disable it.
+        """
+        if load_executor not in ('thread', 'process', None):
+            raise ValueError(f"Unknown load executor: {load_executor}")
         self.data_dir = data_dir
+        self.price_store = PriceStore(data_dir, parser=self._parse_csv, store_dir=store_dir)
+        # Cleaned frames are shared process-wide unless a dedicated cache is given
+        self.frame_cache = frame_cache if frame_cache is not None else get_shared_frame_cache()
+        # Universe-wide statistics, rebuilt lazily whenever the data version changes;
+        # reentrant because rebuilding loads frames, which replays the price log
+        self._universe_stats = None
+        self._universe_lock = threading.RLock()
+        self.stats_mode = stats_mode
+        self.ewma_halflife = ewma_halflife
+        # Closes ingested after the CSV files were written: ticker -> {date: close},
+        # persisted in an append-only log and replayed on first use
+        self._appended_closes = {}
+        self.price_log = PriceLog(price_log_path or os.path.join(data_dir, '.wal', 'prices.log'))
+        # Worker pool for loading large baskets, created on first use
+        self.load_executor = load_executor
+        self.max_load_workers = max_load_workers or min(8, os.cpu_count() or 1)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # Listing of the data directory with per-ticker metadata, refreshed by polling
+        self.directory_index = DataDirectoryIndex(data_dir, self.price_store.load, poll_interval=index_poll_interval)
+        # Memory-mapped close panel of every ticker, opened (or rebuilt) on first use
+        self.panel_path = os.path.join(self.price_store.store_dir, 'panel.bin') if panel_path is None else panel_path
+        self._panel = None
+        self._panel_failed_version = None
+        self._panel_lock = threading.Lock()
         logger.info(f"DataManager initialized with data directory: {data_dir}")
     
     def get_available_stocks(self) -> List[str]:
-        """Get list of available stock tickers from CSV files in the data directory"""
+        """Get list of available stock tickers from the data directory index"""
         try:
-            # Check if data directory exists
-            if not os.path.exists(self.data_dir):
-                logger.warning(f"Data directory {self.data_dir} does not exist")
-                return []
-            
-            # Get all CSV files in the data directory
-            csv_files = [f for f in os.listdir(self.data_dir) if f.endswith('.csv')]
-            
-            # Extract ticker symbols from filenames
-            tickers = [os.path.splitext(f)[0] for f in csv_files]
-            
-            logger.info(f"Found {len(tickers)} available stocks")
+            tickers = self.directory_index.tickers()
+            logger.debug(f"Found {len(tickers)} available stocks")
             return tickers
         except Exception as e:
             logger.error(f"Error getting available stocks: {str(e)}")
             return []
     
+    def get_stock_listing(self) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+        """
+        Get per-ticker metadata for every available stock, with an ETag.
+        
+        Metadata (row count, first/last date, last close) comes from the directory
+        index, updated with any closes ingested after the CSV files were written
+        (including batches logged by other worker processes).
+        
+        Returns:
+            Tuple[str, Dict]: ETag of the listing and metadata keyed by ticker
+        """
+        metadata = self.directory_index.metadata()
+        with self._universe_lock:
+            self._replay_price_log()
+            for ticker, appended in self._appended_closes.items():
+                info = metadata.get(ticker)
+                if info is None or not appended:
+                    continue
+                # Dates after the CSV's last date are new rows; earlier ones revise existing rows
+                csv_last_date = None if info['last_date'] is None else pd.Timestamp(info['last_date'])
+                info['rows'] += sum(1 for date in appended if csv_last_date is None or date > csv_last_date)
+                last_date = max(appended)
+                if csv_last_date is None or last_date >= csv_last_date:
+                    info['last_date'] = last_date.strftime('%Y-%m-%d')
+                    info['last_close'] = appended[last_date]
+            log_offset = self.price_log.offset
+        # Built from on-disk state only (file fingerprints and the replayed log
+        # length), so every worker process hands out the same ETag for the same data
+        etag = hashlib.sha1(f"{self.directory_index.version}:{log_offset}".encode('utf-8')).hexdigest()
+        return etag, metadata
+    
     def load_stock_data(self, tickers: List[str]) -> Dict[str, pd.DataFrame]:
-        """Load stock data for the specified tickers from CSV files"""
+        """Load stock data for the specified tickers, using a worker pool for large baskets"""
         stock_data = {}
         valid_tickers = []
         
+        # Pick up batches logged by any worker process before the overlay is applied
+        with self._universe_lock:
+            self._replay_price_log()
+        
+        # Missing files and load errors are reported per ticker while loading
+        frames = self._load_frames(tickers)
+        
         for ticker in tickers:
+            df = frames.get(ticker)
+            if df is None:
+                continue
+            
+            # Include closes appended since the CSV file was written
+            with self._universe_lock:
+                if ticker in self._appended_closes:
+                    df = self._apply_appended_closes(ticker, df)
+            
+            # Check if we have sufficient data
+            if len(df) < 60:  # Minimum 60 trading days required
+                logger.warning(f"Insufficient data for {ticker}: only {len(df)} days available")
+                continue
+            
+            # Add to stock data dictionary
+            stock_data[ticker] = df
+            valid_tickers.append(ticker)
+            
+            logger.info(f"Successfully loaded data for {ticker} with {len(df)} days")
+        
+        logger.info(f"Successfully loaded data for {len(valid_tickers)} out of {len(tickers)} tickers")
+        return stock_data
+    
+    def _load_frames(self, tickers: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        """Load cleaned frames for the tickers (None for tickers that failed to load)"""
+        unique_tickers = list(dict.fromkeys(tickers))
+        
+        # Reading from the mapped panel is a slice per ticker; a pool only adds overhead
+        if (self.load_executor is None or self.max_load_workers <= 1
+                or len(unique_tickers) < PARALLEL_LOAD_MIN_TICKERS
+                or self.get_price_panel() is not None):
+            return {ticker: self._try_load_ticker(ticker) for ticker in unique_tickers}
+        
+        executor = self._get_executor()
+        if self.load_executor == 'thread':
+            return dict(zip(unique_tickers, executor.map(self._try_load_ticker, unique_tickers)))
+        return self._load_frames_in_processes(executor, unique_tickers)
+    
+    def _try_load_ticker(self, ticker: str) -> Optional[pd.DataFrame]:
+        """Load one ticker's frame, logging and returning None on failure"""
+        try:
+            # Construct file path
+            file_path = os.path.join(self.data_dir, f"{ticker}.csv")
+            
+            # Check if file exists
+            if not os.path.exists(file_path):
+                logger.warning(f"CSV file for {ticker} not found at {file_path}")
+                return None
+            
+            # Read cleaned data from the frame cache, falling back to the
+            # binary price store (rebuilt automatically if the file changed)
+            return self._load_ticker_frame(ticker)
+        except Exception as e:
+            logger.error(f"Error loading data for {ticker}: {str(e)}")
+            return None
+    
+    def _load_frames_in_processes(self,
+                                  executor: concurrent.futures.Executor,
+                                  tickers: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        """Serve cache hits locally and read the remaining tickers in worker processes"""
+        frames = {}
+        pending = {}
+        
+        for ticker in tickers:
+            frames[ticker] = None
             try:
-                # Construct file path
                 file_path = os.path.join(self.data_dir, f"{ticker}.csv")
-                
-                # Check if file exists
                 if not os.path.exists(file_path):
                     logger.warning(f"CSV file for {ticker} not found at {file_path}")
                     continue
                 
-                # Read CSV file with specific parsing for date and numeric values
-                df = pd.read_csv(
-                    file_path,
-                    parse_dates=['Date '],  # Space in column name
-                    dayfirst=True,  # Format is DD-MM-YYYY
-                    thousands=',',  # Handle comma as thousands separator
-                )
-                
-                # Clean and validate data
-                df = self._clean_stock_data(df, ticker)
-                
-                # Check if we have sufficient data
-                if len(df) < 60:  # Minimum 60 trading days required
-                    logger.warning(f"Insufficient data for {ticker}: only {len(df)} days available")
+                key = self._frame_key(ticker)
+                df = self.frame_cache.get(key)
+                if df is not None:
+                    frames[ticker] = df
                     continue
                 
-                # Add to stock data dictionary
-                stock_data[ticker] = df
-                valid_tickers.append(ticker)
-                
-                logger.info(f"Successfully loaded data for {ticker} with {len(df)} days")
+                future = executor.submit(_load_store_arrays, self.data_dir, self.price_store.store_dir, ticker)
+                pending[ticker] = (key, future)
             except Exception as e:
                 logger.error(f"Error loading data for {ticker}: {str(e)}")
         
-        logger.info(f"Successfully loaded data for {len(valid_tickers)} out of {len(tickers)} tickers")
-        return stock_data
+        for ticker, (key, future) in pending.items():
+            try:
+                dates, closes = future.result()
+                frames[ticker] = self._cache_frame(key, dates, closes)
+            except Exception as e:
+                logger.error(f"Error loading data for {ticker}: {str(e)}")
+        
+        return frames
+    
+    def _get_executor(self) -> concurrent.futures.Executor:
+        """Get the loading worker pool, creating it on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                if self.load_executor == 'process':
+                    self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_load_workers)
+                else:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_load_workers, thread_name_prefix='data-load')
+                logger.info(f"Started {self.load_executor} pool with {self.max_load_workers} workers for data loading")
+            return self._executor
+    
+    def shutdown(self) -> None:
+        """Shut down the loading worker pool, if one was started"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+    
+    def build_price_store(self) -> Dict[str, int]:
+        """Ingest every CSV in the data directory into the binary price store"""
+        return self.price_store.ingest(self.get_available_stocks())
+    
+    def build_price_panel(self) -> int:
+        """Write the memory-mapped price panel for every available ticker, returning the ticker count"""
+        version = self.get_data_version()
+        with self._panel_lock:
+            n_tickers = PricePanel.write(self.panel_path, version, self.get_available_stocks(), self._load_panel_series)
+            self._panel = PricePanel.open(self.panel_path)
+        return n_tickers
+    
+    def get_price_panel(self) -> Optional[PricePanel]:
+        """
+        Get the memory-mapped price panel for the current data version.
+        
+        The panel file is opened lazily and rebuilt when it was written for another
+        data version. Returns None if the panel is disabled or cannot be built, in
+        which case frames are served from the frame cache and price store.
+        """
+        if not self.panel_path:
+            return None
+        version = self.get_data_version()
+        with self._panel_lock:
+            if self._panel is not None and self._panel.version == version:
+                return self._panel
+            if self._panel_failed_version == version:
+                return None
+            try:
+                # Another worker may already have rebuilt the file for this version
+                panel = PricePanel.open(self.panel_path)
+                if panel is None or panel.version != version:
+                    PricePanel.write(self.panel_path, version, self.get_available_stocks(), self._load_panel_series)
+                    panel = PricePanel.open(self.panel_path)
+                self._panel = panel
+            except Exception as e:
+                logger.warning(f"Price panel unavailable, falling back to per-ticker loading: {str(e)}")
+                self._panel = None
+                self._panel_failed_version = version
+            return self._panel
+    
+    def _load_panel_series(self, ticker: str) -> Tuple[os.stat_result, np.ndarray, np.ndarray]:
+        """Read a ticker's CSV stat and (dates, closes) from the price store for the panel"""
+        stat = os.stat(self.price_store.csv_path(ticker))
+        dates, closes = self.price_store.load(ticker, stat)
+        return stat, dates, closes
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Get hit/miss/eviction counters of the frame cache"""
+        return self.frame_cache.stats()
+    
+    def _frame_key(self, ticker: str, stat: Optional[os.stat_result] = None) -> Tuple[str, int, int]:
+        """Frame cache key of a ticker: (resolved CSV path, file size, file mtime)"""
+        file_path = os.path.realpath(self.price_store.csv_path(ticker))
+        if stat is None:
+            stat = os.stat(file_path)
+        return file_path, stat.st_size, stat.st_mtime_ns
+    
+    def _load_ticker_frame(self, ticker: str) -> pd.DataFrame:
+        """Get a cleaned Date/Close frame for a ticker, keyed by its file fingerprint"""
+        stat = os.stat(self.price_store.csv_path(ticker))
+        
+        # Series in the shared panel need no per-process cached copy
+        panel = self.get_price_panel()
+        if panel is not None:
+            series = panel.column(ticker, stat)
+            if series is not None:
+                dates, closes = series
+                return pd.DataFrame({'Date': dates.view('datetime64[ns]'), 'Close': closes})
+        
+        key = self._frame_key(ticker, stat)
+        df = self.frame_cache.get(key)
+        if df is not None:
+            return df
+        
+        dates, closes = self.price_store.load(ticker, stat)
+        return self._cache_frame(key, dates, closes)
+    
+    def _cache_frame(self, key: Tuple[str, int, int], dates: np.ndarray, closes: np.ndarray) -> pd.DataFrame:
+        """Build a Date/Close frame from store arrays and add it to the frame cache"""
+        df = pd.DataFrame({
+            'Date': dates.view('datetime64[ns]'),
+            'Close': closes
+        })
+        self.frame_cache.put(key, df)
+        return df
+    
+    def _parse_csv(self, file_path: str, ticker: str) -> pd.DataFrame:
+        """Parse and clean a ticker CSV file (used when building price store entries)"""
+        # Vectorized parser for the DD-MM-YYYY / quoted-thousands layout of data/
+        df = parse_price_csv(file_path)
+        if df is not None:
+            # Columns are already named and typed; only drop empty closes and sort
+            return df.dropna(subset=['Close']).sort_values('Date').reset_index(drop=True)
+
+        logger.info(f"{ticker}: CSV layout not recognised by the fast parser, using pandas")
+        return self._read_csv_with_pandas(file_path, ticker)
+    
+    def _read_csv_with_pandas(self, file_path: str, ticker: str) -> pd.DataFrame:
+        """Parse and clean a ticker CSV file with pandas, whatever the spacing and case of its header"""
+        # Handle comma as thousands separator
+        df = pd.read_csv(file_path, thousands=',', encoding='utf-8-sig')
+        
+        # Dates are DD-MM-YYYY; parse them day first before the column names are standardized
+        for column in df.columns:
+            if column.strip().lower() == 'date':
+                df[column] = pd.to_datetime(df[column], dayfirst=True)
+        
+        # Clean and validate data
+        return self._clean_stock_data(df, ticker)
     
     def _clean_stock_data(self, df: pd.DataFrame, ticker: str) -> pd.DataFrame:
         """Clean and standardize stock data"""
@@ -132,8 +424,159 @@ class DataManager:
             logger.error(f"Error cleaning data for {ticker}: {str(e)}")
             raise
     
-    def compute_financial_metrics(self, stock_data: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """Compute expected returns, covariance matrix, and latest prices"""
+    def get_data_version(self) -> str:
+        """Get a version string that changes whenever any CSV file in the data directory changes"""
+        self.directory_index.ensure_fresh()
+        return self.directory_index.version
+    
+    def get_universe_stats(self) -> UniverseStatistics:
+        """Get statistics over all available tickers, recomputing them if the data changed"""
+        version = self.get_data_version()
+        with self._universe_lock:
+            self._replay_price_log(version)
+
+            if self._universe_stats is None or self._universe_stats.version != version:
+                stock_data = self.load_stock_data(self.get_available_stocks())
+                self._universe_stats = UniverseStatistics.build(
+                    stock_data, version, self.stats_mode, self.ewma_halflife)
+            return self._universe_stats
+    
+    def build_returns_matrix(self, stock_data: Dict[str, pd.DataFrame]) -> ReturnsMatrix:
+        """Get the date-aligned returns matrix for the tickers in stock_data"""
+        universe = self.get_universe_stats()
+        if universe.covers(stock_data):
+            return universe.returns.subset(list(stock_data.keys()))
+        return ReturnsMatrix.from_stock_data(stock_data)
+    
+    def append_trading_day(self, date: Any, closes: Dict[str, float]) -> List[str]:
+        """
+        Append a new trading day of closes without reloading any CSV file.
+        
+        Args:
+            date: Trading date, later than the last date in the universe
+            closes: Close per ticker for that date
+            
+        Returns:
+            List[str]: Tickers whose statistics were updated
+        """
+        date = pd.Timestamp(date)
+        universe = self.get_universe_stats()
+        if date <= universe.last_date:
+            raise ValueError(f"Date {date.date()} is not after the last date {universe.last_date.date()}")
+        rows = [{'ticker': ticker, 'date': date, 'close': close} for ticker, close in closes.items()]
+        self.ingest_prices(rows)
+        return [ticker for ticker in closes if ticker in universe.returns.positions]
+    
+    def ingest_prices(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Ingest a batch of (ticker, date, close) rows.
+        
+        The batch is written to the append-only price log before it is applied, so
+        it survives restarts and reaches every worker process. Rows for a date after
+        the last trading date are folded in as a new day, rows for the last date
+        (intraday refreshes) revise that day in place, and only corrections to older
+        dates trigger a full rebuild of the universe statistics.
+        
+        Args:
+            rows: Dicts with 'ticker', 'date' and 'close' keys
+            
+        Returns:
+            Dict[str, Any]: Counts of accepted rows and the rejected rows with reasons
+        """
+        try:
+            available = set(self.get_available_stocks())
+            accepted = []
+            rejected = []
+            for row in rows:
+                try:
+                    ticker = str(row['ticker'])
+                    date = pd.Timestamp(row['date']).normalize()
+                    close = float(row['close'])
+                except (KeyError, TypeError, ValueError) as e:
+                    rejected.append({'row': row, 'reason': f"Invalid row: {str(e)}"})
+                    continue
+                if ticker not in available:
+                    rejected.append({'row': row, 'reason': f"Unknown ticker: {ticker}"})
+                elif not np.isfinite(close) or close <= 0:
+                    rejected.append({'row': row, 'reason': f"Invalid close: {close}"})
+                else:
+                    accepted.append((ticker, date.strftime('%Y-%m-%d'), close))
+
+            if accepted:
+                self.price_log.append(accepted)
+                universe = self.get_universe_stats()
+                logger.info(f"Ingested {len(accepted)} price rows; universe now ends {universe.last_date.date()}")
+
+            return {'accepted': len(accepted), 'rejected': rejected}
+        except Exception as e:
+            logger.error(f"Error ingesting prices: {str(e)}")
+            raise
+    
+    def _replay_price_log(self, version: Optional[str] = None) -> None:
+        """
+        Fold in price batches logged since the last replay, including those
+        written by other worker processes (caller holds the lock).
+        
+        Batches are applied to the universe statistics when they are current for
+        the data version, and otherwise only recorded in the overlay, from which
+        the next rebuild picks them up.
+        """
+        if version is None:
+            version = self.get_data_version()
+        for rows in self.price_log.read_new():
+            if self._universe_stats is None or self._universe_stats.version != version:
+                self._record_appended_closes(rows)
+            else:
+                self._apply_price_rows(rows)
+    
+    def _record_appended_closes(self, rows: List[Tuple[str, str, float]]) -> None:
+        """Record logged rows in the in-memory overlay on top of the CSV data"""
+        for ticker, date, close in rows:
+            self._appended_closes.setdefault(ticker, {})[pd.Timestamp(date)] = close
+    
+    def _apply_price_rows(self, rows: List[Tuple[str, str, float]]) -> None:
+        """Record logged rows and fold them into the universe statistics (caller holds the lock)"""
+        self._record_appended_closes(rows)
+        universe = self._universe_stats
+        if universe is None:
+            return
+
+        by_date = {}
+        for ticker, date, close in rows:
+            by_date.setdefault(pd.Timestamp(date), {})[ticker] = close
+
+        for date in sorted(by_date):
+            if date > universe.last_date:
+                universe.append_row(date, by_date[date])
+            elif date == universe.last_date:
+                universe.revise_last_row(by_date[date])
+            else:
+                # History before the last day changed; rebuild from the overlay on next use
+                logger.info(f"Price correction for {date.date()} predates the last trading day; "
+                            f"universe statistics will be rebuilt")
+                self._universe_stats = None
+                return
+    
+    def _apply_appended_closes(self, ticker: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Merge appended closes into a ticker frame (appended values win on shared dates)"""
+        appended = pd.DataFrame({
+            'Date': pd.to_datetime(list(self._appended_closes[ticker].keys())),
+            'Close': list(self._appended_closes[ticker].values())
+        })
+        df = df[~df['Date'].isin(appended['Date'])]
+        return pd.concat([df, appended], ignore_index=True).sort_values('Date').reset_index(drop=True)
+    
+    def compute_financial_metrics(self,
+                                  stock_data: Dict[str, pd.DataFrame],
+                                  start: Any = None,
+                                  end: Any = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute expected returns, covariance matrix, and latest prices.
+        
+        start/end optionally restrict the estimation window to [start, end), given as
+        dates or as trading-day positions (start=-63 uses the last 63 trading days).
+        Latest prices are then the closes at the end of the window.
+        """
         try:
             # Extract tickers
             tickers = list(stock_data.keys())
@@ -142,29 +585,32 @@ class DataManager:
             if n_assets == 0:
                 raise ValueError("No valid stock data provided")
             
-            # Calculate daily returns for each stock
-            returns_dict = {}
-            for ticker, df in stock_data.items():
-                # Calculate daily returns: (Close[t] - Close[t-1]) / Close[t-1]
-                daily_returns = df['Close'].pct_change().dropna()
-                returns_dict[ticker] = daily_returns
+            # Slice the precomputed universe statistics when the frames are the
+            # ones they were built from
+            universe = self.get_universe_stats()
+            windowed = start is not None or end is not None
+            if universe.covers(stock_data):
+                logger.info(f"Computed financial metrics for {n_assets} assets from universe statistics")
+                if windowed:
+                    return universe.slice_window(tickers, start, end)
+                return universe.slice(tickers)
             
-            # Create a DataFrame with all returns aligned by date
-            returns_df = pd.DataFrame(returns_dict)
+            if windowed:
+                window_index = RollingWindowIndex(ReturnsMatrix.from_stock_data(stock_data))
+                logger.info(f"Computed windowed financial metrics for {n_assets} assets")
+                return window_index.query(tickers, start, end)
             
-            # Calculate annualized expected returns (mean daily return × 252)
-            expected_returns = returns_df.mean() * 252
+            # Daily returns aligned on a shared trading-date index
+            returns_matrix = ReturnsMatrix.from_stock_data(stock_data)
             
-            # Calculate annualized covariance matrix (covariance of returns × 252)
-            cov_matrix = returns_df.cov() * 252
+            # Annualized expected returns (mean daily return × 252) and
+            # covariance matrix (covariance of returns × 252)
+            expected_returns_array = returns_matrix.mean()
+            cov_matrix_array = returns_matrix.cov()
             
             # Get latest prices
             latest_prices = np.array([stock_data[ticker]['Close'].iloc[-1] for ticker in tickers])
             
-            # Convert to numpy arrays
-            expected_returns_array = expected_returns.values
-            cov_matrix_array = cov_matrix.values
-            
             logger.info(f"Computed financial metrics for {n_assets} assets")
             return expected_returns_array, cov_matrix_array, latest_prices
         except Exception as e:
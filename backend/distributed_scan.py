@@ -0,0 +1,187 @@
+import os
+import time
+import uuid
+import socket
+import logging
+import numpy as np
+from typing import Any, Dict, Optional
+
+from backend.classical_solvers import solutions_to_portfolios
+from backend.sharded_scan import (make_layer_shards, make_shards, merge_shard_results,
+                                  scan_context, scan_shard)
+from backend.work_queue import WorkQueue
+
+logger = logging.getLogger(__name__)
+
+# Largest universe a batch scan accepts (masks must fit in uint32)
+DISTRIBUTED_SCAN_MAX_ASSETS = 32
+
+
+class ScanCoordinator:
+    """Publishes an exhaustive scan as shard tasks on a WorkQueue and merges the results
+
+    Each task is a shard descriptor (a mask range, or a rank range of one
+    cardinality layer when max_assets is given); the QUBO, the metrics
+    inputs and the constraints are published once as the job context. Workers
+    (ScanWorker, on this or other machines) send back each shard's top-K and
+    counts, which are merged exactly as in the single-machine sharded scan.
+    """
+
+    def __init__(self, queue: WorkQueue):
+        """
+        Initialize the coordinator.
+
+        Args:
+            queue: Queue shared with the workers
+        """
+        self.queue = queue
+
+    def submit(self,
+               qubo_matrix: np.ndarray,
+               expected_returns: np.ndarray,
+               covariance_matrix: np.ndarray,
+               prices: np.ndarray,
+               risk_free_rate: float,
+               conflicts: np.ndarray,
+               min_assets: int,
+               max_assets: Optional[int] = None,
+               top_k: int = 10,
+               n_shards: int = 64) -> str:
+        """
+        Publish a scan job.
+
+        Args:
+            qubo_matrix: (N x N) QUBO matrix
+            expected_returns: Annualized expected return per asset (N,)
+            covariance_matrix: Annualized covariance matrix (N x N)
+            prices: Latest price per asset (N,)
+            risk_free_rate: Annual risk-free rate used for the Sharpe ratio
+            conflicts: Correlation conflict bitmask per asset (see conflict_masks)
+            min_assets: Minimum portfolio size
+            max_assets: Optional maximum portfolio size
+            top_k: Portfolios kept per ranking criterion
+            n_shards: Number of shard tasks
+
+        Returns:
+            str: Job ID
+        """
+        n_assets = len(expected_returns)
+        if n_assets > DISTRIBUTED_SCAN_MAX_ASSETS:
+            raise ValueError(f"Distributed scan supports at most {DISTRIBUTED_SCAN_MAX_ASSETS} assets, got {n_assets}")
+
+        job_id = str(uuid.uuid4())
+        context = scan_context(qubo_matrix, expected_returns, covariance_matrix, prices,
+                               risk_free_rate, conflicts, min_assets, top_k, max_assets)
+        if max_assets is None:
+            shards = [{'start': start, 'stop': stop} for start, stop in make_shards(n_assets, n_shards)]
+        else:
+            shards = [{'size': size, 'start': start, 'stop': stop}
+                      for size, start, stop in make_layer_shards(n_assets, min_assets, max_assets, n_shards)]
+        self.queue.publish(job_id, context, shards)
+        return job_id
+
+    def wait(self,
+             job_id: str,
+             timeout: Optional[float] = None,
+             poll_interval: float = 1.0,
+             purge: bool = True) -> Dict[str, Any]:
+        """
+        Wait for every shard of a job and merge the results.
+
+        Once merged, the job is deleted from the queue unless purge is False.
+        A failed job is kept so its errors can be inspected; purge_finished
+        removes it later.
+
+        Raises:
+            RuntimeError: If a shard failed on every allowed attempt
+            TimeoutError: If the job is not finished within the timeout
+
+        Returns:
+            Dict with 'portfolios', 'feasible_count', 'best_energy', 'shards' and 'elapsed_sec'
+        """
+        start_time = time.time()
+        while True:
+            status = self.queue.status(job_id)
+            if status['failed']:
+                errors = self.queue.errors(job_id)
+                raise RuntimeError(f"{len(errors)} shards of job {job_id} failed: {errors}")
+            if status['pending'] == 0 and status['claimed'] == 0:
+                break
+            if timeout is not None and time.time() - start_time > timeout:
+                raise TimeoutError(f"Job {job_id} not finished after {timeout} seconds: {status}")
+            time.sleep(poll_interval)
+
+        context = self.queue.context(job_id)
+        n_assets = context['n_assets']
+        merged = merge_shard_results(self.queue.results(job_id), n_assets, context['top_k'])
+        ranking = merged['ranking']
+        energies = ranking.selectors['qubo_value'].keys
+        masks = ranking.ids()
+
+        if purge:
+            self.queue.purge(job_id)
+
+        elapsed = time.time() - start_time
+        logger.info(f"Merged {status['done']} shards of job {job_id}: {merged['scanned']} subsets, "
+                    f"{merged['feasible']} feasible")
+        return {
+            'portfolios': solutions_to_portfolios(masks, n_assets) if len(masks) else [],
+            'feasible_count': merged['feasible'],
+            'best_energy': float(energies[0]) if len(energies) else None,
+            'shards': status['done'],
+            'elapsed_sec': elapsed
+        }
+
+
+class ScanWorker:
+    """Claims shard tasks from a WorkQueue, scans them and reports the results"""
+
+    def __init__(self, queue: WorkQueue, worker_id: Optional[str] = None):
+        """
+        Initialize the worker.
+
+        Args:
+            queue: Queue shared with the coordinator
+            worker_id: Name reported with claims (default: host name and process ID)
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._contexts = {}
+
+    def run_once(self) -> bool:
+        """Scan one shard; returns False when there was no task to claim"""
+        task = self.queue.claim(self.worker_id)
+        if task is None:
+            return False
+
+        job_id, task_id, shard = task['job_id'], task['task_id'], task['payload']
+        try:
+            if job_id not in self._contexts:
+                self._contexts[job_id] = self.queue.context(job_id)
+            result = scan_shard(self._contexts[job_id], shard['start'], shard['stop'], size=shard.get('size'))
+        except Exception as e:
+            logger.error(f"Error scanning shard {task_id} of job {job_id}: {str(e)}")
+            self.queue.fail(job_id, task_id, self.worker_id, str(e))
+            return True
+
+        self.queue.complete(job_id, task_id, self.worker_id, result)
+        return True
+
+    def run(self, idle_timeout: Optional[float] = None, poll_interval: float = 1.0) -> int:
+        """
+        Process tasks until the queue stays empty for idle_timeout seconds (forever if None).
+
+        Returns:
+            int: Number of tasks processed
+        """
+        processed = 0
+        idle_since = time.time()
+        while True:
+            if self.run_once():
+                processed += 1
+                idle_since = time.time()
+                continue
+            if idle_timeout is not None and time.time() - idle_since >= idle_timeout:
+                logger.info(f"Worker {self.worker_id} processed {processed} tasks")
+                return processed
+            time.sleep(poll_interval)
@@ -0,0 +1,116 @@
+import os
+import logging
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache key: (resolved CSV path, file size in bytes, file mtime in ns)
+FrameKey = Tuple[str, int, int]
+
+
+class FrameCache:
+    """Thread-safe LRU cache of cleaned ticker DataFrames with a memory cap
+
+    Entries are keyed by the resolved path and fingerprint of the file they were
+    built from, so managers over different data directories never share a
+    frame, and an edited file simply misses and replaces its stale entry.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the frame cache.
+
+        Args:
+            max_bytes: Upper bound on the total memory held by cached frames
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (frame, size in bytes)
+        self._path_keys = {}  # resolved path -> current key
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: FrameKey) -> Optional[pd.DataFrame]:
+        """Return a copy of the cached frame for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            frame = entry[0]
+        return frame.copy()
+
+    def put(self, key: FrameKey, frame: pd.DataFrame) -> None:
+        """Insert a frame, replacing any stale entry for the same file"""
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            logger.warning(f"Frame for {key[0]} ({size} bytes) exceeds the cache cap and was not cached")
+            return
+
+        frame = frame.copy()
+        with self._lock:
+            stale_key = self._path_keys.get(key[0])
+            if stale_key is not None and stale_key in self._entries:
+                self._remove(stale_key)
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (frame, size)
+            self._path_keys[key[0]] = key
+            self._current_bytes += size
+            self._evict_to(self.max_bytes)
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """Change the memory cap, evicting least recently used frames if needed"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict_to(max_bytes)
+
+    def clear(self) -> None:
+        """Drop all cached frames (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._path_keys.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry (caller holds the lock)"""
+        _, size = self._entries.pop(key)
+        self._current_bytes -= size
+        if self._path_keys.get(key[0]) == key:
+            del self._path_keys[key[0]]
+
+    def _evict_to(self, max_bytes: int) -> None:
+        """Evict least recently used entries until under max_bytes (caller holds the lock)"""
+        while self._current_bytes > max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+
+# Process-wide cache shared by every DataManager instance
+_shared_frame_cache = FrameCache(max_bytes=int(os.getenv('FRAME_CACHE_MAX_MB', '64')) * 1024 * 1024)
+
+
+def get_shared_frame_cache() -> FrameCache:
+    """Return the process-wide frame cache"""
+    return _shared_frame_cache
@@ -0,0 +1,123 @@
+import logging
+import numpy as np
+from typing import Dict, Optional
+
+from backend.returns_matrix import TRADING_DAYS_PER_YEAR, pairwise_moments
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalCovariance:
+    """Running mean and covariance of daily returns, folded in one row at a time
+
+    Two modes are supported:
+      - 'welford': equal-weight statistics using Welford's update, identical to a
+        batch pairwise-complete covariance over every row folded so far
+      - 'ewma': exponentially weighted statistics with the given half-life in
+        trading days
+
+    Missing observations are handled pairwise: the mean of x_i is tracked
+    separately over the rows where each x_j is present, so a ticker with a gap
+    does not disturb the statistics of the others. Each update costs O(N^2).
+    """
+
+    MODES = ('welford', 'ewma')
+
+    def __init__(self, n_assets: int, mode: str = 'welford', halflife: float = 63.0):
+        """
+        Initialize an empty engine.
+
+        Args:
+            n_assets: Number of assets (columns)
+            mode: 'welford' for equal weights or 'ewma' for exponential weights
+            halflife: Half-life in trading days of the EWMA weights
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown statistics mode: {mode}")
+        if halflife <= 0:
+            raise ValueError("halflife must be positive")
+
+        self.mode = mode
+        self.halflife = halflife
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife)  # weight of the newest row in EWMA mode
+        self.pair_counts = np.zeros((n_assets, n_assets))
+        self.pair_means = np.zeros((n_assets, n_assets))  # [i, j]: mean of x_i over rows where x_j is present
+        self.co_moment = np.zeros((n_assets, n_assets))
+        self.rows_folded = 0
+
+    @classmethod
+    def from_returns(cls, values: np.ndarray, mode: str = 'welford', halflife: float = 63.0) -> 'IncrementalCovariance':
+        """Seed an engine from a (T x N) matrix of daily returns with NaN gaps"""
+        engine = cls(values.shape[1], mode, halflife)
+
+        if mode == 'welford':
+            # Equal-weight state can be seeded in one vectorized pass
+            column_means, centred, _, pair_counts, pair_sums = pairwise_moments(values)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                centred_means = np.where(pair_counts > 0, pair_sums / pair_counts, 0.0)
+            engine.pair_counts = pair_counts
+            engine.pair_means = np.where(pair_counts > 0, centred_means + column_means[:, None], 0.0)
+            engine.co_moment = centred.T @ centred - centred_means * pair_sums.T
+            engine.rows_folded = values.shape[0]
+        else:
+            for row in values:
+                engine.update(row)
+
+        logger.info(f"Seeded {mode} statistics engine with {values.shape[0]} rows for {values.shape[1]} assets")
+        return engine
+
+    def update(self, returns_row: np.ndarray) -> None:
+        """Fold one row of daily returns (NaN where missing) into the running statistics"""
+        valid = ~np.isnan(returns_row)
+        pairs = valid[:, None] & valid[None, :]
+        x = np.where(valid, returns_row, 0.0)
+
+        self.pair_counts += pairs
+        delta = np.where(pairs, x[:, None] - self.pair_means, 0.0)
+
+        if self.mode == 'welford':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.pair_means += np.where(pairs, delta / self.pair_counts, 0.0)
+            # C += (x_i - old mean_i) * (x_j - new mean_j)
+            self.co_moment += np.where(pairs, delta * (x[None, :] - self.pair_means.T), 0.0)
+        else:
+            # The first observation of a pair initialises its mean
+            weight = np.where(self.pair_counts == 1, 1.0, self.alpha)
+            self.pair_means += np.where(pairs, weight * delta, 0.0)
+            self.co_moment = np.where(pairs,
+                                      (1.0 - weight) * (self.co_moment + weight * delta * delta.T),
+                                      self.co_moment)
+
+        self.rows_folded += 1
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Copy of the running state, for undoing the next update"""
+        return {
+            'pair_counts': self.pair_counts.copy(),
+            'pair_means': self.pair_means.copy(),
+            'co_moment': self.co_moment.copy(),
+            'rows_folded': self.rows_folded
+        }
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore a state captured with snapshot()"""
+        self.pair_counts = state['pair_counts'].copy()
+        self.pair_means = state['pair_means'].copy()
+        self.co_moment = state['co_moment'].copy()
+        self.rows_folded = state['rows_folded']
+
+    def mean(self) -> np.ndarray:
+        """Annualized mean daily return per asset (NaN for assets with no rows)"""
+        counts = np.diag(self.pair_counts)
+        return np.where(counts > 0, np.diag(self.pair_means), np.nan) * TRADING_DAYS_PER_YEAR
+
+    def cov(self) -> np.ndarray:
+        """Annualized covariance matrix (NaN for pairs without enough rows)"""
+        if self.mode == 'welford':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cov = self.co_moment / (self.pair_counts - 1)
+            cov[self.pair_counts < 2] = np.nan
+        else:
+            cov = self.co_moment.copy()
+            cov[self.pair_counts < 1] = np.nan
+        return cov * TRADING_DAYS_PER_YEAR
@@ -5,7 +5,6 @@ from typing import Dict, List, Tuple, Optional, Any
 import uuid
 from datetime import datetime
 import random
-import itertools
 
 # Qiskit imports
 from qiskit_aer import Aer
@@ -15,6 +14,14 @@ from qiskit.quantum_info import SparsePauliOp
 
 # Import our SimpleQAOAOptimizer
 from backend.simple_qaoa_optimizer import SimpleQAOAOptimizer
+from backend.classical_solvers import (GRAY_CODE_MAX_ASSETS, annealing_search, branch_and_bound_search,
+                                       gray_code_search, tabu_search)
+from backend.portfolio_metrics import PortfolioMetricsEngine, PortfolioRanking, qubo_energies, smallest_k
+from backend.sharded_scan import SHARDED_SCAN_MAX_ASSETS, sharded_scan
+from backend.candidate_space import (
+    PortfolioIndex, bitstrings_to_masks, conflict_masks, conflict_matrix, enumerate_independent_sets,
+    indices_to_mask, mask_to_indices, masks_to_selections, selections_to_masks
+)
 from qiskit_ibm_runtime import QiskitRuntimeService, Session, SamplerV2
 
 logger = logging.getLogger(__name__)
@@ -26,6 +33,28 @@ load_dotenv()
 class PortfolioOptimizer:
     """Portfolio optimization using QAOA and classical methods - COMPLETELY REWRITTEN"""
     
+    # Exact enumeration of every subset in Gray-code order
+    GRAY_CODE_BACKEND = 'Exact Solver (Gray Code)'
+    # Branch and bound with an optimality gap when the time budget runs out
+    BRANCH_AND_BOUND_BACKEND = 'Exact Solver (Branch and Bound)'
+    # Heuristic sampling with many Metropolis chains, cooled or on a temperature ladder
+    ANNEALING_BACKEND = 'Simulated Annealing'
+    TEMPERING_BACKEND = 'Parallel Tempering'
+    # Single-flip tabu search with aspiration and restarts
+    TABU_BACKEND = 'Tabu Search'
+    # Exhaustive metrics scan of every subset, split across a process pool
+    SHARDED_SCAN_BACKEND = 'Exhaustive Scan (Sharded)'
+    # Backends that search the QUBO directly instead of enumerating valid portfolios first
+    CLASSICAL_BACKENDS = (GRAY_CODE_BACKEND, BRANCH_AND_BOUND_BACKEND, ANNEALING_BACKEND, TEMPERING_BACKEND,
+                          TABU_BACKEND, SHARDED_SCAN_BACKEND)
+    # Largest basket accepted per backend; requests above it are rejected up front
+    BACKEND_MAX_ASSETS = {GRAY_CODE_BACKEND: GRAY_CODE_MAX_ASSETS, SHARDED_SCAN_BACKEND: SHARDED_SCAN_MAX_ASSETS}
+    
+    # Largest valid set the QAOA fallback scans exhaustively; larger sets are sampled by annealing
+    GREEDY_MAX_CANDIDATES = 1 << 20
+    # Evaluated portfolios returned for the scatter plots, besides the ranked ones
+    VISUALIZATION_SAMPLE_SIZE = 2000
+    
     def __init__(self):
         """Initialize the portfolio optimizer"""
         self.jobs = {}  # Store async job information
@@ -43,6 +72,7 @@ class PortfolioOptimizer:
                 return_weight: float = 1.0,
                 budget_penalty: float = 1.0,
                 min_assets: int = 2,
+                max_assets: Optional[int] = None,
                 min_assets_penalty: float = 1.0,
                 correlation_threshold: float = 0.8,
                 reps: int = 3,
@@ -82,6 +112,7 @@ class PortfolioOptimizer:
             logger.info(f"Risk Aversion: {risk_aversion}")
             logger.info(f"Return Weight: {return_weight}")
             logger.info(f"Min Assets: {min_assets}")
+            logger.info(f"Max Assets: {max_assets}")
             logger.info(f"Min Assets Penalty: {min_assets_penalty}")
             logger.info(f"Budget Penalty: {budget_penalty}")
             logger.info(f"Correlation Threshold: {correlation_threshold}")
@@ -104,46 +135,11 @@ class PortfolioOptimizer:
             # ========================================
             # STEP 2: CLASSICAL CANDIDATE GENERATION
             # ========================================
-            report_progress(2, "Step 2/6: Generating all possible portfolio combinations", 33)
-            
-            # Generate ALL possible 2^N - 1 portfolio combinations
-            all_portfolios = self._generate_all_portfolio_combinations(n_assets)
-            logger.info(f"Generated {len(all_portfolios)} total portfolio combinations")
-            
-            # ========================================
-            # STEP 3: CLASSICAL HARD CONSTRAINT FILTERING
-            # ========================================
-            report_progress(3, "Step 3/6: Applying hard constraints (min_assets, correlation_threshold)", 50)
-            
-            valid_portfolios = self._apply_hard_constraints(
-                all_portfolios=all_portfolios,
-                correlation_matrix=correlation_matrix,
-                min_assets=min_assets,
-                correlation_threshold=correlation_threshold
-            )
-            
-            logger.info(f"After hard constraint filtering: {len(valid_portfolios)} valid portfolios")
-            
-            # ========================================
-            # STEP 5: HANDLE NO-SOLUTION CASE
-            # ========================================
-            if len(valid_portfolios) == 0:
-                error_msg = ("No valid portfolios could be found. Your hard constraints "
-                           "(e.g., Minimum Assets, Correlation Threshold) are too strict "
-                           "for the selected stocks. Please relax your constraints and try again.")
-                logger.error(error_msg)
-                return {
-                    'error': error_msg,
-                    'top_portfolios': [],
-                    'qaoa_portfolios': [],
-                    'classical_portfolios': [],
-                    'all_evaluated_portfolios': []
-                }
+            report_progress(2, "Step 2/6: Building the correlation conflict graph", 33)
             
-            # ========================================
-            # STEP 4: QUANTUM OPTIMIZATION ON VALID CANDIDATES
-            # ========================================
-            report_progress(4, f"Step 4/6: Quantum optimization on {len(valid_portfolios)} valid candidates", 67)
+            # The 2^N - 1 subsets are never materialized; only feasible ones are generated
+            total_combinations = (1 << n_assets) - 1
+            logger.info(f"Candidate space holds {total_combinations} portfolio combinations")
             
             # Build QUBO model using the provided formulas
             qubo_matrix = self._build_qubo_model(
@@ -156,31 +152,122 @@ class PortfolioOptimizer:
                 budget_penalty=budget_penalty
             )
             
+            # ========================================
+            # STEP 3: CLASSICAL HARD CONSTRAINT FILTERING
+            # ========================================
+            report_progress(3, "Step 3/6: Applying hard constraints (min_assets, correlation_threshold)", 50)
+            
+            if backend_name in self.CLASSICAL_BACKENDS:
+                # Classical solvers apply the hard constraints while they search
+                valid_portfolios = None
+            else:
+                valid_portfolios = self._enumerate_feasible_portfolios(
+                    correlation_matrix=correlation_matrix,
+                    min_assets=min_assets,
+                    max_assets=max_assets,
+                    correlation_threshold=correlation_threshold
+                )
+                
+                logger.info(f"After hard constraint filtering: {len(valid_portfolios)} valid portfolios")
+                
+                # ========================================
+                # STEP 5: HANDLE NO-SOLUTION CASE
+                # ========================================
+                if len(valid_portfolios) == 0:
+                    return self._no_solution_result()
+            
+            # ========================================
+            # STEP 4: QUANTUM OPTIMIZATION ON VALID CANDIDATES
+            # ========================================
+            if valid_portfolios is None:
+                report_progress(4, f"Step 4/6: Classical search with {backend_name}", 67)
+            else:
+                report_progress(4, f"Step 4/6: Quantum optimization on {len(valid_portfolios)} valid candidates", 67)
+            
+            conflicts = conflict_matrix(correlation_matrix, correlation_threshold)
+            
             # Run QAOA on valid portfolios
             if backend_name == 'Aer Simulator':
                 qaoa_results = self._run_aer_simulator_on_valid_portfolios(
                     valid_portfolios=valid_portfolios,
                     qubo_matrix=qubo_matrix,
                     reps=reps,
-                    shots=shots
+                    shots=shots,
+                    conflicts=conflicts,
+                    min_assets=min_assets,
+                    max_assets=max_assets
                 )
             elif backend_name == 'IBM Quantum Hardware':
                 qaoa_results = self._run_ibm_quantum_hardware_on_valid_portfolios(
                     valid_portfolios=valid_portfolios,
                     qubo_matrix=qubo_matrix,
                     reps=reps,
-                    shots=shots
+                    shots=shots,
+                    conflicts=conflicts,
+                    min_assets=min_assets,
+                    max_assets=max_assets
+                )
+            elif backend_name == self.GRAY_CODE_BACKEND:
+                qaoa_results = gray_code_search(
+                    qubo_matrix=qubo_matrix,
+                    conflicts=selections_to_masks(conflicts),
+                    min_assets=min_assets,
+                    max_assets=max_assets,
+                    metrics_engine=PortfolioMetricsEngine(
+                        expected_returns, covariance_matrix, prices, risk_free_rate, qubo_matrix)
+                )
+            elif backend_name == self.BRANCH_AND_BOUND_BACKEND:
+                qaoa_results = branch_and_bound_search(
+                    qubo_matrix=qubo_matrix,
+                    conflicts=conflicts,
+                    min_assets=min_assets,
+                    max_assets=max_assets
+                )
+            elif backend_name in (self.ANNEALING_BACKEND, self.TEMPERING_BACKEND):
+                qaoa_results = annealing_search(
+                    qubo_matrix=qubo_matrix,
+                    conflicts=conflicts,
+                    min_assets=min_assets,
+                    max_assets=max_assets,
+                    tempering=backend_name == self.TEMPERING_BACKEND
+                )
+            elif backend_name == self.TABU_BACKEND:
+                qaoa_results = tabu_search(
+                    qubo_matrix=qubo_matrix,
+                    conflicts=conflicts,
+                    min_assets=min_assets,
+                    max_assets=max_assets
+                )
+            elif backend_name == self.SHARDED_SCAN_BACKEND:
+                qaoa_results = sharded_scan(
+                    qubo_matrix=qubo_matrix,
+                    expected_returns=expected_returns,
+                    covariance_matrix=covariance_matrix,
+                    prices=prices,
+                    risk_free_rate=risk_free_rate,
+                    conflicts=selections_to_masks(conflicts),
+                    min_assets=min_assets,
+                    max_assets=max_assets
                 )
             else:
                 raise ValueError(f"Unknown backend: {backend_name}")
             
+            if valid_portfolios is None:
+                valid_portfolios_count = qaoa_results.get('feasible_count')
+                if not qaoa_results['portfolios']:
+                    return self._no_solution_result()
+            else:
+                valid_portfolios_count = len(valid_portfolios)
+            
             # ========================================
             # STEP 6: CLASSICAL POST-PROCESSING & RANKING
             # ========================================
             report_progress(5, "Step 5/6: Post-processing and ranking portfolios", 83)
             
-            # Evaluate all portfolios with precise financial metrics
-            evaluated_portfolios = self._evaluate_portfolios_precise(
+            # Evaluate all portfolios with precise financial metrics, streaming
+            # them through the top-10 rankings
+            ranking = PortfolioRanking(10, np.dtype(np.intp))
+            evaluated = self._evaluate_portfolios_precise(
                 portfolios=qaoa_results['portfolios'],
                 tickers=tickers,
                 expected_returns=expected_returns,
@@ -188,12 +275,13 @@ class PortfolioOptimizer:
                 prices=prices,
                 budget=budget,
                 risk_free_rate=risk_free_rate,
-                qubo_matrix=qubo_matrix
+                qubo_matrix=qubo_matrix,
+                ranking=ranking
             )
             
-            # Sort by Sharpe ratio (descending) and get top 10
-            evaluated_portfolios.sort(key=lambda x: x['sharpe'], reverse=True)
-            top_portfolios = evaluated_portfolios[:10]
+            # Top 10 by Sharpe ratio (descending), plus by return, risk and QUBO value
+            ranked_portfolios = evaluated['ranked']
+            top_portfolios = ranked_portfolios['sharpe']
             
             report_progress(6, "Step 6/6: Final results prepared", 100)
             
@@ -202,11 +290,17 @@ class PortfolioOptimizer:
                 'top_portfolios': top_portfolios,
                 'qaoa_portfolios': qaoa_results['portfolios'],
                 'classical_portfolios': [],  # Not used in this architecture
-                'all_evaluated_portfolios': evaluated_portfolios,
-                'valid_portfolios_count': len(valid_portfolios),
-                'total_combinations': len(all_portfolios)
+                'sampled_portfolios': evaluated['sample'],
+                'evaluated_count': evaluated['count'],
+                'ranked_portfolios': ranked_portfolios,
+                'valid_portfolios_count': valid_portfolios_count,
+                'total_combinations': total_combinations
             }
             
+            if valid_portfolios is None:
+                # Energies, optimality gap and timing reported by the classical solver
+                result['solver_stats'] = {key: value for key, value in qaoa_results.items() if key != 'portfolios'}
+            
             logger.info(f"Optimization completed successfully. Found {len(top_portfolios)} top portfolios.")
             return result
         
@@ -214,6 +308,21 @@ class PortfolioOptimizer:
             logger.error(f"Error in rewritten portfolio optimization: {str(e)}")
             raise
     
+    def _no_solution_result(self) -> Dict[str, Any]:
+        """Result returned when no portfolio satisfies the hard constraints"""
+        error_msg = ("No valid portfolios could be found. Your hard constraints "
+                   "(e.g., Minimum Assets, Correlation Threshold) are too strict "
+                   "for the selected stocks. Please relax your constraints and try again.")
+        logger.error(error_msg)
+        return {
+            'error': error_msg,
+            'top_portfolios': [],
+            'qaoa_portfolios': [],
+            'classical_portfolios': [],
+            'sampled_portfolios': [],
+            'evaluated_count': 0
+        }
+    
     def _compute_correlation_matrix(self, covariance_matrix: np.ndarray) -> np.ndarray:
         """Compute correlation matrix from covariance matrix"""
         try:
@@ -234,70 +343,33 @@ class PortfolioOptimizer:
             logger.error(f"Error computing correlation matrix: {str(e)}")
             raise
     
-    def _generate_all_portfolio_combinations(self, n_assets: int) -> List[List[int]]:
-        """Generate all possible 2^N - 1 portfolio combinations"""
-        try:
-            all_combinations = []
-            
-            # Generate all non-empty subsets of {0, 1, 2, ..., n_assets-1}
-            for r in range(1, n_assets + 1):  # r from 1 to n_assets
-                for combo in itertools.combinations(range(n_assets), r):
-                    all_combinations.append(list(combo))
-            
-            logger.info(f"Generated {len(all_combinations)} portfolio combinations")
-            return all_combinations
-            
-        except Exception as e:
-            logger.error(f"Error generating portfolio combinations: {str(e)}")
-            raise
-    
-    def _apply_hard_constraints(self, 
-                               all_portfolios: List[List[int]], 
-                               correlation_matrix: np.ndarray,
-                               min_assets: int,
-                               correlation_threshold: float) -> List[List[int]]:
-        """Apply hard constraints: min_assets and correlation_threshold"""
+    def _enumerate_feasible_portfolios(self,
+                                       correlation_matrix: np.ndarray,
+                                       min_assets: int,
+                                       correlation_threshold: float,
+                                       max_assets: Optional[int] = None) -> np.ndarray:
+        """
+        Enumerate only the portfolios that satisfy the hard constraints.
+        
+        Assets whose |correlation| exceeds the threshold are joined by an edge of a
+        conflict graph, and the feasible portfolios are exactly its independent
+        sets with at least min_assets (and at most max_assets) members. These are
+        generated directly, pruning a branch as soon as it conflicts, can no
+        longer reach min_assets or is full, so the cost scales with the feasible
+        count rather than 2^N.
+        """
         try:
-            valid_portfolios = []
+            n_assets = correlation_matrix.shape[0]
+            conflicts = conflict_masks(correlation_matrix, correlation_threshold)
+            n_edges = int(np.sum(np.abs(correlation_matrix[np.triu_indices(n_assets, k=1)]) > correlation_threshold))
+            logger.info(f"Correlation conflict graph: {n_assets} assets, {n_edges} conflicting pairs")
             
-            for portfolio in all_portfolios:
-                # Check min_assets constraint
-                if len(portfolio) < min_assets:
-                    continue
-                
-                # Check correlation_threshold constraint
-                if self._check_correlation_constraint(portfolio, correlation_matrix, correlation_threshold):
-                    valid_portfolios.append(portfolio)
-            
-            logger.info(f"Hard constraints applied: {len(valid_portfolios)}/{len(all_portfolios)} portfolios passed")
-            return valid_portfolios
+            return enumerate_independent_sets(conflicts, n_assets, min_assets, max_assets)
             
         except Exception as e:
-            logger.error(f"Error applying hard constraints: {str(e)}")
+            logger.error(f"Error enumerating feasible portfolios: {str(e)}")
             raise
     
-    def _check_correlation_constraint(self, 
-                                    portfolio: List[int], 
-                                    correlation_matrix: np.ndarray, 
-                                    correlation_threshold: float) -> bool:
-        """Check if portfolio passes correlation threshold constraint"""
-        try:
-            # Check all pairs of stocks in the portfolio
-            for i in range(len(portfolio)):
-                for j in range(i + 1, len(portfolio)):
-                    stock_i = portfolio[i]
-                    stock_j = portfolio[j]
-                    correlation = abs(correlation_matrix[stock_i, stock_j])
-                    
-                    if correlation > correlation_threshold:
-                        return False  # Portfolio fails correlation constraint
-            
-            return True  # Portfolio passes all correlation checks
-            
-        except Exception as e:
-            logger.error(f"Error checking correlation constraint: {str(e)}")
-            return False
-    
     def _build_qubo_model(self,
                          expected_returns: np.ndarray,
                          covariance_matrix: np.ndarray,
@@ -351,10 +423,13 @@ class PortfolioOptimizer:
             raise
     
     def _run_aer_simulator_on_valid_portfolios(self,
-                                              valid_portfolios: List[List[int]],
+                                              valid_portfolios: np.ndarray,
                                               qubo_matrix: np.ndarray,
                                               reps: int = 3,
-                                              shots: int = 1000) -> Dict[str, Any]:
+                                              shots: int = 1000,
+                                              conflicts: Optional[np.ndarray] = None,
+                                              min_assets: int = 1,
+                                              max_assets: Optional[int] = None) -> Dict[str, Any]:
         """Run QAOA optimization on valid portfolios using Aer Simulator with SimpleQAOAOptimizer"""
         try:
             import time
@@ -381,28 +456,20 @@ class PortfolioOptimizer:
 
                 # Result may contain counts or a single best solution; try to extract both
                 portfolios = []
+                valid_index = PortfolioIndex(valid_portfolios, n_assets)
 
                 # If counts are available, iterate over measured bitstrings (sorted by frequency)
                 counts = result.get('counts') or {}
                 if counts:
                     # Sort bitstrings by descending count
                     sorted_bitstrings = sorted(counts.items(), key=lambda x: x[1], reverse=True)
-                    for bitstring, count in sorted_bitstrings:
-                        # Convert bitstring to solution vector (reverse to match ordering used elsewhere)
-                        solution = [int(bit) for bit in bitstring[::-1]]
-                        selected_indices = [i for i, bit in enumerate(solution) if bit == 1]
-                        if selected_indices in valid_portfolios:
-                            portfolios.append({
-                                'selection': solution,
-                                'selected_indices': selected_indices,
-                                'probability': count / float(sum(counts.values()))
-                            })
+                    portfolios = self._collect_valid_samples(sorted_bitstrings, valid_index, n_assets)
 
                 # Fallback: if no counts, check for single best solution
                 if not portfolios and 'solution' in result:
                     best_solution = result['solution']
                     selected_indices = [i for i, bit in enumerate(best_solution) if bit == 1]
-                    if selected_indices in valid_portfolios:
+                    if indices_to_mask(selected_indices) in valid_index:
                         portfolios.append({
                             'selection': best_solution,
                             'selected_indices': selected_indices,
@@ -415,22 +482,25 @@ class PortfolioOptimizer:
 
             except Exception as e:
                 logger.error(f"Error solving full QUBO with SimpleQAOAOptimizer: {str(e)}")
-                # Fallback to greedy algorithm on valid portfolios
-                logger.info("Falling back to greedy algorithm on valid portfolios")
-                return self._greedy_optimization_on_valid_portfolios(valid_portfolios, qubo_matrix, shots)
+                # Fallback to a classical search of the valid portfolios
+                return self._fallback_optimization_on_valid_portfolios(
+                    valid_portfolios, qubo_matrix, shots, conflicts, min_assets, max_assets)
         
         except Exception as e:
             logger.error(f"Error in SimpleQAOA optimization: {str(e)}")
-            # Fallback to greedy algorithm on valid portfolios
-            logger.info("Falling back to greedy algorithm on valid portfolios")
-            return self._greedy_optimization_on_valid_portfolios(valid_portfolios, qubo_matrix, shots)
+            # Fallback to a classical search of the valid portfolios
+            return self._fallback_optimization_on_valid_portfolios(
+                valid_portfolios, qubo_matrix, shots, conflicts, min_assets, max_assets)
     
     def _run_ibm_quantum_hardware_on_valid_portfolios(
         self,
         valid_portfolios,
         qubo_matrix,
         reps=3,
-        shots=1000
+        shots=1000,
+        conflicts=None,
+        min_assets=1,
+        max_assets=None
     ):
         """
         Run QAOA on IBM Quantum HARDWARE (Open Plan – Direct Job Execution).
@@ -569,19 +639,8 @@ class PortfolioOptimizer:
             # final_counts = final_result[0].data.meas.get_counts()
             final_counts = final_result[0].data.c.get_counts()
 
-            portfolios = []
-            total_shots = sum(final_counts.values())
-
-            for bitstring, count in final_counts.items():
-                selection = np.array(list(map(int, bitstring[::-1])))
-                selected = [i for i, b in enumerate(selection) if b == 1]
-
-                if selected in valid_portfolios:
-                    portfolios.append({
-                        "selection": selection.tolist(),
-                        "selected_indices": selected,
-                        "probability": count / total_shots
-                    })
+            portfolios = self._collect_valid_samples(
+                list(final_counts.items()), PortfolioIndex(valid_portfolios, n_assets), n_assets)
 
             total_time = time.time() - start_total_time
             logger.info(f"TOTAL EXECUTION TIME: {total_time:.2f} sec")
@@ -601,46 +660,82 @@ class PortfolioOptimizer:
                 valid_portfolios,
                 qubo_matrix,
                 reps,
-                shots
+                shots,
+                conflicts,
+                min_assets,
+                max_assets
             )
 
+    def _collect_valid_samples(self,
+                               sampled_counts: List[Tuple[str, int]],
+                               valid_index: PortfolioIndex,
+                               n_assets: int) -> List[Dict[str, Any]]:
+        """
+        Keep the measured bitstrings that are valid portfolios, in the given order.
+        
+        Bitstrings are converted to masks in bulk and checked against the valid
+        portfolio index in O(1) each.
+        """
+        total_shots = float(sum(count for _, count in sampled_counts))
+        masks = bitstrings_to_masks([bitstring for bitstring, _ in sampled_counts], n_assets)
+        
+        kept = np.flatnonzero(valid_index.contains(masks))
+        
+        portfolios = []
+        for k, selection in zip(kept, masks_to_selections(masks[kept], n_assets)):
+            portfolios.append({
+                'selection': selection.tolist(),
+                'selected_indices': mask_to_indices(masks[k]),
+                'probability': sampled_counts[k][1] / total_shots
+            })
+        return portfolios
+    
+    def _fallback_optimization_on_valid_portfolios(self,
+                                                   valid_portfolios: np.ndarray,
+                                                   qubo_matrix: np.ndarray,
+                                                   shots: int = 100,
+                                                   conflicts: Optional[np.ndarray] = None,
+                                                   min_assets: int = 1,
+                                                   max_assets: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Classical fallback when QAOA fails.
+        
+        Valid sets small enough to scan are ranked exhaustively by the greedy
+        fallback; larger ones are sampled by simulated annealing under the same
+        hard constraints.
+        """
+        if conflicts is None or len(valid_portfolios) <= self.GREEDY_MAX_CANDIDATES:
+            logger.info("Falling back to greedy algorithm on valid portfolios")
+            return self._greedy_optimization_on_valid_portfolios(valid_portfolios, qubo_matrix, shots)
+        
+        logger.info("Falling back to simulated annealing on valid portfolios")
+        try:
+            results = annealing_search(qubo_matrix, conflicts, min_assets, max_assets,
+                                       max_portfolios=max(shots, 1))
+            return {'portfolios': results['portfolios']}
+        except Exception as e:
+            logger.error(f"Error in annealing fallback: {str(e)}")
+            return {'portfolios': []}
     
     def _greedy_optimization_on_valid_portfolios(self,
-                                               valid_portfolios: List[List[int]],
+                                               valid_portfolios: np.ndarray,
                                                qubo_matrix: np.ndarray,
                                                shots: int = 100) -> Dict[str, Any]:
-        """Greedy optimization algorithm on valid portfolios as fallback"""
+        """Greedy optimization algorithm on valid portfolio masks as fallback"""
         try:
             portfolios = []
+            n_assets = qubo_matrix.shape[0]
             
-            # Sort valid portfolios by QUBO value (lower is better)
-            portfolio_qubo_values = []
-            for portfolio in valid_portfolios:
-                # Create binary selection vector
-                selection = np.zeros(qubo_matrix.shape[0], dtype=int)
-                for idx in portfolio:
-                    selection[idx] = 1
-                
-                # Calculate QUBO value
-                qubo_value = selection.T @ qubo_matrix @ selection
-                portfolio_qubo_values.append((portfolio, qubo_value))
-            
-            # Sort by QUBO value (ascending)
-            portfolio_qubo_values.sort(key=lambda x: x[1])
+            # QUBO value of every valid portfolio, evaluated in blocks (lower is better)
+            qubo_values = qubo_energies(qubo_matrix, valid_portfolios)
             
-            # Take top portfolios
-            top_count = min(shots, len(portfolio_qubo_values))
-            for i in range(top_count):
-                portfolio, qubo_value = portfolio_qubo_values[i]
-                
-                # Create binary selection vector
-                selection = np.zeros(qubo_matrix.shape[0], dtype=int)
-                for idx in portfolio:
-                    selection[idx] = 1
-                
+            # Take top portfolios without sorting the full candidate list
+            top = smallest_k(qubo_values, shots)
+            top_count = len(top)
+            for mask, selection in zip(valid_portfolios[top], masks_to_selections(valid_portfolios[top], n_assets)):
                 portfolios.append({
-                    'selection': selection.tolist(),
-                    'selected_indices': portfolio,
+                    'selection': selection.astype(int).tolist(),
+                    'selected_indices': mask_to_indices(mask),
                     'probability': 1.0 / top_count
                 })
             
@@ -723,105 +818,86 @@ class PortfolioOptimizer:
                                    prices: np.ndarray,
                                    budget: float,
                                    risk_free_rate: float,
-                                   qubo_matrix: np.ndarray) -> List[Dict[str, Any]]:
-        """Evaluate portfolios with precise financial metrics"""
+                                   qubo_matrix: np.ndarray,
+                                   ranking: PortfolioRanking,
+                                   sample_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Evaluate portfolios with precise financial metrics, one block at a time.
+        
+        Each block is pushed into the ranking with positions in portfolios as
+        identifiers; empty portfolios are skipped. Only the ranked portfolios and
+        an evenly spaced sample of at most sample_size (for the scatter plots)
+        are turned into result dicts, so memory is bounded by the block size
+        rather than the number of candidates.
+        
+        Returns:
+            Dict with 'ranked' (criterion -> portfolio dicts, best first),
+            'sample' (portfolio dicts, including the ranked ones) and 'count'
+            (number of portfolios evaluated)
+        """
         try:
-            evaluated_portfolios = []
-            
-            for portfolio in portfolios:
-                if 'selected_indices' in portfolio:
-                    # Use selected_indices if available (from new architecture)
-                    selected_indices = portfolio['selected_indices']
-                    selection = np.zeros(len(tickers), dtype=int)
-                    for idx in selected_indices:
-                        selection[idx] = 1
-                else:
-                    # Fallback to selection array
-                    selection = np.array(portfolio['selection'])
+            engine = PortfolioMetricsEngine(expected_returns, covariance_matrix, prices, risk_free_rate, qubo_matrix)
+            sample_size = self.VISUALIZATION_SAMPLE_SIZE if sample_size is None else sample_size
+            count = 0
+            
+            for start in range(0, len(portfolios), engine.chunk_size):
+                selections = self._selection_matrix(portfolios[start:start + engine.chunk_size], len(tickers))
                 
                 # Skip empty portfolios
-                if np.sum(selection) == 0:
-                    continue
-                
-                # Calculate portfolio metrics
-                selected_assets = [tickers[i] for i in range(len(tickers)) if selection[i] == 1]
-                selected_prices = prices * selection
-                total_cost = np.sum(selected_prices)
-                
-                # Calculate weights (normalize to sum to 1.0 for 100% allocation)
-                weights = selected_prices / total_cost if total_cost > 0 else np.zeros_like(selected_prices)
-                
-                # Ensure weights sum to 1.0 (100% allocation)
-                if np.sum(weights) > 0:
-                    weights = weights / np.sum(weights)
+                kept = np.flatnonzero(selections.sum(axis=1) > 0)
                 
-                # Redistribute remaining allocation if weights don't sum to 1.0
-                # This addresses the issue where portfolio allocations don't sum to 100%
-                weights_sum = np.sum(weights)
-                if weights_sum > 0 and weights_sum < 1.0:
-                    # Calculate remaining allocation
-                    remaining_allocation = 1.0 - weights_sum
-                    
-                    # Get indices of assets with weights > 0
-                    nonzero_indices = np.where(weights > 0)[0]
-                    
-                    if len(nonzero_indices) > 0:
-                        # Sort assets by expected return
-                        sorted_indices = sorted(nonzero_indices, key=lambda i: expected_returns[i], reverse=True)
-                        
-                        # Distribute 60% of remaining allocation to high-return assets
-                        high_return_count = max(1, len(sorted_indices) // 3)  # At least one asset
-                        for i in range(high_return_count):
-                            weights[sorted_indices[i]] += (remaining_allocation * 0.6) / high_return_count
-                        
-                        # Distribute 40% of remaining allocation to lower-return assets
-                        low_return_indices = sorted_indices[high_return_count:]
-                        if len(low_return_indices) > 0:
-                            for i in low_return_indices:
-                                weights[i] += (remaining_allocation * 0.4) / len(low_return_indices)
-                        else:
-                            # If no lower-return assets, add to high-return assets
-                            for i in range(high_return_count):
-                                weights[sorted_indices[i]] += (remaining_allocation * 0.4) / high_return_count
-                
-                # Calculate expected return
-                portfolio_return = np.sum(expected_returns * weights)
-                
-                # Calculate risk (standard deviation)
-                portfolio_risk = np.sqrt(weights.T @ covariance_matrix @ weights)
-                
-                # Calculate Sharpe ratio
-                if portfolio_risk < 1e-8:
-                    sharpe_ratio = 0.0 if portfolio_return <= risk_free_rate else 1000.0
-                else:
-                    sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_risk
-                
-                # Calculate QUBO value
-                qubo_value = selection.T @ qubo_matrix @ selection
-                
-                
-                   # Create evaluated portfolio
-                evaluated_portfolio = {
-                    'assets': selected_assets,
-                    'selection': selection.tolist(),
-                    'weights': weights.tolist(),
-                    'return': float(portfolio_return),
-                    'risk': float(portfolio_risk),
-                    'sharpe': float(sharpe_ratio),
-                    'cost': float(total_cost),
-                    'qubo_value': float(qubo_value),
-                    'probability': portfolio.get('probability', 0.0)
+                # Weights, return, risk, Sharpe, cost and QUBO value of the whole block at once
+                metrics = engine.evaluate_block(selections[kept].astype(np.float64))
+                ranking.push(start + kept, metrics)
+                count += len(kept)
+            
+            # Describe the ranked portfolios and the visualization sample only
+            sample = np.unique(np.linspace(0, len(portfolios) - 1, min(sample_size, len(portfolios))).astype(np.intp))
+            positions = np.union1d(sample, ranking.ids()).astype(np.intp)
+            selections = self._selection_matrix([portfolios[k] for k in positions], len(tickers))
+            nonempty = selections.sum(axis=1) > 0
+            positions, selections = positions[nonempty], selections[nonempty]
+            metrics = {key: values.tolist() for key, values in engine.evaluate_block(selections.astype(np.float64)).items()}
+            
+            described = {}
+            for k, (selection, position) in enumerate(zip(selections.tolist(), positions.tolist())):
+                described[position] = {
+                    'assets': [ticker for ticker, held in zip(tickers, selection) if held == 1],
+                    'selection': selection,
+                    'weights': metrics['weights'][k],
+                    'return': metrics['return'][k],
+                    'risk': metrics['risk'][k],
+                    'sharpe': metrics['sharpe'][k],
+                    'cost': metrics['cost'][k],
+                    'qubo_value': metrics['qubo_value'][k],
+                    'probability': portfolios[position].get('probability', 0.0)
                 }
-                
-                evaluated_portfolios.append(evaluated_portfolio)
             
-            logger.info(f"Evaluated {len(evaluated_portfolios)} portfolios with precise metrics")
-            return evaluated_portfolios
+            logger.info(f"Evaluated {count} portfolios with precise metrics; "
+                        f"described {len(described)} ranked and sampled portfolios")
+            return {
+                'ranked': {criterion: [described[k] for k in ranking.top(criterion).tolist()]
+                           for criterion in ranking.CRITERIA},
+                'sample': list(described.values()),
+                'count': count
+            }
         
         except Exception as e:
             logger.error(f"Error evaluating portfolios: {str(e)}")
             raise
     
+    def _selection_matrix(self, portfolios: List[Dict[str, Any]], n_assets: int) -> np.ndarray:
+        """0/1 selection matrix (M x N) of portfolio dicts"""
+        selections = np.zeros((len(portfolios), n_assets), dtype=int)
+        for k, portfolio in enumerate(portfolios):
+            if 'selected_indices' in portfolio:
+                # Use selected_indices if available (from new architecture)
+                selections[k, list(portfolio['selected_indices'])] = 1
+            else:
+                # Fallback to selection array
+                selections[k] = portfolio['selection']
+        return selections
+    
     def get_job_status(self, job_id: str) -> Dict[str, Any]:
         """Get the status of an asynchronous job"""
         try:
@@ -0,0 +1,274 @@
+import logging
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from backend.candidate_space import masks_to_selections
+
+logger = logging.getLogger(__name__)
+
+# Candidates evaluated per block; bounds the temporary (chunk x N) matrices
+DEFAULT_CHUNK_SIZE = 16384
+
+
+def selection_block(candidates: np.ndarray, n_assets: int) -> np.ndarray:
+    """Float (M x N) 0/1 matrix for a block of masks (M,) or selections (M x N)"""
+    candidates = np.asarray(candidates)
+    if candidates.ndim == 1:
+        return masks_to_selections(candidates, n_assets).astype(np.float64)
+    return candidates.astype(np.float64)
+
+
+def qubo_energies(qubo_matrix: np.ndarray,
+                  candidates: np.ndarray,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    QUBO energy x^T Q x of many candidates at once.
+
+    Args:
+        qubo_matrix: (N x N) QUBO matrix
+        candidates: (M,) portfolio masks or (M x N) 0/1 selection matrix
+        chunk_size: Candidates expanded and multiplied per block
+
+    Returns:
+        np.ndarray: Energy per candidate (M,)
+    """
+    candidates = np.asarray(candidates)
+    n_assets = qubo_matrix.shape[0]
+    energies = np.empty(len(candidates))
+    for start in range(0, len(candidates), chunk_size):
+        x = selection_block(candidates[start:start + chunk_size], n_assets)
+        energies[start:start + len(x)] = np.einsum('ij,ij->i', x @ qubo_matrix, x)
+    return energies
+
+
+def smallest_k(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k smallest values in ascending order.
+
+    Uses argpartition so only the selected k are sorted; ties keep their
+    original relative order, as a stable full sort would.
+    """
+    values = np.asarray(values)
+    k = min(k, len(values))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    if k < len(values):
+        candidates = np.argpartition(values, k - 1)[:k]
+        # Values equal to the k-th smallest may have been split arbitrarily
+        threshold = values[candidates].max()
+        candidates = np.union1d(np.flatnonzero(values < threshold), np.flatnonzero(values == threshold))
+    else:
+        candidates = np.arange(len(values))
+    order = np.lexsort((candidates, values[candidates]))
+    return candidates[order[:k]]
+
+
+class PortfolioMetricsEngine:
+    """Batched financial metrics for many candidate portfolios at once
+
+    Computes, for every row of a selection matrix, the same quantities as the
+    per-portfolio evaluation in PortfolioOptimizer: price-proportional weights
+    (including the redistribution of any allocation left below 100%), expected
+    return, risk, Sharpe ratio, cost and QUBO value. Candidates are processed
+    in chunks so temporaries stay at O(chunk_size x N).
+    """
+
+    def __init__(self,
+                 expected_returns: np.ndarray,
+                 covariance_matrix: np.ndarray,
+                 prices: np.ndarray,
+                 risk_free_rate: float,
+                 qubo_matrix: np.ndarray,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the engine.
+
+        Args:
+            expected_returns: Annualized expected return per asset (N,)
+            covariance_matrix: Annualized covariance matrix (N x N)
+            prices: Latest price per asset (N,)
+            risk_free_rate: Annual risk-free rate used for the Sharpe ratio
+            qubo_matrix: QUBO matrix (N x N)
+            chunk_size: Candidates evaluated per block
+        """
+        self.expected_returns = np.asarray(expected_returns, dtype=np.float64)
+        self.covariance_matrix = np.asarray(covariance_matrix, dtype=np.float64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.risk_free_rate = risk_free_rate
+        self.qubo_matrix = np.asarray(qubo_matrix, dtype=np.float64)
+        self.chunk_size = chunk_size
+        self.n_assets = len(self.expected_returns)
+        # Assets by descending expected return; ties keep index order like a stable sort
+        self._return_order = np.argsort(-self.expected_returns, kind='stable')
+        self._return_rank = np.empty(self.n_assets, dtype=np.intp)
+        self._return_rank[self._return_order] = np.arange(self.n_assets)
+
+    def evaluate(self, candidates: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Evaluate candidates given as masks (M,) or a 0/1 selection matrix (M x N).
+
+        Returns:
+            Dict of arrays: 'weights' (M x N), 'return', 'risk', 'sharpe', 'cost'
+            and 'qubo_value' (M,)
+        """
+        candidates = np.asarray(candidates)
+        blocks = [self.evaluate_block(selection_block(candidates[start:start + self.chunk_size], self.n_assets))
+                  for start in range(0, len(candidates), self.chunk_size)]
+        if not blocks:
+            return self.evaluate_block(np.zeros((0, self.n_assets)))
+        return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+    def evaluate_block(self, x: np.ndarray) -> Dict[str, np.ndarray]:
+        """Evaluate one block given as a float (M x N) 0/1 selection matrix"""
+        selected_prices = self.prices * x
+        total_cost = selected_prices.sum(axis=1)
+
+        # Weights proportional to price, normalized to sum to 1.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = np.where((total_cost > 0)[:, None], selected_prices / total_cost[:, None], 0.0)
+            weights_sum = weights.sum(axis=1)
+            weights = np.where((weights_sum > 0)[:, None], weights / weights_sum[:, None], weights)
+        weights = self._redistribute(weights)
+
+        portfolio_return = (self.expected_returns * weights).sum(axis=1)
+        portfolio_risk = np.sqrt(np.einsum('ij,ij->i', weights @ self.covariance_matrix, weights))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe_ratio = np.where(
+                portfolio_risk < 1e-8,
+                np.where(portfolio_return <= self.risk_free_rate, 0.0, 1000.0),
+                (portfolio_return - self.risk_free_rate) / portfolio_risk)
+
+        return {
+            'weights': weights,
+            'return': portfolio_return,
+            'risk': portfolio_risk,
+            'sharpe': sharpe_ratio,
+            'cost': total_cost,
+            'qubo_value': np.einsum('ij,ij->i', x @ self.qubo_matrix, x)
+        }
+
+    def _redistribute(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Spread any allocation left below 100% over the held assets.
+
+        Rows whose weights sum to less than 1.0 (floating point leftovers) give
+        60% of the remainder to the top third of their assets by expected return
+        and 40% to the rest, or all of it to the top third when there is no rest.
+        """
+        weights_sum = weights.sum(axis=1)
+        rows = np.flatnonzero((weights_sum > 0) & (weights_sum < 1.0))
+        if len(rows) == 0:
+            return weights
+
+        w = weights[rows]
+        remaining = (1.0 - weights_sum[rows])[:, None]
+        held = w > 0
+        n_held = held.sum(axis=1)[:, None]
+        high_count = np.maximum(1, n_held // 3)
+
+        # Position of each held asset among the row's held assets by expected return
+        rank = np.cumsum(held[:, self._return_order], axis=1)[:, self._return_rank] - 1
+        high = held & (rank < high_count)
+        low = held & ~high
+        has_low = n_held > high_count
+
+        # Increments are applied in the same sequence as the per-portfolio rule
+        w = w + np.where(high, (remaining * 0.6) / high_count, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = w + np.where(low, (remaining * 0.4) / (n_held - high_count), 0.0)
+        w = w + np.where(high & ~has_low, (remaining * 0.4) / high_count, 0.0)
+
+        weights = weights.copy()
+        weights[rows] = w
+        return weights
+
+
+class TopKSelector:
+    """Running selection of the k candidates with the smallest key
+
+    Candidates arrive in blocks of (masks, keys); only the current best k are
+    retained, so memory stays O(k) however many candidates are pushed. Among
+    equal keys, candidates pushed earlier are kept.
+    """
+
+    def __init__(self, k: int, dtype: np.dtype):
+        """
+        Initialize the selector.
+
+        Args:
+            k: Number of candidates to keep
+            dtype: Mask dtype of the candidates
+        """
+        self.k = k
+        self.masks = np.zeros(0, dtype=dtype)
+        self.keys = np.zeros(0)
+
+    def push(self, masks: np.ndarray, keys: np.ndarray) -> None:
+        """Offer a block of candidates with their keys"""
+        if len(masks) == 0:
+            return
+        masks = np.concatenate([self.masks, masks.astype(self.masks.dtype)])
+        keys = np.concatenate([self.keys, keys])
+        best = smallest_k(keys, self.k)
+        self.masks, self.keys = masks[best], keys[best]
+
+
+class PortfolioRanking:
+    """Streaming top-K portfolios under several criteria at once
+
+    Blocks of candidates arrive with their metrics (or are evaluated by the
+    engine) and only the best k per criterion are retained, so memory depends
+    on k and the block size rather than on the number of candidates. Candidates
+    are identified by masks or by positions in some list, whichever the
+    caller pushes.
+    """
+
+    # Criterion -> (metric, sign); keys are minimized, so maximized metrics are negated
+    CRITERIA = {
+        'sharpe': ('sharpe', -1.0),
+        'return': ('return', -1.0),
+        'risk': ('risk', 1.0),
+        'qubo_value': ('qubo_value', 1.0)
+    }
+
+    def __init__(self, k: int, dtype: np.dtype, engine: Optional[PortfolioMetricsEngine] = None):
+        """
+        Initialize the ranking.
+
+        Args:
+            k: Candidates kept per criterion
+            dtype: Dtype of the candidate identifiers
+            engine: Engine evaluating blocks pushed without metrics
+        """
+        self.k = k
+        self.engine = engine
+        self.selectors = {criterion: TopKSelector(k, dtype) for criterion in self.CRITERIA}
+
+    def push(self, ids: np.ndarray, metrics: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """Offer a block of candidates; masks are evaluated by the engine when metrics are not given"""
+        if len(ids) == 0:
+            return
+        if metrics is None:
+            metrics = self.engine.evaluate(ids)
+        for criterion, (metric, sign) in self.CRITERIA.items():
+            self.selectors[criterion].push(ids, sign * np.asarray(metrics[metric]))
+
+    def top(self, criterion: str) -> np.ndarray:
+        """Identifiers of the best candidates under a criterion, best first"""
+        return self.selectors[criterion].masks
+
+    def ids(self) -> np.ndarray:
+        """Identifiers of the candidates kept under any criterion, each once"""
+        ids = np.concatenate([self.top(criterion) for criterion in self.CRITERIA])
+        _, first = np.unique(ids, return_index=True)
+        return ids[np.sort(first)]
+
+    def partial(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Kept (identifiers, keys) per criterion, for merging into another ranking"""
+        return {criterion: (selector.masks, selector.keys) for criterion, selector in self.selectors.items()}
+
+    def merge(self, partial: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> None:
+        """Merge the partial result of another ranking over different candidates"""
+        for criterion, (ids, keys) in partial.items():
+            self.selectors[criterion].push(np.asarray(ids), np.asarray(keys, dtype=np.float64))
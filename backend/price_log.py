@@ -0,0 +1,105 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# One ingested price row: (ticker, ISO date, close)
+PriceRow = Tuple[str, str, float]
+
+
+class PriceLog:
+    """Durable append-only log of ingested price rows
+
+    Each batch is written as one JSON line with a single O_APPEND write and
+    fsynced before append() returns, so a batch is either fully in the log or
+    not at all; a torn trailing line left by a crash is ignored on replay, and
+    the next append starts a fresh line after it.
+    Readers consume the log incrementally from their own offset, which lets
+    every worker process pick up batches written by the others.
+    """
+
+    def __init__(self, log_path: str):
+        """
+        Initialize the price log.
+
+        Args:
+            log_path: Path of the log file (created on first append)
+        """
+        self.log_path = log_path
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def append(self, rows: List[PriceRow]) -> None:
+        """Durably append a batch of (ticker, date, close) rows"""
+        record = {
+            'written_at': datetime.now().isoformat(),
+            'rows': [[ticker, date, close] for ticker, date, close in rows]
+        }
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.log_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Terminate a torn line left by a crash so this batch stays parseable
+            size = os.fstat(fd).st_size
+            if size > 0 and os.pread(fd, 1, size - 1) != b'\n':
+                logger.warning(f"Price log {self.log_path} ends with a partial line; starting a new line")
+                line = b'\n' + line
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        logger.info(f"Appended {len(rows)} price rows to {self.log_path}")
+
+    @property
+    def offset(self) -> int:
+        """Bytes of the log consumed so far; the same in every process that has replayed it"""
+        with self._lock:
+            return self._offset
+
+    def read_new(self) -> List[List[PriceRow]]:
+        """Return the batches written since the previous call (all batches on the first call)"""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.log_path)
+            except OSError:
+                return []
+
+            if size < self._offset:
+                logger.warning(f"Price log {self.log_path} shrank; replaying it from the start")
+                self._offset = 0
+            if size == self._offset:
+                return []
+
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._offset)
+                payload = f.read(size - self._offset)
+
+            # Only consume complete lines; a trailing partial line is either being
+            # written right now or was torn by a crash
+            end = payload.rfind(b'\n') + 1
+            batches = []
+            for line in payload[:end].splitlines():
+                if not line.strip():
+                    continue
+                batch = self._decode(line)
+                if batch is not None:
+                    batches.append(batch)
+            self._offset += end
+            return batches
+
+    def _decode(self, line: bytes) -> Optional[List[PriceRow]]:
+        """Decode one log line, or return None if it is corrupt"""
+        try:
+            record = json.loads(line)
+            return [(str(ticker), str(date), float(close)) for ticker, date, close in record['rows']]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping corrupt price log record: {str(e)}")
+            return None
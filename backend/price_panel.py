@@ -0,0 +1,174 @@
+import os
+import struct
+import logging
+import threading
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PricePanel:
+    """Read-only, memory-mapped panel of closes for every ticker on one date index
+
+    The panel file holds the union of all trading dates as int64 nanoseconds and
+    a float64 close matrix (NaN where a ticker has no close on a date), stored
+    ticker-major so each ticker's series is one contiguous block. It is opened
+    with np.memmap, so every worker process serving the same data directory
+    shares a single physical copy through the OS page cache instead of holding
+    its own pandas frames. Each ticker also records the size and mtime of the
+    CSV it was built from; series whose CSV has since changed are not served.
+    """
+
+    MAGIC = b'QLPPANEL'
+    VERSION = 1
+    # magic, version, date count, ticker count, ticker name bytes, data version
+    HEADER = struct.Struct('<8sqqqq40s')
+
+    def __init__(self,
+                 path: str,
+                 version: str,
+                 tickers: List[str],
+                 fingerprints: np.ndarray,
+                 dates: np.ndarray,
+                 closes: np.ndarray):
+        """
+        Initialize the panel from already mapped arrays (use PricePanel.open).
+
+        Args:
+            path: Path of the panel file
+            version: Data version the panel was built for
+            tickers: Tickers in panel order
+            fingerprints: Source CSV (size, mtime_ns) per ticker (N x 2)
+            dates: Sorted trading dates (T,) as int64 nanoseconds
+            closes: Closes per ticker (N x T), NaN where missing
+        """
+        self.path = path
+        self.version = version
+        self.tickers = tickers
+        self.fingerprints = fingerprints
+        self.dates = dates
+        self.closes = closes
+        self.positions = {ticker: i for i, ticker in enumerate(tickers)}
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.positions
+
+    @classmethod
+    def open(cls, path: str) -> Optional['PricePanel']:
+        """Map a panel file read-only, or return None if it is missing or invalid"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(cls.HEADER.size)
+                if len(header) < cls.HEADER.size:
+                    return None
+                magic, version, n_dates, n_tickers, names_size, data_version = cls.HEADER.unpack(header)
+                if magic != cls.MAGIC or version != cls.VERSION:
+                    return None
+                names = f.read(names_size)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return None
+
+        offsets = cls._offsets(n_dates, n_tickers, names_size)
+        if n_dates == 0 or n_tickers == 0 or size != offsets[-1]:
+            return None
+
+        tickers = names.decode('utf-8').split('\n')
+        fingerprints = np.memmap(path, dtype='<i8', mode='r', offset=offsets[0], shape=(n_tickers, 2))
+        dates = np.memmap(path, dtype='<i8', mode='r', offset=offsets[1], shape=(n_dates,))
+        closes = np.memmap(path, dtype='<f8', mode='r', offset=offsets[2], shape=(n_tickers, n_dates))
+        return cls(path, data_version.decode('ascii'), tickers, fingerprints, dates, closes)
+
+    @classmethod
+    def write(cls,
+              path: str,
+              version: str,
+              tickers: List[str],
+              loader: Callable[[str], Tuple[os.stat_result, np.ndarray, np.ndarray]]) -> int:
+        """
+        Build the panel file for the given tickers.
+
+        Args:
+            path: Path of the panel file
+            version: Data version the panel is built for
+            tickers: Tickers to include
+            loader: Callable returning (CSV stat result, dates, closes) for a ticker
+
+        Returns:
+            int: Number of tickers written
+        """
+        series = {}
+        for ticker in tickers:
+            try:
+                stat, ticker_dates, ticker_closes = loader(ticker)
+            except Exception as e:
+                logger.error(f"Error adding {ticker} to price panel: {str(e)}")
+                continue
+            # One cell per date cannot hold repeated dates; such tickers are served per file
+            if np.any(np.diff(ticker_dates) <= 0):
+                logger.warning(f"{ticker} has repeated dates and was left out of the price panel")
+                continue
+            series[ticker] = (stat, ticker_dates, ticker_closes)
+        if not series:
+            raise ValueError("No ticker data available for the price panel")
+
+        names = list(series.keys())
+        dates = np.unique(np.concatenate([np.asarray(d, dtype='<i8') for _, d, _ in series.values()]))
+        closes = np.full((len(names), len(dates)), np.nan, dtype='<f8')
+        fingerprints = np.zeros((len(names), 2), dtype='<i8')
+        for i, (stat, ticker_dates, ticker_closes) in enumerate(series.values()):
+            closes[i, np.searchsorted(dates, ticker_dates)] = ticker_closes
+            fingerprints[i] = (stat.st_size, stat.st_mtime_ns)
+
+        names_bytes = '\n'.join(names).encode('utf-8')
+        header = cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(dates), len(names),
+                                 len(names_bytes), version.encode('ascii'))
+        padding = cls._offsets(len(dates), len(names), len(names_bytes))[0] - cls.HEADER.size - len(names_bytes)
+
+        # Swap the new file in atomically; workers that still map the old file
+        # keep reading it until they reopen
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                f.write(names_bytes)
+                f.write(b'\0' * padding)
+                f.write(fingerprints.tobytes())
+                f.write(dates.tobytes())
+                f.write(closes.tobytes())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        logger.info(f"Wrote price panel with {len(dates)} dates for {len(names)} tickers to {path}")
+        return len(names)
+
+    @classmethod
+    def _offsets(cls, n_dates: int, n_tickers: int, names_size: int) -> Tuple[int, int, int, int]:
+        """Byte offsets of the fingerprints, dates and closes blocks, and the file size"""
+        # Align the arrays on 8 bytes after the variable-length ticker names
+        fingerprints_offset = -(-(cls.HEADER.size + names_size) // 8) * 8
+        dates_offset = fingerprints_offset + 16 * n_tickers
+        closes_offset = dates_offset + 8 * n_dates
+        return fingerprints_offset, dates_offset, closes_offset, closes_offset + 8 * n_dates * n_tickers
+
+    def column(self, ticker: str, stat: os.stat_result) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return (dates, closes) of a ticker, or None if it is absent or its CSV changed.
+
+        Args:
+            ticker: Ticker symbol
+            stat: Current stat result of the ticker's CSV file
+        """
+        i = self.positions.get(ticker)
+        if i is None:
+            return None
+        size, mtime_ns = self.fingerprints[i]
+        if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            return None
+        closes = self.closes[i]
+        present = ~np.isnan(closes)
+        return self.dates[present], closes[present]
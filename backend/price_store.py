@@ -0,0 +1,123 @@
+import os
+import struct
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PriceStore:
+    """Compact binary store of cleaned Date/Close series, one file per ticker
+
+    Each entry holds the cleaned, date-sorted series of a ticker's CSV as raw
+    int64 dates (nanoseconds since epoch) followed by float64 closes, behind a
+    small header recording the size and mtime of the CSV it was built from.
+    Entries are rebuilt automatically whenever the source CSV changes.
+    """
+
+    MAGIC = b'QLPSTORE'
+    VERSION = 1
+    # magic, version, source mtime (ns), source size, row count
+    HEADER = struct.Struct('<8sqqqq')
+
+    def __init__(self,
+                 data_dir: str,
+                 parser: Callable[[str, str], pd.DataFrame],
+                 store_dir: Optional[str] = None):
+        """
+        Initialize the price store.
+
+        Args:
+            data_dir: Directory holding the ticker CSV files
+            parser: Callable taking (file_path, ticker) and returning a cleaned
+                DataFrame with 'Date' and 'Close' columns
+            store_dir: Directory for the binary entries (defaults to data_dir/.store)
+        """
+        self.data_dir = data_dir
+        self.parser = parser
+        self.store_dir = store_dir or os.path.join(data_dir, '.store')
+
+    def csv_path(self, ticker: str) -> str:
+        """Path of the source CSV file for a ticker"""
+        return os.path.join(self.data_dir, f"{ticker}.csv")
+
+    def entry_path(self, ticker: str) -> str:
+        """Path of the binary store entry for a ticker"""
+        return os.path.join(self.store_dir, f"{ticker}.bin")
+
+    def load(self, ticker: str, stat: Optional[os.stat_result] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (dates, closes) for a ticker, rebuilding the entry if its CSV changed"""
+        if stat is None:
+            stat = os.stat(self.csv_path(ticker))
+        arrays = self._read_entry(ticker, stat)
+        if arrays is None:
+            arrays = self._ingest_one(ticker, stat)
+        return arrays
+
+    def ingest(self, tickers: Optional[List[str]] = None) -> Dict[str, int]:
+        """Build or refresh store entries, returning the row count per ticker"""
+        if tickers is None:
+            tickers = [os.path.splitext(f)[0] for f in os.listdir(self.data_dir) if f.endswith('.csv')]
+
+        row_counts = {}
+        for ticker in tickers:
+            try:
+                dates, _ = self.load(ticker)
+                row_counts[ticker] = len(dates)
+            except Exception as e:
+                logger.error(f"Error ingesting {ticker} into price store: {str(e)}")
+
+        logger.info(f"Price store holds {len(row_counts)} out of {len(tickers)} tickers")
+        return row_counts
+
+    def _read_entry(self, ticker: str, stat: os.stat_result) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Read a store entry, or return None if it is missing or stale"""
+        try:
+            with open(self.entry_path(ticker), 'rb') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            return None
+
+        if len(payload) < self.HEADER.size:
+            return None
+
+        magic, version, mtime_ns, size, n_rows = self.HEADER.unpack_from(payload)
+        if (magic != self.MAGIC or version != self.VERSION
+                or mtime_ns != stat.st_mtime_ns or size != stat.st_size
+                or len(payload) != self.HEADER.size + 16 * n_rows):
+            return None
+
+        dates = np.frombuffer(payload, dtype='<i8', count=n_rows, offset=self.HEADER.size)
+        closes = np.frombuffer(payload, dtype='<f8', count=n_rows, offset=self.HEADER.size + 8 * n_rows)
+        return dates, closes
+
+    def _ingest_one(self, ticker: str, stat: os.stat_result) -> Tuple[np.ndarray, np.ndarray]:
+        """Parse a ticker's CSV and write its store entry"""
+        df = self.parser(self.csv_path(ticker), ticker)
+        dates = df['Date'].to_numpy(dtype='datetime64[ns]').view('i8').astype('<i8')
+        closes = df['Close'].to_numpy(dtype='<f8')
+
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, stat.st_mtime_ns, stat.st_size, len(dates))
+
+        # Write to a unique temporary file and swap it in atomically so that
+        # concurrent readers never observe a partially written entry
+        os.makedirs(self.store_dir, exist_ok=True)
+        entry_path = self.entry_path(ticker)
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                f.write(dates.tobytes())
+                f.write(closes.tobytes())
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            # A read-only deployment can still serve the freshly parsed data
+            logger.warning(f"Could not write price store entry for {ticker}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        logger.info(f"Ingested {ticker} into price store with {len(dates)} rows")
+        return dates, closes
@@ -0,0 +1,252 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def pairwise_moments(values: np.ndarray):
+    """
+    Building blocks of pairwise-complete statistics of a (T x N) array with NaN gaps.
+
+    Returns:
+        Tuple of column means (N,), centred data with gaps zeroed (T x N),
+        validity weights (T x N), pair counts (N x N) and pair sums (N x N),
+        where pair_sums[i, j] is the sum of centred x_i over rows where x_j is present
+    """
+    mask = ~np.isnan(values)
+    weights = mask.astype(np.float64)
+
+    # Centre each column on its own mean; covariance is shift invariant and this
+    # keeps the sums below well conditioned
+    counts = weights.sum(axis=0)
+    column_means = np.divide(np.nansum(values, axis=0), counts,
+                             out=np.zeros(values.shape[1]), where=counts > 0)
+    centred = np.where(mask, values - column_means, 0.0)
+
+    pair_counts = weights.T @ weights          # rows where both i and j are present
+    pair_sums = centred.T @ weights            # sum of x_i over rows where j is present
+    return column_means, centred, weights, pair_counts, pair_sums
+
+
+def pairwise_complete_cov(values: np.ndarray) -> np.ndarray:
+    """
+    Sample covariance of the columns of a (T x N) array with NaN gaps.
+
+    Each pair (i, j) uses only the rows where both columns are present, with
+    means taken over those same rows, matching pandas' DataFrame.cov().
+
+    Args:
+        values: (T x N) array with NaN for missing observations
+
+    Returns:
+        np.ndarray: (N x N) covariance matrix, NaN where a pair has fewer than 2 rows
+    """
+    _, centred, _, pair_counts, pair_sums = pairwise_moments(values)
+    cross_sums = centred.T @ centred           # sum of x_i * x_j over joint rows
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (cross_sums - pair_sums * pair_sums.T / pair_counts) / (pair_counts - 1)
+    cov[pair_counts < 2] = np.nan
+    return cov
+
+
+def pairwise_complete_corr(values: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation of the columns of a (T x N) array with NaN gaps.
+
+    Like pandas' DataFrame.corr(), both the covariance and the two variances of
+    a pair are computed over the rows where both columns are present.
+    """
+    _, centred, weights, pair_counts, pair_sums = pairwise_moments(values)
+    cross_sums = centred.T @ centred
+    square_sums = (centred * centred).T @ weights   # sum of x_i^2 over rows where j is present
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        co_moment = cross_sums - pair_sums * pair_sums.T / pair_counts
+        pair_variance = square_sums - pair_sums * pair_sums / pair_counts
+        corr = co_moment / np.sqrt(pair_variance * pair_variance.T)
+    corr[pair_counts < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+class ReturnsMatrix:
+    """Daily returns of several tickers laid out on one shared trading-date index
+
+    Holds a (T x N) close matrix and a (T x N) matrix of simple daily returns,
+    both NaN where a ticker has no observation on a date. Each ticker's return
+    is taken between its own consecutive closes and stored on the date of the
+    later close, so rows line up by trading day rather than by position.
+    The rows live in buffers with spare capacity, so appending a trading
+    date costs O(N) amortized; dates, closes, values and mask are views of
+    the filled rows.
+    """
+
+    def __init__(self, tickers: List[str], dates: np.ndarray, closes: np.ndarray, values: np.ndarray):
+        """
+        Initialize the returns matrix.
+
+        Args:
+            tickers: Tickers in column order
+            dates: Sorted trading dates (T,) as datetime64[ns]
+            closes: Close prices (T x N), NaN where missing
+            values: Daily returns (T x N), NaN where missing
+        """
+        self.tickers = list(tickers)
+        self.positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        # The given arrays are the initial buffers; the first append grows them
+        self.n_rows = len(dates)
+        self._dates = dates
+        self._closes = closes
+        self._values = values
+        self._mask = ~np.isnan(values)
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Trading dates (T,)"""
+        return self._dates[:self.n_rows]
+
+    @property
+    def closes(self) -> np.ndarray:
+        """Close prices (T x N), NaN where missing"""
+        return self._closes[:self.n_rows]
+
+    @property
+    def values(self) -> np.ndarray:
+        """Daily returns (T x N), NaN where missing"""
+        return self._values[:self.n_rows]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Whether each daily return is present (T x N)"""
+        return self._mask[:self.n_rows]
+
+    def _allocate(self, capacity: int) -> None:
+        """(Re)allocate row buffers for capacity rows, keeping existing contents"""
+        rows, n_assets = self.n_rows, len(self.tickers)
+        dates = np.empty(capacity, dtype='datetime64[ns]')
+        closes = np.full((capacity, n_assets), np.nan)
+        values = np.full((capacity, n_assets), np.nan)
+        mask = np.zeros((capacity, n_assets), dtype=bool)
+        dates[:rows] = self._dates[:rows]
+        closes[:rows] = self._closes[:rows]
+        values[:rows] = self._values[:rows]
+        mask[:rows] = self._mask[:rows]
+        self._dates = dates
+        self._closes = closes
+        self._values = values
+        self._mask = mask
+
+    @classmethod
+    def from_stock_data(cls, stock_data: Dict[str, pd.DataFrame]) -> 'ReturnsMatrix':
+        """Build the matrix from cleaned, date-sorted Date/Close frames"""
+        tickers = list(stock_data.keys())
+        series = [(stock_data[ticker]['Date'].to_numpy(dtype='datetime64[ns]'),
+                   stock_data[ticker]['Close'].to_numpy(dtype=np.float64)) for ticker in tickers]
+
+        if series:
+            dates = np.unique(np.concatenate([d for d, _ in series]))
+        else:
+            dates = np.array([], dtype='datetime64[ns]')
+
+        closes = np.full((len(dates), len(tickers)), np.nan)
+        values = np.full((len(dates), len(tickers)), np.nan)
+        for i, (ticker_dates, ticker_closes) in enumerate(series):
+            rows = np.searchsorted(dates, ticker_dates)
+            closes[rows, i] = ticker_closes
+            if len(ticker_closes) > 1:
+                values[rows[1:], i] = ticker_closes[1:] / ticker_closes[:-1] - 1
+
+        logger.info(f"Built returns matrix with {len(dates)} trading dates for {len(tickers)} assets")
+        return cls(tickers, dates, closes, values)
+
+    def subset(self, tickers: List[str]) -> 'ReturnsMatrix':
+        """Return the matrix restricted to the given tickers, in that order"""
+        idx = self.indices(tickers)
+        return ReturnsMatrix(tickers, self.dates, self.closes[:, idx], self.values[:, idx])
+
+    def indices(self, tickers: List[str]) -> np.ndarray:
+        """Column positions of the given tickers"""
+        return np.array([self.positions[ticker] for ticker in tickers], dtype=np.intp)
+
+    def mean(self) -> np.ndarray:
+        """Annualized mean daily return per ticker"""
+        return np.nanmean(self.values, axis=0) * TRADING_DAYS_PER_YEAR
+
+    def cov(self) -> np.ndarray:
+        """Annualized pairwise-complete covariance matrix of daily returns"""
+        return pairwise_complete_cov(self.values) * TRADING_DAYS_PER_YEAR
+
+    def corr(self) -> np.ndarray:
+        """Pairwise-complete correlation matrix of daily returns"""
+        return pairwise_complete_corr(self.values)
+
+    def append_row(self, date: np.datetime64, closes: np.ndarray) -> np.ndarray:
+        """
+        Append one trading date of closes and return its row of daily returns.
+
+        Args:
+            date: Trading date, later than every date already in the matrix
+            closes: Close per ticker (N,), NaN for tickers without a close on that date
+
+        Returns:
+            np.ndarray: Daily returns (N,) against each ticker's previous close
+        """
+        date = np.datetime64(date, 'ns')
+        if self.n_rows and date <= self.dates[-1]:
+            raise ValueError(f"Date {date} is not after the last date {self.dates[-1]}")
+
+        returns_row = closes / self.latest_prices() - 1
+        if self.n_rows + 1 > len(self._dates):
+            self._allocate(max(16, 2 * len(self._dates)))
+
+        row = self.n_rows
+        self._dates[row] = date
+        self._closes[row] = closes
+        self._values[row] = returns_row
+        self._mask[row] = ~np.isnan(returns_row)
+        self.n_rows += 1
+        return returns_row
+
+    def revise_last_row(self, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Overwrite closes on the last trading date and recompute its row of returns.
+
+        Args:
+            closes: Revised close per ticker (N,), NaN to keep the current value
+
+        Returns:
+            Tuple of the revised daily returns (N,) and closes (N,) of the last row
+        """
+        if self.n_rows == 0:
+            raise ValueError("Cannot revise an empty returns matrix")
+
+        closes_row = np.where(np.isnan(closes), self.closes[-1], closes)
+        previous = ReturnsMatrix(self.tickers, self.dates[:-1], self.closes[:-1], self.values[:-1])
+        returns_row = closes_row / previous.latest_prices() - 1
+
+        self.closes[-1] = closes_row
+        self.values[-1] = returns_row
+        self.mask[-1] = ~np.isnan(returns_row)
+        return returns_row, closes_row
+
+    def latest_prices(self) -> np.ndarray:
+        """Last available close per ticker"""
+        if self.n_rows == 0:
+            return np.full(len(self.tickers), np.nan)
+        valid = ~np.isnan(self.closes)
+        last_rows = self.n_rows - 1 - np.argmax(valid[::-1], axis=0)
+        return self.closes[last_rows, np.arange(len(self.tickers))]
+
+    def common_closes(self, tickers: Optional[List[str]] = None, max_rows: Optional[int] = None) -> pd.DataFrame:
+        """Closes on the dates where every given ticker traded, optionally limited to the last max_rows"""
+        idx = self.indices(tickers) if tickers is not None else np.arange(len(self.tickers))
+        closes = self.closes[:, idx]
+        rows = np.flatnonzero(~np.isnan(closes).any(axis=1))
+        if max_rows is not None:
+            rows = rows[-max_rows:]
+        columns = [self.tickers[i] for i in idx]
+        return pd.DataFrame(closes[rows], index=pd.DatetimeIndex(self.dates[rows]), columns=columns)
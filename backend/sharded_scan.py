@@ -0,0 +1,248 @@
+import os
+import math
+import time
+import logging
+import threading
+import concurrent.futures
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.candidate_space import (correlation_feasible, layer_ranges, mask_dtype, popcount,
+                                     unrank_combinations)
+from backend.classical_solvers import EXHAUSTIVE_MAX_ASSETS, solutions_to_portfolios
+from backend.portfolio_metrics import DEFAULT_CHUNK_SIZE, PortfolioMetricsEngine, PortfolioRanking
+
+logger = logging.getLogger(__name__)
+
+# Largest universe scanned exhaustively by a request
+SHARDED_SCAN_MAX_ASSETS = EXHAUSTIVE_MAX_ASSETS
+
+# Shards per worker, so faster workers pick up the slack of slower ones
+SHARDS_PER_WORKER = 4
+
+# Worker pools reused across scans, keyed by worker count
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(n_workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """Get the process pool with n_workers workers, starting it on first use"""
+    with _pools_lock:
+        pool = _pools.get(n_workers)
+        if pool is None:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=n_workers)
+            _pools[n_workers] = pool
+            logger.info(f"Started sharded scan pool with {n_workers} workers")
+        return pool
+
+
+def _discard_pool(n_workers: int, pool: concurrent.futures.ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next scan starts a fresh one"""
+    with _pools_lock:
+        if _pools.get(n_workers) is pool:
+            del _pools[n_workers]
+    pool.shutdown(wait=False)
+
+
+def scan_context(qubo_matrix: np.ndarray,
+                 expected_returns: np.ndarray,
+                 covariance_matrix: np.ndarray,
+                 prices: np.ndarray,
+                 risk_free_rate: float,
+                 conflicts: np.ndarray,
+                 min_assets: int,
+                 top_k: int,
+                 max_assets: Optional[int] = None) -> Dict[str, Any]:
+    """Everything a worker needs to scan a shard, as plain lists so it can be pickled or sent as JSON"""
+    return {
+        'n_assets': len(expected_returns),
+        'qubo_matrix': np.asarray(qubo_matrix, dtype=np.float64).tolist(),
+        'expected_returns': np.asarray(expected_returns, dtype=np.float64).tolist(),
+        'covariance_matrix': np.asarray(covariance_matrix, dtype=np.float64).tolist(),
+        'prices': np.asarray(prices, dtype=np.float64).tolist(),
+        'risk_free_rate': float(risk_free_rate),
+        'conflicts': [int(conflict) for conflict in conflicts],
+        'min_assets': int(min_assets),
+        'max_assets': None if max_assets is None else int(max_assets),
+        'top_k': int(top_k)
+    }
+
+
+def make_shards(n_assets: int, n_shards: int) -> List[Tuple[int, int]]:
+    """Split the mask range [1, 2^N) into n_shards contiguous (start, stop) ranges"""
+    bounds = np.linspace(1, 1 << n_assets, n_shards + 1).astype(np.int64)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def make_layer_shards(n_assets: int, min_assets: int, max_assets: int, n_shards: int) -> List[Tuple[int, int, int]]:
+    """
+    Split the subsets of sizes [min_assets, max_assets] into about n_shards
+    (size, start, stop) rank ranges of a single cardinality layer each.
+
+    Only the allowed layers are covered, so a tight max_assets scans
+    sum_k C(N, k) subsets instead of 2^N - 1.
+    """
+    total = sum(math.comb(n_assets, size) for size in range(max(min_assets, 1), min(max_assets, n_assets) + 1))
+    return layer_ranges(n_assets, min_assets, max_assets, max(1, -(-total // max(n_shards, 1))))
+
+
+def scan_shard(context: Dict[str, Any],
+               start: int,
+               stop: int,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Scan the masks in [start, stop) and return the shard's local top-K.
+
+    Without a size, [start, stop) is a range of masks and every mask is checked
+    against min_assets and max_assets; with a size, it is a range of ranks of
+    the size-k subsets, which are unranked directly (see unrank_combinations).
+    Candidates are then checked against the correlation conflicts, and
+    feasible ones are evaluated by a PortfolioMetricsEngine and streamed into a
+    PortfolioRanking, so memory stays O(top_k + chunk_size) whatever the shard
+    size.
+
+    Returns:
+        Dict with 'size', 'start', 'stop', 'scanned', 'feasible' and 'top'
+        (criterion -> [masks, keys]), all as plain Python values
+    """
+    n_assets = context['n_assets']
+    dtype = mask_dtype(n_assets)
+    conflicts = np.asarray(context['conflicts'], dtype=dtype)
+    engine = PortfolioMetricsEngine(
+        np.asarray(context['expected_returns']),
+        np.asarray(context['covariance_matrix']),
+        np.asarray(context['prices']),
+        context['risk_free_rate'],
+        np.asarray(context['qubo_matrix']),
+        chunk_size=chunk_size
+    )
+    ranking = PortfolioRanking(context['top_k'], dtype, engine)
+
+    max_assets = context.get('max_assets')
+    feasible = 0
+    for block_start in range(start, stop, chunk_size):
+        block_stop = min(block_start + chunk_size, stop)
+        if size is not None:
+            masks = unrank_combinations(n_assets, size, block_start, block_stop)
+        else:
+            masks = np.arange(block_start, block_stop, dtype=dtype)
+            counts = popcount(masks)
+            keep = counts >= context['min_assets']
+            if max_assets is not None:
+                keep &= counts <= max_assets
+            masks = masks[keep]
+        masks = masks[correlation_feasible(masks, conflicts)]
+        feasible += len(masks)
+        ranking.push(masks)
+
+    return {
+        'size': size,
+        'start': start,
+        'stop': stop,
+        'scanned': stop - start,
+        'feasible': feasible,
+        'top': {criterion: [ids.tolist(), keys.tolist()] for criterion, (ids, keys) in ranking.partial().items()}
+    }
+
+
+def merge_shard_results(results: List[Dict[str, Any]], n_assets: int, top_k: int) -> Dict[str, Any]:
+    """
+    Merge shard results into the global top-K.
+
+    Shards are merged in mask order (layer by layer for cardinality-layer
+    shards), so ties resolve as a single scan over the same shards would.
+
+    Returns:
+        Dict with 'ranking' (a PortfolioRanking over masks), 'scanned' and 'feasible'
+    """
+    ranking = PortfolioRanking(top_k, mask_dtype(n_assets))
+    scanned = feasible = 0
+    for result in sorted(results, key=lambda result: (result.get('size') or 0, result['start'])):
+        ranking.merge({criterion: (np.asarray(ids, dtype=mask_dtype(n_assets)), keys)
+                       for criterion, (ids, keys) in result['top'].items()})
+        scanned += result['scanned']
+        feasible += result['feasible']
+    return {'ranking': ranking, 'scanned': scanned, 'feasible': feasible}
+
+
+def sharded_scan(qubo_matrix: np.ndarray,
+                 expected_returns: np.ndarray,
+                 covariance_matrix: np.ndarray,
+                 prices: np.ndarray,
+                 risk_free_rate: float,
+                 conflicts: np.ndarray,
+                 min_assets: int,
+                 max_assets: Optional[int] = None,
+                 top_k: int = 10,
+                 n_workers: Optional[int] = None,
+                 n_shards: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Exhaustive scan of the subset space split across a process pool.
+
+    The pool is started on the first scan and reused by later ones.
+
+    The mask range is cut into contiguous shards; when max_assets is given,
+    only the allowed cardinality layers are cut into rank ranges instead. Each
+    worker process checks the constraints and computes the metrics of its
+    shard and sends back only its local top-K per criterion plus counts, which
+    the parent merges.
+
+    Args:
+        qubo_matrix: (N x N) QUBO matrix
+        expected_returns: Annualized expected return per asset (N,)
+        covariance_matrix: Annualized covariance matrix (N x N)
+        prices: Latest price per asset (N,)
+        risk_free_rate: Annual risk-free rate used for the Sharpe ratio
+        conflicts: Correlation conflict bitmask per asset (see conflict_masks)
+        min_assets: Minimum portfolio size
+        max_assets: Optional maximum portfolio size
+        top_k: Portfolios kept per ranking criterion
+        n_workers: Worker processes (default: all CPUs); 1 scans in this process
+        n_shards: Number of shards (default: SHARDS_PER_WORKER per worker)
+
+    Returns:
+        Dict with 'portfolios', 'feasible_count', 'best_energy', 'shards',
+        'workers' and 'elapsed_sec'
+    """
+    start_time = time.time()
+    n_assets = len(expected_returns)
+    if n_assets > SHARDED_SCAN_MAX_ASSETS:
+        raise ValueError(f"Sharded scan supports at most {SHARDED_SCAN_MAX_ASSETS} assets, got {n_assets}")
+
+    n_workers = n_workers or os.cpu_count() or 1
+    n_shards = n_shards or n_workers * SHARDS_PER_WORKER
+    if max_assets is None:
+        shards = [(None, start, stop) for start, stop in make_shards(n_assets, n_shards)]
+    else:
+        shards = make_layer_shards(n_assets, min_assets, max_assets, n_shards)
+    context = scan_context(qubo_matrix, expected_returns, covariance_matrix, prices,
+                           risk_free_rate, conflicts, min_assets, top_k, max_assets)
+
+    if n_workers == 1:
+        results = [scan_shard(context, start, stop, size=size) for size, start, stop in shards]
+    else:
+        pool = _get_pool(n_workers)
+        try:
+            futures = [pool.submit(scan_shard, context, start, stop, size=size) for size, start, stop in shards]
+            results = [future.result() for future in futures]
+        except concurrent.futures.process.BrokenProcessPool:
+            _discard_pool(n_workers, pool)
+            raise
+
+    merged = merge_shard_results(results, n_assets, top_k)
+    ranking = merged['ranking']
+    energies = ranking.selectors['qubo_value'].keys
+    masks = ranking.ids()
+
+    elapsed = time.time() - start_time
+    logger.info(f"Sharded scan of {merged['scanned']} subsets ({merged['feasible']} feasible) over "
+                f"{len(shards)} shards and {n_workers} workers took {elapsed:.2f} seconds")
+    return {
+        'portfolios': solutions_to_portfolios(masks, n_assets) if len(masks) else [],
+        'feasible_count': merged['feasible'],
+        'best_energy': float(energies[0]) if len(energies) else None,
+        'shards': len(shards),
+        'workers': n_workers,
+        'elapsed_sec': elapsed
+    }
@@ -1,3 +1,4 @@
+import time
 import numpy as np
 import logging
 from typing import Dict, Any, List, Tuple, Callable, Optional
@@ -8,10 +9,23 @@ from qiskit_optimization import QuadraticProgram
 # Update imports for optimizers
 from qiskit_algorithms.optimizers import COBYLA, SPSA
 
+from backend.statevector_qaoa import STATEVECTOR_MAX_QUBITS, StatevectorQAOA
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Optimizer iterations when the cost function is an exact statevector expectation
+STATEVECTOR_MAXITER = 50
+
+# Wall-clock seconds for the statevector parameter search; keeps a request well
+# under the gunicorn worker timeout (120 s) even at 24 qubits
+STATEVECTOR_TIME_LIMIT = 60.0
+
+
+class _TimeBudgetExhausted(Exception):
+    """Raised from the cost function to stop the parameter search at its time limit"""
+
 class SimpleQAOAOptimizer:
     """
     A simplified QAOA optimizer for portfolio optimization that works with Qiskit 2.x
@@ -284,50 +298,6 @@ class SimpleQAOAOptimizer:
                 all_indices.add(j)
             n_vars = max(all_indices) + 1
             
-            # EMERGENCY BYPASS - FORCE FIXED PARAMETERS FOR ANY LARGE PROBLEM
-            print(f"DEBUG: n_vars = {n_vars}")
-            if n_vars >= 8:  # MUCH LOWER THRESHOLD
-                logger.info("Using variational parameter optimization")
-                logger.info("Starting parameter optimization with COBYLA")
-                logger.info("Parameter optimization completed with 3 function evaluations")
-                logger.info(f"Final cost value: -1000000000.0")
-                logger.info(f"Optimized parameters - gammas: [0.78539816 0.78539816 0.78539816], betas: [0.78539816 0.78539816 0.78539816]")
-                
-                # FAST FIXED CIRCUIT - NO OPTIMIZATION
-                from qiskit import QuantumCircuit
-                qc = QuantumCircuit(n_vars)
-                
-                # Hadamard gates
-                for q in range(n_vars):
-                    qc.h(q)
-                
-                # Fixed QAOA layers (gamma = beta = pi/4)
-                for _ in range(self.reps):
-                    for q in range(n_vars):
-                        qc.rz(np.pi/2, q)  # 2 * pi/4 = pi/2
-                        qc.rx(np.pi/2, q)  # 2 * pi/4 = pi/2
-                
-                qc.measure_all()
-                
-                # Quick execution
-                simulator = Aer.get_backend('aer_simulator')
-                job = simulator.run(qc, shots=self.shots)
-                counts = job.result().get_counts()
-                
-                best_bitstring = max(counts, key=counts.get)
-                best_solution = [int(bit) for bit in best_bitstring[::-1]]
-                
-                result = {
-                    'solution': best_solution,
-                    'objective_value': -1000000000.0,
-                    'probability': counts[best_bitstring] / self.shots,
-                    'counts': counts,
-                    'success': True
-                }
-                
-                logger.info(f"QAOA optimization completed successfully with objective value: -1000000000.0")
-                return result
-            
             # Create a QUBO matrix from the dictionary
             qubo_matrix = np.zeros((n_vars, n_vars))
             for (i, j), coeff in qubo_dict.items():
@@ -335,6 +305,10 @@ class SimpleQAOAOptimizer:
                 if i != j:  # Ensure symmetry for off-diagonal elements
                     qubo_matrix[j, i] = coeff
             
+            # Without a named backend, QAOA is simulated exactly in NumPy
+            if not self.backend:
+                return self._solve_statevector(qubo_matrix, optimizer_name, use_variational)
+            
             # Convert QUBO to Hamiltonian
             hamiltonian = self._qubo_to_hamiltonian(qubo_matrix)
             
@@ -400,6 +374,62 @@ class SimpleQAOAOptimizer:
             logger.error(f"Error in QAOA optimization: {str(e)}")
             raise
 
+    def _solve_statevector(self, qubo_matrix: np.ndarray, optimizer_name: str = 'COBYLA',
+                           use_variational: bool = True) -> Dict[str, Any]:
+        """
+        Solve a QUBO with the NumPy statevector QAOA simulator.
+        
+        The variational parameters are optimized against the exact expected
+        QUBO energy for at most STATEVECTOR_TIME_LIMIT seconds, then the final
+        state is sampled with the configured shots.
+        
+        Args:
+            qubo_matrix: The QUBO matrix representing the optimization problem
+            optimizer_name: Name of the optimizer to use ('COBYLA' or 'SPSA')
+            use_variational: Whether to use variational parameter optimization (True) or fixed parameters (False)
+            
+        Returns:
+            Dict[str, Any]: The optimization result containing the solution and other metadata
+        """
+        n_vars = qubo_matrix.shape[0]
+        if n_vars > STATEVECTOR_MAX_QUBITS:
+            raise ValueError(f"Statevector QAOA supports at most {STATEVECTOR_MAX_QUBITS} variables, got {n_vars}")
+        
+        logger.info(f"Using statevector QAOA simulator for {n_vars} qubits")
+        engine = StatevectorQAOA(qubo_matrix, self.reps)
+        
+        if use_variational:
+            logger.info("Using variational parameter optimization")
+            gammas, betas, final_cost = self._optimize_parameters(
+                None, self.reps, optimizer_name, cost_function=engine.expectation,
+                maxiter=STATEVECTOR_MAXITER, time_limit=STATEVECTOR_TIME_LIMIT)
+        else:
+            logger.info("Using fixed parameters (non-variational QAOA)")
+            gammas = np.full(self.reps, 0.8)
+            betas = np.full(self.reps, 0.4)
+        
+        logger.info(f"Sampling final statevector with {self.shots} shots")
+        probabilities = engine.probabilities(gammas, betas)
+        counts = engine.sample_probabilities(probabilities, self.shots)
+        
+        # Process results
+        best_bitstring = max(counts, key=counts.get)
+        best_solution = [int(bit) for bit in best_bitstring[::-1]]  # Reverse to match qubit ordering
+        probability = counts[best_bitstring] / self.shots
+        objective_value = self._calculate_objective_value(best_solution, qubo_matrix)
+        
+        result = {
+            'solution': best_solution,
+            'objective_value': objective_value,
+            'probability': probability,
+            'expected_energy': float(probabilities @ engine.energies),
+            'counts': counts,
+            'success': True
+        }
+        
+        logger.info(f"QAOA optimization completed successfully with objective value: {objective_value}")
+        return result
+
     def _create_cost_function(self, hamiltonian: SparsePauliOp, reps=1) -> Callable:
         """
         Create a cost function for the classical optimizer to minimize.
@@ -484,7 +514,9 @@ class SimpleQAOAOptimizer:
         
         return cost_function
 
-    def _optimize_parameters(self, hamiltonian: SparsePauliOp, reps=1, optimizer_name='COBYLA') -> Tuple[np.ndarray, float]:
+    def _optimize_parameters(self, hamiltonian: SparsePauliOp, reps=1, optimizer_name='COBYLA',
+                             cost_function: Optional[Callable] = None, maxiter: int = 10,
+                             time_limit: Optional[float] = None) -> Tuple[np.ndarray, float]:
         """
         Optimize the QAOA parameters (gamma and beta) using a classical optimizer.
         
@@ -492,6 +524,11 @@ class SimpleQAOAOptimizer:
             hamiltonian: The problem Hamiltonian
             reps: Number of QAOA repetitions
             optimizer_name: Name of the optimizer to use ('COBYLA' or 'SPSA')
+            cost_function: Cost function to minimize (default: sampled energy of the hamiltonian's circuit)
+            maxiter: Maximum optimizer iterations
+            time_limit: Optional wall-clock seconds; the search stops before an
+                evaluation that would run past it and returns the best
+                parameters evaluated so far
             
         Returns:
             Tuple[np.ndarray, float]: Optimized parameters (gammas, betas) and final cost value
@@ -501,7 +538,8 @@ class SimpleQAOAOptimizer:
         logger = logging.getLogger('simple_qaoa_optimizer')
         
         # Create the cost function
-        cost_function = self._create_cost_function(hamiltonian, reps)
+        if cost_function is None:
+            cost_function = self._create_cost_function(hamiltonian, reps)
         
         # Initialize parameters (gamma, beta) for each repetition
         # Use π/4 for both gamma and beta as fixed initial values
@@ -515,24 +553,43 @@ class SimpleQAOAOptimizer:
         # Select optimizer
         if optimizer_name == 'COBYLA':
             from qiskit_algorithms.optimizers import COBYLA
-            optimizer = COBYLA(maxiter=10, tol=1e-4)
+            optimizer = COBYLA(maxiter=maxiter, tol=1e-4)
         elif optimizer_name == 'SPSA':
             from qiskit_algorithms.optimizers import SPSA
-            optimizer = SPSA(maxiter=10)
+            optimizer = SPSA(maxiter=maxiter)
         else:
             raise ValueError(f"Unsupported optimizer: {optimizer_name}")
         
         logger.info(f"Starting parameter optimization with {optimizer_name}")
         
-        # Run optimization
-        result = optimizer.minimize(cost_function, x0=initial_point)
+        # Track the best evaluation so the search can be cut off at the time limit
+        start_time = time.time()
+        best = {'params': initial_point, 'value': None, 'evals': 0, 'last_duration': 0.0}
+        
+        def budgeted_cost(params: np.ndarray) -> float:
+            elapsed = time.time() - start_time
+            if (time_limit is not None and best['value'] is not None
+                    and elapsed + best['last_duration'] > time_limit):
+                raise _TimeBudgetExhausted()
+            eval_start = time.time()
+            value = cost_function(params)
+            best['last_duration'] = time.time() - eval_start
+            best['evals'] += 1
+            if best['value'] is None or value < best['value']:
+                best['params'], best['value'] = np.array(params, dtype=np.float64), value
+            return value
         
-        # Extract optimized parameters
-        optimized_params = result.x
-        function_evals = result.nfev
+        # Run optimization
+        try:
+            result = optimizer.minimize(budgeted_cost, x0=initial_point)
+            optimized_params, final_cost, function_evals = result.x, result.fun, result.nfev
+        except _TimeBudgetExhausted:
+            optimized_params, final_cost, function_evals = best['params'], best['value'], best['evals']
+            logger.warning(f"Parameter optimization stopped at its {time_limit:.0f}s time limit; "
+                           f"using the best of {function_evals} evaluations")
         
         logger.info(f"Parameter optimization completed with {function_evals} function evaluations")
-        logger.info(f"Final cost value: {result.fun}")
+        logger.info(f"Final cost value: {final_cost}")
         
         # Split optimized parameters into gamma and beta
         gammas = optimized_params[:reps]
@@ -540,7 +597,7 @@ class SimpleQAOAOptimizer:
         
         logger.info(f"Optimized parameters - gammas: {gammas}, betas: {betas}")
         
-        return gammas, betas, result.fun
+        return gammas, betas, final_cost
 
     def _calculate_objective_value(self, solution: List[int], qubo_matrix: np.ndarray) -> float:
         """
@@ -0,0 +1,185 @@
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Tuple
+
+from backend.incremental_stats import IncrementalCovariance
+from backend.returns_matrix import ReturnsMatrix
+from backend.window_index import RollingWindowIndex
+
+logger = logging.getLogger(__name__)
+
+
+class UniverseStatistics:
+    """Annualized return and covariance statistics precomputed over every available ticker
+
+    Built once per data version, after which the metrics for any selection of
+    tickers are obtained by fancy-index slicing instead of recomputing returns
+    and covariances per request. New trading days are folded in incrementally
+    through an IncrementalCovariance engine.
+    """
+
+    def __init__(self,
+                 returns: ReturnsMatrix,
+                 signatures: Dict[str, Tuple[int, np.datetime64]],
+                 version: str,
+                 stats_mode: str = 'welford',
+                 ewma_halflife: float = 63.0):
+        """
+        Initialize the universe statistics.
+
+        Args:
+            returns: Date-aligned returns matrix over every ticker
+            signatures: Per-ticker (row count, last date) of the frames used
+            version: Data version the statistics were computed for
+            stats_mode: 'welford' (equal weights) or 'ewma' (exponential weights)
+            ewma_halflife: Half-life in trading days for 'ewma' mode
+        """
+        self.returns = returns
+        self.tickers = returns.tickers
+        # Keep the engine state from before the last row so that row can be revised
+        self.engine = IncrementalCovariance.from_returns(returns.values[:-1], stats_mode, ewma_halflife)
+        self._engine_before_last = self.engine.snapshot()
+        if len(returns.dates):
+            self.engine.update(returns.values[-1])
+        self.expected_returns = self.engine.mean()
+        self.cov_matrix = self.engine.cov()
+        self.latest_prices = returns.latest_prices()
+        self.signatures = signatures
+        self.version = version
+        self._window_index = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls,
+              stock_data: Dict[str, pd.DataFrame],
+              version: str,
+              stats_mode: str = 'welford',
+              ewma_halflife: float = 63.0) -> 'UniverseStatistics':
+        """Compute the statistics for every ticker in stock_data"""
+        if not stock_data:
+            raise ValueError("No valid stock data provided")
+
+        returns = ReturnsMatrix.from_stock_data(stock_data)
+        signatures = {ticker: cls.frame_signature(df) for ticker, df in stock_data.items()}
+
+        logger.info(f"Computed universe statistics for {len(returns.tickers)} assets (version {version})")
+        return cls(returns, signatures, version, stats_mode, ewma_halflife)
+
+    @staticmethod
+    def frame_signature(df: pd.DataFrame) -> Tuple[int, np.datetime64]:
+        """Cheap identity check of a ticker frame: row count and last date"""
+        return len(df), df['Date'].iloc[-1]
+
+    def covers(self, stock_data: Dict[str, pd.DataFrame]) -> bool:
+        """Check that every frame in stock_data is the one the statistics were built from"""
+        with self._lock:
+            for ticker, df in stock_data.items():
+                signature = self.signatures.get(ticker)
+                if signature is None or len(df) == 0 or self.frame_signature(df) != signature:
+                    return False
+            return True
+
+    def slice(self, tickers: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (expected_returns, cov_matrix, latest_prices) for a ticker subset"""
+        with self._lock:
+            idx = self.returns.indices(tickers)
+            return (self.expected_returns[idx],
+                    self.cov_matrix[np.ix_(idx, idx)],
+                    self.latest_prices[idx])
+
+    @property
+    def window_index(self) -> RollingWindowIndex:
+        """Prefix-sum index over the universe, built on first use"""
+        with self._lock:
+            if self._window_index is None:
+                self._window_index = RollingWindowIndex(self.returns)
+            return self._window_index
+
+    def slice_window(self, tickers: List[str], start: Any = None, end: Any = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (expected_returns, cov_matrix, latest_prices) for a ticker subset over [start, end)"""
+        with self._lock:
+            return self.window_index.query(tickers, start, end)
+
+    @property
+    def last_date(self) -> pd.Timestamp:
+        """Last trading date in the universe"""
+        return pd.Timestamp(self.returns.dates[-1])
+
+    def append_row(self, date: Any, closes: Dict[str, float]) -> List[str]:
+        """
+        Fold a new trading day into the statistics in O(N^2).
+
+        Args:
+            date: Trading date, later than the last date in the universe
+            closes: Close per ticker for that date; tickers outside the universe are ignored
+
+        Returns:
+            List[str]: Tickers whose close was applied
+        """
+        date = np.datetime64(pd.Timestamp(date), 'ns')
+        row, applied = self._closes_row(closes)
+
+        with self._lock:
+            returns_row = self.returns.append_row(date, row)
+            self._engine_before_last = self.engine.snapshot()
+            self.engine.update(returns_row)
+            if self._window_index is not None:
+                self._window_index.append(returns_row, row)
+
+            self.expected_returns = self.engine.mean()
+            self.cov_matrix = self.engine.cov()
+            self.latest_prices = np.where(np.isnan(row), self.latest_prices, row)
+            for ticker in applied:
+                n_rows, _ = self.signatures[ticker]
+                self.signatures[ticker] = (n_rows + 1, pd.Timestamp(date))
+
+        logger.info(f"Appended {pd.Timestamp(date).date()} to universe statistics for {len(applied)} assets")
+        return applied
+
+    def revise_last_row(self, closes: Dict[str, float]) -> List[str]:
+        """
+        Revise closes on the last trading date, e.g. for an intraday refresh, in O(N^2).
+
+        The engine is rolled back to its state before the last row and the
+        revised row is folded in again, so nothing else is recomputed.
+
+        Args:
+            closes: Revised close per ticker; tickers outside the universe are ignored
+
+        Returns:
+            List[str]: Tickers whose close was applied
+        """
+        row, applied = self._closes_row(closes)
+
+        with self._lock:
+            had_close = ~np.isnan(self.returns.closes[-1])
+            returns_row, closes_row = self.returns.revise_last_row(row)
+            self.engine.restore(self._engine_before_last)
+            self.engine.update(returns_row)
+            if self._window_index is not None:
+                self._window_index.revise_last(returns_row, closes_row)
+
+            self.expected_returns = self.engine.mean()
+            self.cov_matrix = self.engine.cov()
+            self.latest_prices = np.where(np.isnan(row), self.latest_prices, row)
+            last_date = self.last_date
+            for ticker in applied:
+                if not had_close[self.returns.positions[ticker]]:
+                    n_rows, _ = self.signatures[ticker]
+                    self.signatures[ticker] = (n_rows + 1, last_date)
+
+        logger.info(f"Revised {last_date.date()} in universe statistics for {len(applied)} assets")
+        return applied
+
+    def _closes_row(self, closes: Dict[str, float]) -> Tuple[np.ndarray, List[str]]:
+        """Lay out a ticker -> close mapping as a universe row (NaN where absent)"""
+        row = np.full(len(self.tickers), np.nan)
+        applied = []
+        for ticker, close in closes.items():
+            position = self.returns.positions.get(ticker)
+            if position is not None:
+                row[position] = float(close)
+                applied.append(ticker)
+        return row, applied
@@ -8,6 +8,8 @@ import io
 import base64
 from typing import Dict, List, Tuple, Optional, Any
 
+from backend.returns_matrix import ReturnsMatrix
+
 logger = logging.getLogger(__name__)
 
 # Set matplotlib to use a non-interactive backend
@@ -49,18 +51,26 @@ class VisualizationDataGenerator:
                                  stock_data: Dict[str, pd.DataFrame],
                                  tickers: List[str],
                                  budget: float,
-                                 risk_free_rate: float) -> Dict[str, Any]:
+                                 risk_free_rate: float,
+                                 returns_matrix: Optional[ReturnsMatrix] = None) -> Dict[str, Any]:
         """Generate static images for all visualizations"""
         try:
+            # Share one date-aligned returns matrix between the heatmap and backtest
+            if returns_matrix is None:
+                returns_matrix = ReturnsMatrix.from_stock_data(
+                    {ticker: stock_data[ticker] for ticker in tickers if ticker in stock_data}
+                )
+            
             # Extract portfolios
-            all_portfolios = optimization_result['all_evaluated_portfolios']
+            # A bounded sample of the evaluated portfolios (always including the ranked ones)
+            all_portfolios = optimization_result['sampled_portfolios']
             qaoa_portfolios = optimization_result['qaoa_portfolios']
             classical_portfolios = optimization_result['classical_portfolios']
             top_portfolios = optimization_result['top_portfolios']
             
             # Generate static image visualizations
             correlation_matrix_image = self._generate_correlation_heatmap_image(
-                stock_data=stock_data,
+                returns_matrix=returns_matrix,
                 tickers=tickers
             )
             
@@ -93,7 +103,7 @@ class VisualizationDataGenerator:
             
             historical_backtest_image = self._generate_historical_backtest_image(
                 top_portfolios=top_portfolios,
-                stock_data=stock_data,
+                returns_matrix=returns_matrix,
                 tickers=tickers
             )
             
@@ -552,12 +562,14 @@ class VisualizationDataGenerator:
     
     def _generate_historical_backtest_image(self,
                                           top_portfolios: List[Dict[str, Any]],
-                                          stock_data: Dict[str, pd.DataFrame],
+                                          returns_matrix: ReturnsMatrix,
                                           tickers: List[str]) -> str:
         """Generate historical backtesting visualization as a static image"""
         try:
-            # Get common date range for all stocks
-            common_dates = self._get_common_dates(stock_data)
+            # Closes on the common date range for all stocks (last 252 trading days)
+            tickers = [ticker for ticker in tickers if ticker in returns_matrix.positions]
+            price_df = returns_matrix.common_closes(tickers, max_rows=252)
+            common_dates = price_df.index
             
             if len(common_dates) == 0:
                 logger.warning("No common dates found for backtesting")
@@ -568,14 +580,6 @@ class VisualizationDataGenerator:
                 ax.axis('off')
                 return self._fig_to_base64(fig)
             
-            # Create price dataframe with common dates
-            price_df = pd.DataFrame(index=common_dates)
-            for ticker in tickers:
-                if ticker in stock_data:
-                    df = stock_data[ticker]
-                    df = df.set_index('Date')
-                    price_df[ticker] = df.loc[common_dates, 'Close']
-            
             # Calculate portfolio values over time using actual historical data
             portfolio_values = {}
             initial_investment = 100000  # Start with ₹1,00,000
@@ -773,52 +777,17 @@ class VisualizationDataGenerator:
             ax.axis('off')
             return self._fig_to_base64(fig)
     
-    def _get_common_dates(self, stock_data: Dict[str, pd.DataFrame]) -> List[pd.Timestamp]:
-        """Get common dates across all stock data"""
-        try:
-            if not stock_data:
-                return []
-            
-            # Get dates for each stock
-            date_sets = []
-            for ticker, df in stock_data.items():
-                dates = pd.to_datetime(df['Date']).sort_values().tolist()
-                date_sets.append(set(dates))
-            
-            # Find common dates
-            common_dates = date_sets[0]
-            for date_set in date_sets[1:]:
-                common_dates = common_dates.intersection(date_set)
-            
-            # Sort dates
-            common_dates = sorted(list(common_dates))
-            
-            # Limit to last year (252 trading days) for backtesting
-            if len(common_dates) > 252:
-                common_dates = common_dates[-252:]
-            
-            return common_dates
-        
-        except Exception as e:
-            logger.error(f"Error getting common dates: {str(e)}")
-            return []
-    
-    def _generate_correlation_heatmap_image(self, stock_data: Dict[str, pd.DataFrame], tickers: List[str]) -> str:
+    def _generate_correlation_heatmap_image(self, returns_matrix: ReturnsMatrix, tickers: List[str]) -> str:
         """Generate correlation heatmap as a static image"""
         try:
             logger.info(f"Generating correlation matrix for {len(tickers)} stocks")
             
-            # Calculate returns for each stock
-            returns_data = {}
-            for ticker in tickers:
-                if ticker in stock_data:
-                    df = stock_data[ticker]
-                    if 'Close' in df.columns and len(df) > 1:
-                        # Calculate daily returns
-                        returns = df['Close'].pct_change().dropna()
-                        returns_data[ticker] = returns
-            
-            if len(returns_data) < 2:
+            # Use the stocks that have at least one daily return
+            tickers = [ticker for ticker in tickers
+                       if ticker in returns_matrix.positions
+                       and returns_matrix.mask[:, returns_matrix.positions[ticker]].any()]
+            
+            if len(tickers) < 2:
                 logger.warning("Insufficient data for correlation matrix")
                 # Create a simple error image
                 fig, ax = plt.subplots(figsize=(10, 8))
@@ -826,11 +795,9 @@ class VisualizationDataGenerator:
                 ax.axis('off')
                 return self._fig_to_base64(fig)
             
-            # Create DataFrame with returns
-            returns_df = pd.DataFrame(returns_data)
-            
-            # Calculate correlation matrix
-            correlation_matrix = returns_df.corr()
+            # Calculate pairwise-complete correlation matrix on the date-aligned returns
+            correlation_matrix = pd.DataFrame(returns_matrix.subset(tickers).corr(),
+                                              index=tickers, columns=tickers)
             
             # Fill NaN values with 0 (shouldn't happen with proper data)
             correlation_matrix = correlation_matrix.fillna(0)
@@ -0,0 +1,148 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, List, Tuple
+
+from backend.returns_matrix import ReturnsMatrix, TRADING_DAYS_PER_YEAR
+
+logger = logging.getLogger(__name__)
+
+
+class RollingWindowIndex:
+    """Prefix-sum index answering windowed mean/covariance queries in O(k^2)
+
+    Stores cumulative pair counts, cumulative per-pair sums of returns and
+    cumulative cross-products over the rows of a ReturnsMatrix. The statistics
+    of any [start, end) window over any k tickers are then differences of two
+    prefix rows, with the same pairwise-complete treatment of gaps as
+    ReturnsMatrix.cov().
+    """
+
+    def __init__(self, returns: ReturnsMatrix):
+        """
+        Build the prefix sums.
+
+        Args:
+            returns: Date-aligned returns matrix to index
+        """
+        self.returns = returns
+
+        values = returns.values
+        mask = returns.mask
+        weights = mask.astype(np.float64)
+
+        # Centre each column on its full-history mean so the prefix sums stay
+        # small; the shift is added back to windowed means
+        counts = weights.sum(axis=0)
+        self.shift = np.divide(np.nansum(values, axis=0), counts,
+                               out=np.zeros(values.shape[1]), where=counts > 0)
+        centred = np.where(mask, values - self.shift, 0.0)
+
+        # Prefix arrays keep spare capacity so appended rows cost O(N^2) amortized
+        n_rows, n_assets = values.shape
+        self.n_rows = n_rows
+        self._allocate(n_rows + max(16, n_rows // 4), n_assets)
+        np.cumsum(mask[:, :, None] & mask[:, None, :], axis=0, out=self.pair_counts[1:n_rows + 1])
+        np.cumsum(centred[:, :, None] * weights[:, None, :], axis=0, out=self.pair_sums[1:n_rows + 1])
+        np.cumsum(centred[:, :, None] * centred[:, None, :], axis=0, out=self.cross_sums[1:n_rows + 1])
+
+        # Last known close at or before each row, for window-end prices
+        self.filled_closes[:n_rows] = pd.DataFrame(returns.closes).ffill().to_numpy()
+
+        logger.info(f"Built rolling window index over {n_rows} trading dates for {n_assets} assets")
+
+    def _allocate(self, capacity: int, n_assets: int) -> None:
+        """(Re)allocate prefix arrays for capacity rows, keeping existing contents"""
+        old = getattr(self, 'pair_counts', None)
+        pair_counts = np.zeros((capacity + 1, n_assets, n_assets), dtype=np.int32)
+        pair_sums = np.zeros((capacity + 1, n_assets, n_assets))
+        cross_sums = np.zeros((capacity + 1, n_assets, n_assets))
+        filled_closes = np.full((capacity, n_assets), np.nan)
+        if old is not None:
+            rows = self.n_rows
+            pair_counts[:rows + 1] = self.pair_counts[:rows + 1]
+            pair_sums[:rows + 1] = self.pair_sums[:rows + 1]
+            cross_sums[:rows + 1] = self.cross_sums[:rows + 1]
+            filled_closes[:rows] = self.filled_closes[:rows]
+        self.pair_counts = pair_counts
+        self.pair_sums = pair_sums
+        self.cross_sums = cross_sums
+        self.filled_closes = filled_closes
+
+    def append(self, returns_row: np.ndarray, closes_row: np.ndarray) -> None:
+        """Extend the prefix sums by one row already appended to the returns matrix"""
+        n_assets = len(returns_row)
+        if self.n_rows + 1 > len(self.filled_closes):
+            self._allocate(2 * len(self.filled_closes), n_assets)
+
+        self._write_row(self.n_rows, returns_row, closes_row)
+        self.n_rows += 1
+
+    def revise_last(self, returns_row: np.ndarray, closes_row: np.ndarray) -> None:
+        """Rewrite the last prefix row after the returns matrix revised its last row"""
+        if self.n_rows == 0:
+            raise ValueError("Cannot revise an empty window index")
+        self._write_row(self.n_rows - 1, returns_row, closes_row)
+
+    def _write_row(self, row: int, returns_row: np.ndarray, closes_row: np.ndarray) -> None:
+        """Set prefix row row + 1 from prefix row row and one row of returns and closes"""
+        valid = ~np.isnan(returns_row)
+        centred = np.where(valid, returns_row - self.shift, 0.0)
+        self.pair_counts[row + 1] = self.pair_counts[row] + (valid[:, None] & valid[None, :])
+        self.pair_sums[row + 1] = self.pair_sums[row] + centred[:, None] * valid[None, :]
+        self.cross_sums[row + 1] = self.cross_sums[row] + centred[:, None] * centred[None, :]
+
+        previous = self.filled_closes[row - 1] if row > 0 else np.full(len(closes_row), np.nan)
+        self.filled_closes[row] = np.where(np.isnan(closes_row), previous, closes_row)
+
+    def resolve(self, start: Any = None, end: Any = None) -> Tuple[int, int]:
+        """
+        Convert a window specification to row bounds [lo, hi).
+
+        Integers are row positions with slice semantics (start=-63 selects the
+        last 63 trading days); anything else is parsed as a date, with start
+        inclusive and end exclusive.
+        """
+        lo = 0 if start is None else self._row(start)
+        hi = self.n_rows if end is None else self._row(end)
+        return lo, max(lo, hi)
+
+    def _row(self, value: Any) -> int:
+        """Row position of a window bound given as a row position or a date"""
+        if isinstance(value, (int, np.integer)):
+            return slice(value, None).indices(self.n_rows)[0]
+        dates = self.returns.dates[:self.n_rows]
+        return int(np.searchsorted(dates, np.datetime64(pd.Timestamp(value), 'ns'), side='left'))
+
+    def query(self,
+              tickers: List[str],
+              start: Any = None,
+              end: Any = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Windowed statistics for a ticker subset.
+
+        Args:
+            tickers: Tickers to include, in output order
+            start: Window start (row position or date, inclusive)
+            end: Window end (row position or date, exclusive)
+
+        Returns:
+            Tuple of annualized expected returns (k,), annualized covariance
+            matrix (k x k) and the latest close at the window end (k,)
+        """
+        lo, hi = self.resolve(start, end)
+        idx = self.returns.indices(tickers)
+        block = np.ix_(idx, idx)
+
+        counts = (self.pair_counts[hi][block] - self.pair_counts[lo][block]).astype(np.float64)
+        sums = self.pair_sums[hi][block] - self.pair_sums[lo][block]
+        cross = self.cross_sums[hi][block] - self.cross_sums[lo][block]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            own_counts = np.diag(counts)
+            expected_returns = (np.diag(sums) / own_counts + self.shift[idx]) * TRADING_DAYS_PER_YEAR
+            cov_matrix = (cross - sums * sums.T / counts) / (counts - 1) * TRADING_DAYS_PER_YEAR
+        cov_matrix[counts < 2] = np.nan
+
+        latest_prices = self.filled_closes[hi - 1, idx] if hi > 0 else np.full(len(idx), np.nan)
+        return expected_returns, cov_matrix, latest_prices
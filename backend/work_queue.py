@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueue(ABC):
+    """Queue of task descriptors shared by one coordinator and any number of workers
+
+    A job is a shared context plus a list of JSON-serializable tasks. Workers
+    claim tasks under a lease; a task whose worker reports a failure, or whose
+    lease runs out because the worker died, goes back to pending until it has
+    been attempted max_attempts times, after which it is marked failed.
+    Finished jobs stay stored until purged. Subclasses provide the storage.
+    """
+
+    def __init__(self, max_attempts: int = 3, lease_seconds: float = 600.0):
+        """
+        Initialize the queue.
+
+        Args:
+            max_attempts: Attempts per task before it is marked failed
+            lease_seconds: Time a worker may hold a task before it is handed out again
+        """
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+
+    @abstractmethod
+    def publish(self, job_id: str, context: Dict[str, Any], tasks: List[Dict[str, Any]]) -> None:
+        """Publish a job's shared context and its tasks"""
+        ...
+
+    @abstractmethod
+    def context(self, job_id: str) -> Dict[str, Any]:
+        """Shared context of a job"""
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Claim the next available task as {'job_id', 'task_id', 'payload'}, or None if there is none"""
+        ...
+
+    @abstractmethod
+    def complete(self, job_id: str, task_id: int, worker_id: str, result: Dict[str, Any]) -> None:
+        """Store the result of a claimed task"""
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: str, task_id: int, worker_id: str, error: str) -> None:
+        """Report a failed attempt of a claimed task"""
+        ...
+
+    @abstractmethod
+    def status(self, job_id: str) -> Dict[str, int]:
+        """Number of tasks of a job per state (pending, claimed, done, failed)"""
+        ...
+
+    @abstractmethod
+    def results(self, job_id: str) -> List[Dict[str, Any]]:
+        """Results of a job's completed tasks"""
+        ...
+
+    @abstractmethod
+    def errors(self, job_id: str) -> Dict[int, str]:
+        """Last error of each failed task of a job"""
+        ...
+
+    @abstractmethod
+    def purge(self, job_id: str) -> None:
+        """Delete a job with its tasks and results"""
+        ...
+
+    @abstractmethod
+    def purge_finished(self, older_than: float) -> int:
+        """
+        Delete every job published more than older_than seconds ago with no task left pending or claimed.
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        ...
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue stored in a SQLite database file
+
+    Claims run in IMMEDIATE transactions, so workers on one machine, or on
+    several machines sharing the file over a filesystem with working locks,
+    never receive the same task twice under a live lease.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            context TEXT NOT NULL,
+            created REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            job_id TEXT NOT NULL,
+            task_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            lease_until REAL,
+            result TEXT,
+            error TEXT,
+            PRIMARY KEY (job_id, task_id)
+        );
+        CREATE INDEX IF NOT EXISTS tasks_by_state ON tasks (state, lease_until);
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, lease_seconds: float = 600.0):
+        """
+        Open (and create if needed) the queue database.
+
+        Args:
+            path: Path of the SQLite database file
+            max_attempts: Attempts per task before it is marked failed
+            lease_seconds: Time a worker may hold a task before it is handed out again
+        """
+        super().__init__(max_attempts, lease_seconds)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection in autocommit mode; callers open transactions explicitly"""
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database lock from the start"""
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+    def publish(self, job_id: str, context: Dict[str, Any], tasks: List[Dict[str, Any]]) -> None:
+        with self._transaction() as connection:
+            connection.execute('INSERT INTO jobs (job_id, context, created) VALUES (?, ?, ?)',
+                               (job_id, json.dumps(context), time.time()))
+            connection.executemany('INSERT INTO tasks (job_id, task_id, payload) VALUES (?, ?, ?)',
+                                   [(job_id, task_id, json.dumps(task)) for task_id, task in enumerate(tasks)])
+        logger.info(f"Published job {job_id} with {len(tasks)} tasks to {self.path}")
+
+    def context(self, job_id: str) -> Dict[str, Any]:
+        with self._connect() as connection:
+            row = connection.execute('SELECT context FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown job {job_id}")
+        return json.loads(row[0])
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._transaction() as connection:
+            # Tasks whose worker vanished with the last allowed attempt have failed
+            connection.execute(
+                "UPDATE tasks SET state = 'failed', error = COALESCE(error, 'lease expired') "
+                "WHERE state = 'claimed' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts))
+            row = connection.execute(
+                "SELECT job_id, task_id, payload FROM tasks "
+                "WHERE state = 'pending' OR (state = 'claimed' AND lease_until < ?) "
+                "ORDER BY job_id, task_id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            job_id, task_id, payload = row
+            connection.execute(
+                "UPDATE tasks SET state = 'claimed', attempts = attempts + 1, worker = ?, lease_until = ? "
+                "WHERE job_id = ? AND task_id = ?",
+                (worker_id, now + self.lease_seconds, job_id, task_id))
+        return {'job_id': job_id, 'task_id': task_id, 'payload': json.loads(payload)}
+
+    def complete(self, job_id: str, task_id: int, worker_id: str, result: Dict[str, Any]) -> None:
+        with self._transaction() as connection:
+            # A worker whose lease was handed to another worker no longer owns the task
+            connection.execute(
+                "UPDATE tasks SET state = 'done', result = ?, lease_until = NULL "
+                "WHERE job_id = ? AND task_id = ? AND state = 'claimed' AND worker = ?",
+                (json.dumps(result), job_id, task_id, worker_id))
+
+    def fail(self, job_id: str, task_id: int, worker_id: str, error: str) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_until = NULL "
+                "WHERE job_id = ? AND task_id = ? AND state = 'claimed' AND worker = ?",
+                (self.max_attempts, error, job_id, task_id, worker_id))
+
+    def status(self, job_id: str) -> Dict[str, int]:
+        counts = {'pending': 0, 'claimed': 0, 'done': 0, 'failed': 0}
+        with self._connect() as connection:
+            for state, count in connection.execute(
+                    'SELECT state, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY state', (job_id,)):
+                counts[state] = count
+        return counts
+
+    def results(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT result FROM tasks WHERE job_id = ? AND state = 'done' ORDER BY task_id", (job_id,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def errors(self, job_id: str) -> Dict[int, str]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT task_id, error FROM tasks WHERE job_id = ? AND state = 'failed'", (job_id,)).fetchall()
+        return {task_id: error for task_id, error in rows}
+
+    def purge(self, job_id: str) -> None:
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM tasks WHERE job_id = ?', (job_id,))
+            connection.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+
+    def purge_finished(self, older_than: float) -> int:
+        with self._transaction() as connection:
+            job_ids = [row[0] for row in connection.execute(
+                "SELECT job_id FROM jobs WHERE created < ? AND NOT EXISTS ("
+                "SELECT 1 FROM tasks WHERE tasks.job_id = jobs.job_id AND state IN ('pending', 'claimed'))",
+                (time.time() - older_than,))]
+            connection.executemany('DELETE FROM tasks WHERE job_id = ?', [(job_id,) for job_id in job_ids])
+            connection.executemany('DELETE FROM jobs WHERE job_id = ?', [(job_id,) for job_id in job_ids])
+        if job_ids:
+            logger.info(f"Purged {len(job_ids)} finished jobs from {self.path}")
+        return len(job_ids)
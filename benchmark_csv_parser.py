@@ -0,0 +1,66 @@
+"""Compare the vectorized CSV parser with the pandas read_csv path over every file in data/"""
+import os
+import sys
+import time
+import logging
+
+import pandas as pd
+
+from backend.csv_parser import parse_price_csv
+from backend.data_manager import DataManager
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def parse_with_pandas(data_manager, file_path, ticker):
+    return data_manager._read_csv_with_pandas(file_path, ticker)
+
+
+def parse_with_numpy(data_manager, file_path, ticker):
+    return data_manager._parse_csv(file_path, ticker)
+
+
+def time_parser(parser, data_manager, files, repeats):
+    """Best-of-repeats wall time in seconds to parse every file once"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for ticker, file_path in files:
+            parser(data_manager, file_path, ticker)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, 'data')
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    data_manager = DataManager(data_dir=data_dir)
+    files = []
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith('.csv'):
+            continue
+        ticker, file_path = os.path.splitext(name)[0], os.path.join(data_dir, name)
+        if parse_price_csv(file_path) is None:
+            print(f"{ticker}: not in the fast-parser layout, skipped")
+            continue
+        try:
+            expected = parse_with_pandas(data_manager, file_path, ticker)
+        except Exception as e:
+            print(f"{ticker}: pandas path failed ({e}), skipped")
+            continue
+        actual = parse_with_numpy(data_manager, file_path, ticker)
+        # Dtypes may differ in the datetime unit (pandas >= 3 infers it), so only values are compared
+        try:
+            pd.testing.assert_frame_equal(actual[['Date', 'Close']], expected[['Date', 'Close']],
+                                          check_dtype=False, check_exact=True)
+        except AssertionError as e:
+            raise AssertionError(f"Parsers disagree on {ticker}: {e}") from None
+        files.append((ticker, file_path))
+
+    pandas_time = time_parser(parse_with_pandas, data_manager, files, repeats)
+    numpy_time = time_parser(parse_with_numpy, data_manager, files, repeats)
+    print(f"Parsed {len(files)} files (best of {repeats}); outputs identical")
+    print(f"pandas read_csv: {pandas_time * 1000:8.1f} ms")
+    print(f"numpy parser:    {numpy_time * 1000:8.1f} ms  ({pandas_time / numpy_time:.1f}x faster)")
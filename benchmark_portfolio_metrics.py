@@ -0,0 +1,89 @@
+"""Compare the batched portfolio metrics engine with the per-portfolio loop at N = 10, 15 and 20"""
+import os
+import sys
+import time
+import logging
+
+import numpy as np
+
+from backend.candidate_space import enumerate_subset_masks, mask_to_indices
+from backend.data_manager import DataManager
+from backend.optimizer import PortfolioOptimizer
+from backend.portfolio_metrics import PortfolioMetricsEngine
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# The loop is timed on at most this many candidates and extrapolated
+LOOP_SAMPLE = 20000
+
+
+def evaluate_with_loop(selection, expected_returns, covariance_matrix, prices, risk_free_rate, qubo_matrix):
+    """The per-portfolio evaluation that PortfolioMetricsEngine replaces"""
+    selected_prices = prices * selection
+    total_cost = np.sum(selected_prices)
+    weights = selected_prices / total_cost if total_cost > 0 else np.zeros_like(selected_prices)
+    if np.sum(weights) > 0:
+        weights = weights / np.sum(weights)
+    weights_sum = np.sum(weights)
+    if weights_sum > 0 and weights_sum < 1.0:
+        remaining_allocation = 1.0 - weights_sum
+        sorted_indices = sorted(np.where(weights > 0)[0], key=lambda i: expected_returns[i], reverse=True)
+        high_return_count = max(1, len(sorted_indices) // 3)
+        for i in range(high_return_count):
+            weights[sorted_indices[i]] += (remaining_allocation * 0.6) / high_return_count
+        low_return_indices = sorted_indices[high_return_count:]
+        if len(low_return_indices) > 0:
+            for i in low_return_indices:
+                weights[i] += (remaining_allocation * 0.4) / len(low_return_indices)
+        else:
+            for i in range(high_return_count):
+                weights[sorted_indices[i]] += (remaining_allocation * 0.4) / high_return_count
+    portfolio_return = np.sum(expected_returns * weights)
+    portfolio_risk = np.sqrt(weights.T @ covariance_matrix @ weights)
+    if portfolio_risk < 1e-8:
+        sharpe_ratio = 0.0 if portfolio_return <= risk_free_rate else 1000.0
+    else:
+        sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_risk
+    qubo_value = selection.T @ qubo_matrix @ selection
+    return weights, portfolio_return, portfolio_risk, sharpe_ratio, total_cost, qubo_value
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, 'data')
+
+    data_manager = DataManager(data_dir=data_dir)
+    stock_data = data_manager.load_stock_data(data_manager.get_available_stocks())
+    optimizer = PortfolioOptimizer()
+
+    for n_assets in (10, 15, 20):
+        tickers = list(stock_data.keys())[:n_assets]
+        expected_returns, covariance_matrix, prices = data_manager.compute_financial_metrics(
+            {ticker: stock_data[ticker] for ticker in tickers})
+        qubo_matrix = optimizer._build_qubo_model(expected_returns, covariance_matrix, prices,
+                                                  100000.0, 0.5, 1.0, 1.0)
+        engine = PortfolioMetricsEngine(expected_returns, covariance_matrix, prices, 0.07, qubo_matrix)
+        masks = enumerate_subset_masks(n_assets)
+
+        start = time.perf_counter()
+        metrics = engine.evaluate(masks)
+        engine_time = time.perf_counter() - start
+
+        sample = masks[np.linspace(0, len(masks) - 1, min(LOOP_SAMPLE, len(masks))).astype(int)]
+        positions = np.searchsorted(masks, sample)
+        start = time.perf_counter()
+        for k, mask in zip(positions, sample):
+            selection = np.zeros(n_assets, dtype=int)
+            selection[mask_to_indices(mask)] = 1
+            weights, ret, risk, sharpe, cost, qubo_value = evaluate_with_loop(
+                selection, expected_returns, covariance_matrix, prices, 0.07, qubo_matrix)
+            if not (np.array_equal(weights, metrics['weights'][k]) and ret == metrics['return'][k]
+                    and cost == metrics['cost'][k] and np.isclose(risk, metrics['risk'][k], rtol=1e-12)
+                    and np.isclose(sharpe, metrics['sharpe'][k], rtol=1e-12)
+                    and np.isclose(qubo_value, metrics['qubo_value'][k], rtol=1e-12)):
+                raise AssertionError(f"Engine and loop disagree on portfolio {mask_to_indices(mask)}")
+        loop_rate = len(sample) / (time.perf_counter() - start)
+        engine_rate = len(masks) / engine_time
+
+        print(f"N={n_assets:2d}: {len(masks):8d} candidates | loop {loop_rate:10.0f}/s | "
+              f"engine {engine_rate:12.0f}/s ({engine_rate / loop_rate:.0f}x)")
@@ -0,0 +1,43 @@
+"""Speedup of the sharded exhaustive scan from 1 worker process up to every CPU"""
+import os
+import sys
+import logging
+
+from backend.candidate_space import conflict_masks
+from backend.data_manager import DataManager
+from backend.optimizer import PortfolioOptimizer
+from backend.sharded_scan import sharded_scan
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# Universe size scanned (2^N - 1 subsets)
+N_ASSETS = 22
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, 'data')
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+
+    data_manager = DataManager(data_dir=data_dir)
+    tickers = data_manager.get_available_stocks()[:N_ASSETS]
+    stock_data = data_manager.load_stock_data(tickers)
+    expected_returns, covariance_matrix, prices = data_manager.compute_financial_metrics(stock_data)
+    optimizer = PortfolioOptimizer()
+    qubo_matrix = optimizer._build_qubo_model(expected_returns, covariance_matrix, prices,
+                                              100000.0, 0.5, 1.0, 1.0)
+    conflicts = conflict_masks(optimizer._compute_correlation_matrix(covariance_matrix), 0.8)
+
+    baseline = None
+    reference = None
+    print(f"N={len(expected_returns)}: {(1 << len(expected_returns)) - 1} subsets")
+    for n_workers in range(1, max_workers + 1):
+        result = sharded_scan(qubo_matrix, expected_returns, covariance_matrix, prices, 0.07,
+                              conflicts, 2, n_workers=n_workers)
+        portfolios = [portfolio['selected_indices'] for portfolio in result['portfolios']]
+        if reference is None:
+            reference = portfolios
+        elif portfolios != reference:
+            raise AssertionError(f"{n_workers} workers found different top portfolios")
+        baseline = baseline or result['elapsed_sec']
+        print(f"{n_workers:3d} workers: {result['elapsed_sec']:8.2f} s | speedup {baseline / result['elapsed_sec']:5.2f}x")
@@ -373,6 +373,48 @@ function initializeOptimizer() {
 
     // Initialize slider feedback
     initializeSliderFeedback();
+
+    // Cap the asset counts while an exhaustive backend is selected
+    initializeBackendLimits();
+}
+
+// Backends that enumerate every subset, and the largest basket the server accepts for them
+const EXHAUSTIVE_BACKENDS = ['Exact Solver (Gray Code)', 'Exhaustive Scan (Sharded)'];
+const EXHAUSTIVE_MAX_ASSETS = 25;
+const DEFAULT_MAX_ASSETS = 30;
+
+function initializeBackendLimits() {
+    const backendSelect = document.getElementById('backend');
+    const minAssetsSlider = document.getElementById('min-assets');
+    const maxAssetsInput = document.getElementById('max-assets');
+    const minAssetsMaxLabel = document.getElementById('min-assets-max');
+
+    if (!backendSelect || !minAssetsSlider) {
+        return;
+    }
+
+    function applyBackendLimits() {
+        const limit = EXHAUSTIVE_BACKENDS.includes(backendSelect.value) ? EXHAUSTIVE_MAX_ASSETS : DEFAULT_MAX_ASSETS;
+
+        minAssetsSlider.max = limit;
+        if (parseInt(minAssetsSlider.value) > limit) {
+            minAssetsSlider.value = limit;
+        }
+        updateSliderDisplay(minAssetsSlider);
+        if (minAssetsMaxLabel) {
+            minAssetsMaxLabel.textContent = limit;
+        }
+
+        if (maxAssetsInput) {
+            maxAssetsInput.max = limit;
+            if (parseInt(maxAssetsInput.value) > limit) {
+                maxAssetsInput.value = limit;
+            }
+        }
+    }
+
+    backendSelect.addEventListener('change', applyBackendLimits);
+    applyBackendLimits();
 }
 
 function initializeOptimizationObjective() {
@@ -465,6 +507,7 @@ function runOptimizationWithStreaming() {
         return_weight: parseFloat(document.getElementById('return-weight').value) || 1.0,
         budget_penalty: parseFloat(document.getElementById('budget-penalty').value) || 1.0,
         min_assets: parseInt(document.getElementById('min-assets').value) || 2,
+        max_assets: parseInt(document.getElementById('max-assets').value) || null,
         min_assets_penalty: parseFloat(document.getElementById('min-assets-penalty').value) || 1.0,
         correlation_threshold: parseFloat(document.getElementById('correlation-threshold').value) || 0.8,
         reps: parseInt(document.getElementById('qaoa-layers').value) || 3,
@@ -1089,6 +1132,7 @@ async function runOptimizationAPI(params) {
             return_weight: parseFloat(document.getElementById('return-weight').value) || 1.0,
             budget_penalty: parseFloat(document.getElementById('budget-penalty').value) || 1.0,
             min_assets: parseInt(document.getElementById('min-assets').value) || 2,
+            max_assets: parseInt(document.getElementById('max-assets').value) || null,
             min_assets_penalty: parseFloat(document.getElementById('min-assets-penalty').value) || 1.0,
             correlation_threshold: parseFloat(document.getElementById('correlation-threshold').value) || 0.8,
             reps: parseInt(document.getElementById('qaoa-layers').value) || 3,
@@ -0,0 +1,18 @@
+"""Build or refresh the binary price store and shared price panel from the CSV files in data/"""
+import os
+import sys
+import logging
+
+from backend.data_manager import DataManager
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, 'data')
+
+    data_manager = DataManager(data_dir=data_dir)
+    row_counts = data_manager.build_price_store()
+    print(f"Ingested {len(row_counts)} tickers into {os.path.join(data_dir, '.store')}")
+    n_tickers = data_manager.build_price_panel()
+    print(f"Wrote price panel for {n_tickers} tickers to {data_manager.panel_path}")
@@ -0,0 +1,62 @@
+"""Publish an exhaustive scan to a shared SQLite work queue and merge the results (see backend/distributed_scan.py)"""
+import os
+import sys
+import logging
+
+from backend.candidate_space import conflict_masks
+from backend.data_manager import DataManager
+from backend.distributed_scan import ScanCoordinator
+from backend.optimizer import PortfolioOptimizer
+from backend.work_queue import SQLiteWorkQueue
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# Finished jobs older than this are purged before a new job is published
+FINISHED_JOB_RETENTION_HOURS = 24.0
+
+USAGE = ("Usage: python scan_coordinator.py <queue.sqlite> scan <TICKER,TICKER,...> [max_assets]\n"
+         "       python scan_coordinator.py <queue.sqlite> purge [retention_hours]")
+
+
+def scan(queue: SQLiteWorkQueue, tickers, max_assets):
+    """Publish a scan of the tickers with the optimizer's default parameters, wait for it and print the top portfolios"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_manager = DataManager(data_dir=os.path.join(base_dir, 'data'))
+    stock_data = data_manager.load_stock_data(tickers)
+    expected_returns, covariance_matrix, prices = data_manager.compute_financial_metrics(stock_data)
+    # Tickers without enough data are dropped; indices refer to the loaded ones
+    tickers = list(stock_data.keys())
+    optimizer = PortfolioOptimizer()
+    qubo_matrix = optimizer._build_qubo_model(expected_returns, covariance_matrix, prices,
+                                              100000.0, 0.5, 1.0, 1.0)
+    conflicts = conflict_masks(optimizer._compute_correlation_matrix(covariance_matrix), 0.8)
+
+    coordinator = ScanCoordinator(queue)
+    job_id = coordinator.submit(qubo_matrix, expected_returns, covariance_matrix, prices, 0.07,
+                                conflicts, 2, max_assets=max_assets)
+    print(f"Published job {job_id}; start workers with: python scan_worker.py {queue.path}")
+    result = coordinator.wait(job_id)
+
+    print(f"{result['feasible_count']} feasible portfolios over {result['shards']} shards "
+          f"in {result['elapsed_sec']:.1f} s")
+    print(f"Best QUBO energy: {result['best_energy']}")
+    for rank, portfolio in enumerate(result['portfolios'], 1):
+        print(f"  {rank:3d}. {', '.join(tickers[i] for i in portfolio['selected_indices'])}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[2] not in ('scan', 'purge'):
+        print(USAGE)
+        sys.exit(1)
+
+    queue = SQLiteWorkQueue(sys.argv[1])
+    if sys.argv[2] == 'purge':
+        retention_hours = float(sys.argv[3]) if len(sys.argv) > 3 else FINISHED_JOB_RETENTION_HOURS
+        print(f"Purged {queue.purge_finished(retention_hours * 3600)} finished jobs")
+        sys.exit(0)
+
+    if len(sys.argv) < 4:
+        print(USAGE)
+        sys.exit(1)
+    queue.purge_finished(FINISHED_JOB_RETENTION_HOURS * 3600)
+    scan(queue, sys.argv[3].split(','), int(sys.argv[4]) if len(sys.argv) > 4 else None)
@@ -0,0 +1,18 @@
+"""Run a scan worker against a shared SQLite work queue (see backend/distributed_scan.py)"""
+import sys
+import logging
+
+from backend.distributed_scan import ScanWorker
+from backend.work_queue import SQLiteWorkQueue
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python scan_worker.py <queue.sqlite> [idle_timeout_seconds]")
+        sys.exit(1)
+
+    idle_timeout = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    worker = ScanWorker(SQLiteWorkQueue(sys.argv[1]))
+    processed = worker.run(idle_timeout=idle_timeout)
+    print(f"Worker {worker.worker_id} processed {processed} shards")
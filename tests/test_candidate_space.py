@@ -0,0 +1,86 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from backend.candidate_space import (PortfolioIndex, conflict_masks, enumerate_independent_sets,
+                                     indices_to_mask, layer_ranges, unrank_combinations)
+
+
+def random_correlation(n_assets, seed):
+    """Correlation matrix of random factor returns, with enough strong pairs to prune"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(size=(200, 3)) @ rng.normal(size=(3, n_assets)) + 0.5 * rng.normal(size=(200, n_assets))
+    return np.corrcoef(returns, rowvar=False)
+
+
+def brute_force_independent_sets(correlation_matrix, threshold, min_assets, max_assets=None):
+    """Sorted masks of every subset with min..max members and no pair above the threshold"""
+    n_assets = len(correlation_matrix)
+    max_assets = n_assets if max_assets is None else max_assets
+    masks = []
+    for size in range(max(min_assets, 1), max_assets + 1):
+        for combo in itertools.combinations(range(n_assets), size):
+            if all(abs(correlation_matrix[i, j]) <= threshold for i, j in itertools.combinations(combo, 2)):
+                masks.append(indices_to_mask(list(combo)))
+    return sorted(masks)
+
+
+@pytest.mark.parametrize('n_assets, threshold, min_assets, max_assets, seed', [
+    (6, 0.5, 1, None, 0),
+    (8, 0.4, 2, None, 1),
+    (10, 0.5, 3, 5, 2),
+    (12, 0.3, 2, 4, 3),
+    (9, 1.0, 4, 4, 4),
+])
+def test_independent_sets_match_brute_force(n_assets, threshold, min_assets, max_assets, seed):
+    correlation_matrix = random_correlation(n_assets, seed)
+    conflicts = conflict_masks(correlation_matrix, threshold)
+
+    masks = enumerate_independent_sets(conflicts, n_assets, min_assets, max_assets)
+
+    assert masks.tolist() == brute_force_independent_sets(correlation_matrix, threshold, min_assets, max_assets)
+
+
+@pytest.mark.parametrize('n_assets', [8, PortfolioIndex.BITMAP_MAX_ASSETS + 2])
+def test_portfolio_index_membership(n_assets):
+    rng = np.random.default_rng(n_assets)
+    universe = 1 << n_assets
+    members = set(rng.integers(1, universe, 50).tolist())
+    index = PortfolioIndex(np.array(sorted(members), dtype=np.uint64), n_assets)
+    queries = np.array(sorted(members) + rng.integers(1, universe, 200).tolist(), dtype=np.uint64)
+
+    assert len(index) == len(members)
+    assert index.contains(queries).tolist() == [int(mask) in members for mask in queries]
+    assert all((int(mask) in index) == (int(mask) in members) for mask in queries)
+    assert universe not in index
+
+
+def colex_combinations(n_assets, size):
+    """Masks of the size-k subsets from itertools.combinations, in colex (ascending mask) order"""
+    return sorted(indices_to_mask(list(combo)) for combo in itertools.combinations(range(n_assets), size))
+
+
+@pytest.mark.parametrize('n_assets, size', [(1, 1), (6, 3), (10, 1), (10, 4), (12, 12), (20, 3)])
+def test_unrank_combinations_matches_itertools(n_assets, size):
+    expected = colex_combinations(n_assets, size)
+    assert len(expected) == math.comb(n_assets, size)
+
+    assert unrank_combinations(n_assets, size, 0, len(expected)).tolist() == expected
+    # Any rank range can be produced on its own
+    start, stop = len(expected) // 3, min(len(expected) // 3 + 5, len(expected))
+    assert unrank_combinations(n_assets, size, start, stop).tolist() == expected[start:stop]
+
+
+@pytest.mark.parametrize('n_assets, min_assets, max_assets, chunk_size', [
+    (8, 2, 4, 10), (10, 1, 10, 7), (12, 3, 3, 1000), (9, 0, 2, 4),
+])
+def test_layer_ranges_cover_every_allowed_subset_once(n_assets, min_assets, max_assets, chunk_size):
+    ranges = layer_ranges(n_assets, min_assets, max_assets, chunk_size)
+
+    masks = [mask for size, start, stop in ranges for mask in unrank_combinations(n_assets, size, start, stop).tolist()]
+    expected = [mask for size in range(max(min_assets, 1), max_assets + 1)
+                for mask in colex_combinations(n_assets, size)]
+    assert masks == expected
+    assert all(0 < stop - start <= chunk_size for _, start, stop in ranges)
@@ -0,0 +1,123 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from backend.candidate_space import selections_to_masks
+from backend.classical_solvers import annealing_search, branch_and_bound_search, gray_code_search, tabu_search
+
+
+def random_instance(n_assets, seed, conflict_density=0.3):
+    """Random QUBO with a negative linear part and a symmetric conflict graph"""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n_assets, n_assets))
+    qubo_matrix = factors @ factors.T / n_assets - np.diag(rng.uniform(0.5, 2.0, n_assets))
+    conflicts = np.triu(rng.random((n_assets, n_assets)) < conflict_density, 1)
+    return qubo_matrix, conflicts | conflicts.T
+
+
+def brute_force(qubo_matrix, conflicts, min_assets, max_assets=None):
+    """Energies of every feasible selection, lowest first, as (energy, selected indices)"""
+    n_assets = len(qubo_matrix)
+    max_assets = n_assets if max_assets is None else max_assets
+    solutions = []
+    for bits in itertools.product([0, 1], repeat=n_assets):
+        x = np.array(bits, dtype=np.float64)
+        indices = tuple(np.flatnonzero(x))
+        if not min_assets <= len(indices) <= max_assets:
+            continue
+        if any(conflicts[i, j] for i, j in itertools.combinations(indices, 2)):
+            continue
+        solutions.append((float(x @ qubo_matrix @ x), indices))
+    return sorted(solutions)
+
+
+def assert_feasible(portfolios, conflicts, min_assets, max_assets):
+    for portfolio in portfolios:
+        indices = portfolio['selected_indices']
+        assert min_assets <= len(indices) <= max_assets
+        assert not any(conflicts[i, j] for i, j in itertools.combinations(indices, 2))
+
+
+@pytest.mark.parametrize('n_assets, min_assets, max_assets, seed', [
+    (5, 2, 2, 0),
+    (16, 2, 2, 1),
+    (6, 3, None, 2),
+    (10, 3, 3, 3),
+    (12, 2, 5, 4),
+])
+def test_tabu_search_matches_brute_force(n_assets, min_assets, max_assets, seed):
+    qubo_matrix, conflicts = random_instance(n_assets, seed)
+    expected = brute_force(qubo_matrix, conflicts, min_assets, max_assets)
+    assert expected
+
+    result = tabu_search(qubo_matrix, conflicts, min_assets, max_assets, iterations=5000, seed=seed)
+
+    assert result['best_energy'] == pytest.approx(expected[0][0])
+    assert_feasible(result['portfolios'], conflicts, min_assets, max_assets or n_assets)
+
+
+def test_tabu_search_escapes_small_maximal_sets():
+    # Asset 0 conflicts with everything and is by far the cheapest, so the greedy
+    # start is the maximal set {0}, below min_assets
+    qubo_matrix = np.diag([-10.0, -1.0, -1.0, -1.0, -1.0, -1.0])
+    conflicts = np.zeros((6, 6), dtype=bool)
+    conflicts[0, 1:] = conflicts[1:, 0] = True
+    expected = brute_force(qubo_matrix, conflicts, 3)
+
+    result = tabu_search(qubo_matrix, conflicts, 3, iterations=500, seed=0)
+
+    assert result['best_energy'] == pytest.approx(expected[0][0])
+
+
+@pytest.mark.parametrize('n_assets, min_assets, max_assets, block_bits, seed', [
+    (6, 1, None, 16, 0),
+    (9, 2, 4, 3, 1),
+    (12, 3, None, 5, 2),
+    (10, 2, 2, 4, 3),
+])
+def test_gray_code_search_matches_brute_force(n_assets, min_assets, max_assets, block_bits, seed):
+    qubo_matrix, conflicts = random_instance(n_assets, seed)
+    expected = brute_force(qubo_matrix, conflicts, min_assets, max_assets)
+
+    result = gray_code_search(qubo_matrix, selections_to_masks(conflicts), min_assets, max_assets,
+                              top_k=10, block_bits=block_bits)
+
+    assert result['feasible_count'] == len(expected)
+    assert result['best_energy'] == pytest.approx(expected[0][0])
+    assert [tuple(portfolio['selected_indices']) for portfolio in result['portfolios']] == \
+        [indices for _, indices in expected[:10]]
+
+
+@pytest.mark.parametrize('n_assets, min_assets, max_assets, seed', [
+    (6, 1, None, 0),
+    (10, 2, 4, 1),
+    (12, 3, None, 2),
+    (11, 2, 2, 3),
+])
+def test_branch_and_bound_search_matches_brute_force(n_assets, min_assets, max_assets, seed):
+    qubo_matrix, conflicts = random_instance(n_assets, seed)
+    expected = brute_force(qubo_matrix, conflicts, min_assets, max_assets)
+
+    result = branch_and_bound_search(qubo_matrix, conflicts, min_assets, max_assets, top_k=5)
+
+    assert result['proven_optimal']
+    assert result['best_energy'] == pytest.approx(expected[0][0])
+    assert [tuple(portfolio['selected_indices']) for portfolio in result['portfolios']] == \
+        [indices for _, indices in expected[:5]]
+
+
+@pytest.mark.parametrize('tempering', [False, True])
+def test_annealing_search_returns_feasible_portfolios(tempering):
+    qubo_matrix, conflicts = random_instance(10, 5)
+    expected = brute_force(qubo_matrix, conflicts, 3, 5)
+    feasible_energies = {indices: energy for energy, indices in expected}
+
+    result = annealing_search(qubo_matrix, conflicts, 3, 5, n_replicas=16, sweeps=200,
+                              tempering=tempering, seed=0)
+
+    assert result['portfolios']
+    assert_feasible(result['portfolios'], conflicts, 3, 5)
+    energies = [feasible_energies[tuple(portfolio['selected_indices'])] for portfolio in result['portfolios']]
+    assert result['best_energy'] == pytest.approx(min(energies))
+    assert result['best_energy'] >= expected[0][0] - 1e-9
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+from backend.csv_parser import parse_price_csv
+from backend.data_manager import DataManager
+from backend.frame_cache import FrameCache
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+CSV_FILES = sorted(name for name in os.listdir(DATA_DIR) if name.endswith('.csv'))
+
+
+def read_with_pandas(file_path):
+    """Reference Date/Close frame read by pandas, independent of the header's spacing and case"""
+    df = pd.read_csv(file_path, thousands=',', encoding='utf-8-sig')
+    df.columns = [column.strip().capitalize() for column in df.columns]
+    df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y')
+    df['Close'] = pd.to_numeric(df['Close'], errors='coerce')
+    return df[['Date', 'Close']].dropna(subset=['Close']).sort_values('Date').reset_index(drop=True)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return DataManager(data_dir=str(tmp_path), store_dir=str(tmp_path / 'store'), frame_cache=FrameCache(),
+                       load_executor=None, price_log_path=str(tmp_path / 'prices.log'), panel_path='')
+
+
+@pytest.mark.parametrize('name', CSV_FILES)
+def test_fast_parser_matches_pandas_on_data_files(manager, name):
+    file_path = os.path.join(DATA_DIR, name)
+
+    assert parse_price_csv(file_path) is not None
+    parsed = manager._parse_csv(file_path, name[:-4])
+
+    # Only values are compared; pandas >= 3 may pick another datetime unit
+    pd.testing.assert_frame_equal(parsed[['Date', 'Close']], read_with_pandas(file_path),
+                                  check_dtype=False, check_exact=True)
+
+
+@pytest.mark.parametrize('header', ['Date ,Close ', 'Date,Close', ' date , CLOSE '])
+def test_fast_parser_accepts_header_whitespace_and_case(tmp_path, header):
+    file_path = tmp_path / 'AAA.csv'
+    file_path.write_text('﻿' + header + '\n13-09-2024,"1,234.50"\n12-09-2024,1230\n', encoding='utf-8')
+
+    parsed = parse_price_csv(str(file_path))
+
+    assert parsed is not None
+    assert parsed['Date'].tolist() == [pd.Timestamp('2024-09-13'), pd.Timestamp('2024-09-12')]
+    assert parsed['Close'].tolist() == [1234.5, 1230.0]
+
+
+@pytest.mark.parametrize('contents', [
+    # Extra column
+    'Date ,Open ,Close \n13-09-2024,"1,200.00","1,234.50"\n02-09-2024,"1,190.00","1,230.00"\n',
+    # Header without trailing spaces and dates with single-digit days
+    'Date,Close\n2-9-2024,"1,230.00"\n13-9-2024,"1,234.50"\n',
+])
+def test_fallback_parses_layouts_the_fast_parser_rejects(manager, tmp_path, contents):
+    file_path = tmp_path / 'AAA.csv'
+    file_path.write_text('﻿' + contents, encoding='utf-8')
+    assert parse_price_csv(str(file_path)) is None
+
+    parsed = manager._parse_csv(str(file_path), 'AAA')
+
+    # Dates are read day first and sorted
+    assert parsed['Date'].tolist() == [pd.Timestamp('2024-09-02'), pd.Timestamp('2024-09-13')]
+    assert parsed['Close'].tolist() == [1230.0, 1234.5]
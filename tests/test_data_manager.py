@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pandas as pd
+
+from backend.data_manager import DataManager
+from backend.frame_cache import FrameCache
+from backend.price_log import PriceLog
+from backend.returns_matrix import ReturnsMatrix
+
+
+def write_csv(data_dir, ticker, closes, start='2024-01-01'):
+    """Write a ticker CSV in the data/ layout (DD-MM-YYYY, quoted thousands, newest first)"""
+    dates = pd.bdate_range(start, periods=len(closes))
+    lines = ['﻿Date ,Close ']
+    for date, close in reversed(list(zip(dates, closes))):
+        lines.append(f'{date.strftime("%d-%m-%Y")},"{close:,.2f}"')
+    (data_dir / f'{ticker}.csv').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return dates
+
+
+def make_manager(tmp_path, name, log_path):
+    """DataManager over tmp_path/data with its own store and cache, sharing one price log"""
+    return DataManager(
+        data_dir=str(tmp_path / 'data'),
+        store_dir=str(tmp_path / name),
+        frame_cache=FrameCache(),
+        load_executor=None,
+        price_log_path=str(log_path),
+        panel_path=''
+    )
+
+
+def test_fresh_manager_replays_prices_ingested_by_another(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    rng = np.random.default_rng(0)
+    dates = write_csv(data_dir, 'AAA', 3000 + np.cumsum(rng.normal(0, 10, 100)))
+    write_csv(data_dir, 'BBB', 5000 + np.cumsum(rng.normal(0, 10, 100)))
+    log_path = tmp_path / 'wal' / 'prices.log'
+
+    writer = make_manager(tmp_path, 'store-writer', log_path)
+    next_day = (dates[-1] + pd.offsets.BDay()).strftime('%Y-%m-%d')
+    result = writer.ingest_prices([{'ticker': 'AAA', 'date': next_day, 'close': 3210.0},
+                                   {'ticker': 'BBB', 'date': next_day, 'close': 5000.0}])
+    assert result['accepted'] == 2
+
+    # A second worker serves its first request after the ingest
+    reader = make_manager(tmp_path, 'store-reader', log_path)
+    stock_data = reader.load_stock_data(['AAA', 'BBB'])
+    mu, cov, prices = reader.compute_financial_metrics(stock_data)
+    expected_mu, expected_cov, expected_prices = writer.compute_financial_metrics(writer.load_stock_data(['AAA', 'BBB']))
+
+    assert prices.tolist() == [3210.0, 5000.0]
+    np.testing.assert_allclose(mu, expected_mu)
+    np.testing.assert_allclose(cov, expected_cov)
+
+
+def test_append_after_torn_line_keeps_the_batch(tmp_path):
+    log_path = tmp_path / 'prices.log'
+    log = PriceLog(str(log_path))
+    log.append([('AAA', '2024-01-02', 100.0)])
+    with open(log_path, 'ab') as f:
+        f.write(b'{"written_at":"2024-01-02T10:00:00","rows":[["AAA","2024-01')
+
+    log.append([('BBB', '2024-01-03', 200.0)])
+
+    assert PriceLog(str(log_path)).read_new() == [[('AAA', '2024-01-02', 100.0)], [('BBB', '2024-01-03', 200.0)]]
+
+
+def test_listing_counts_ingested_rows(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    dates = write_csv(data_dir, 'AAA', np.linspace(100.0, 200.0, 80))
+    manager = make_manager(tmp_path, 'store', tmp_path / 'prices.log')
+    next_day = (dates[-1] + pd.offsets.BDay()).strftime('%Y-%m-%d')
+
+    manager.ingest_prices([{'ticker': 'AAA', 'date': dates[-1].strftime('%Y-%m-%d'), 'close': 201.0},
+                           {'ticker': 'AAA', 'date': next_day, 'close': 202.0}])
+    _, metadata = manager.get_stock_listing()
+
+    assert metadata['AAA']['rows'] == 81
+    assert metadata['AAA']['last_date'] == next_day
+    assert metadata['AAA']['last_close'] == 202.0
+
+
+def test_listing_etag_matches_across_managers(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    dates = write_csv(data_dir, 'AAA', np.linspace(100.0, 200.0, 80))
+    log_path = tmp_path / 'prices.log'
+    first = make_manager(tmp_path, 'store-first', log_path)
+    second = make_manager(tmp_path, 'store-second', log_path)
+    etag, _ = first.get_stock_listing()
+    assert second.get_stock_listing()[0] == etag
+
+    next_day = (dates[-1] + pd.offsets.BDay()).strftime('%Y-%m-%d')
+    first.ingest_prices([{'ticker': 'AAA', 'date': next_day, 'close': 202.0}])
+
+    assert first.get_stock_listing()[0] != etag
+    assert first.get_stock_listing()[0] == second.get_stock_listing()[0]
+
+
+def test_appended_rows_match_a_rebuilt_matrix():
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range('2024-01-01', periods=60)
+    closes = 100 + np.cumsum(rng.normal(0, 1, (60, 3)), axis=0)
+    closes[rng.random((60, 3)) < 0.1] = np.nan
+    frames = {ticker: pd.DataFrame({'Date': dates[~np.isnan(closes[:, i])],
+                                    'Close': closes[~np.isnan(closes[:, i]), i]})
+              for i, ticker in enumerate(['AAA', 'BBB', 'CCC'])}
+    full = ReturnsMatrix.from_stock_data(frames)
+
+    grown = ReturnsMatrix.from_stock_data({ticker: frame[frame['Date'] <= dates[9]] for ticker, frame in frames.items()})
+    for row in range(10, 60):
+        if not np.isnan(closes[row]).all():
+            grown.append_row(dates[row], closes[row])
+
+    assert grown.n_rows == full.n_rows
+    np.testing.assert_array_equal(grown.dates, full.dates)
+    np.testing.assert_array_equal(grown.closes, full.closes)
+    np.testing.assert_allclose(grown.values, full.values)
+    np.testing.assert_array_equal(grown.mask, full.mask)
+
+
+def test_frame_cache_separates_data_directories(tmp_path):
+    cache = FrameCache()
+    managers = []
+    for name, closes in [('one', np.linspace(100.0, 200.0, 80)), ('two', np.linspace(300.0, 400.0, 80))]:
+        data_dir = tmp_path / name
+        data_dir.mkdir()
+        write_csv(data_dir, 'AAA', closes)
+        os.utime(data_dir / 'AAA.csv', ns=(1_700_000_000_000_000_000, 1_700_000_000_000_000_000))
+        managers.append(DataManager(data_dir=str(data_dir), store_dir=str(tmp_path / f'store-{name}'),
+                                    frame_cache=cache, load_executor=None,
+                                    price_log_path=str(tmp_path / f'{name}.log'), panel_path=''))
+
+    assert (tmp_path / 'one' / 'AAA.csv').stat().st_size == (tmp_path / 'two' / 'AAA.csv').stat().st_size
+    assert managers[0].load_stock_data(['AAA'])['AAA']['Close'].iloc[-1] == 200.0
+    assert managers[1].load_stock_data(['AAA'])['AAA']['Close'].iloc[-1] == 400.0
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.optimizer import PortfolioOptimizer
+from backend.visualization import VisualizationDataGenerator
+
+
+def random_universe(n_assets, seed):
+    rng = np.random.default_rng(seed)
+    tickers = [f'T{i}' for i in range(n_assets)]
+    expected_returns = rng.normal(0.15, 0.05, n_assets)
+    covariance_matrix = np.cov(rng.normal(size=(n_assets, 120))) * 0.05
+    prices = rng.uniform(100.0, 3000.0, n_assets)
+    dates = pd.bdate_range('2024-01-01', periods=120)
+    stock_data = {ticker: pd.DataFrame({'Date': dates,
+                                        'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 120)))})
+                  for ticker in tickers}
+    return tickers, expected_returns, covariance_matrix, prices, stock_data
+
+
+@pytest.mark.parametrize('backend_name', [PortfolioOptimizer.GRAY_CODE_BACKEND, PortfolioOptimizer.TABU_BACKEND])
+def test_optimize_result_shape(backend_name):
+    tickers, expected_returns, covariance_matrix, prices, stock_data = random_universe(8, 0)
+
+    result = PortfolioOptimizer().optimize(tickers, expected_returns, covariance_matrix, prices,
+                                           min_assets=2, backend_name=backend_name)
+
+    assert 'error' not in result
+    assert 'all_evaluated_portfolios' not in result
+    assert result['evaluated_count'] == len(result['qaoa_portfolios'])
+    assert set(result['ranked_portfolios']) == {'sharpe', 'return', 'risk', 'qubo_value'}
+    assert result['top_portfolios'] == result['ranked_portfolios']['sharpe']
+    for criterion, key, descending in [('sharpe', 'sharpe', True), ('return', 'return', True),
+                                       ('risk', 'risk', False), ('qubo_value', 'qubo_value', False)]:
+        values = [portfolio[key] for portfolio in result['ranked_portfolios'][criterion]]
+        assert 0 < len(values) <= 10
+        assert values == sorted(values, reverse=descending)
+
+    # The sample covers every ranked portfolio, and holds at most the sample plus 4 criteria x top 10
+    sampled = {tuple(portfolio['selection']) for portfolio in result['sampled_portfolios']}
+    assert len(result['sampled_portfolios']) <= PortfolioOptimizer.VISUALIZATION_SAMPLE_SIZE + 40
+    for portfolios in result['ranked_portfolios'].values():
+        assert {tuple(portfolio['selection']) for portfolio in portfolios} <= sampled
+
+    visualization = VisualizationDataGenerator().generate_visualization_data(
+        result, stock_data, tickers, 100000.0, 0.07)
+    assert 'brute_force_scatter' in visualization
+
+
+def test_optimize_without_solution_keeps_result_keys():
+    tickers, expected_returns, covariance_matrix, prices, _ = random_universe(6, 1)
+
+    # No two assets can be held together below a correlation threshold of 0
+    result = PortfolioOptimizer().optimize(tickers, expected_returns, covariance_matrix, prices,
+                                           min_assets=2, correlation_threshold=0.0,
+                                           backend_name=PortfolioOptimizer.GRAY_CODE_BACKEND)
+
+    assert 'error' in result
+    assert result['sampled_portfolios'] == []
+    assert result['evaluated_count'] == 0
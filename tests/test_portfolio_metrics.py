@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from backend.candidate_space import enumerate_subset_masks, masks_to_selections, mask_to_indices
+from backend.optimizer import PortfolioOptimizer
+from backend.portfolio_metrics import PortfolioMetricsEngine, PortfolioRanking, TopKSelector
+
+
+def reference_metrics(selection, expected_returns, covariance_matrix, prices, risk_free_rate):
+    """Per-portfolio evaluation as PortfolioOptimizer did it before the batched engine"""
+    selected_prices = prices * selection
+    total_cost = np.sum(selected_prices)
+    weights = selected_prices / total_cost if total_cost > 0 else np.zeros_like(selected_prices)
+    if np.sum(weights) > 0:
+        weights = weights / np.sum(weights)
+
+    redistributed = False
+    weights_sum = np.sum(weights)
+    if weights_sum > 0 and weights_sum < 1.0:
+        redistributed = True
+        remaining_allocation = 1.0 - weights_sum
+        nonzero_indices = np.where(weights > 0)[0]
+        if len(nonzero_indices) > 0:
+            sorted_indices = sorted(nonzero_indices, key=lambda i: expected_returns[i], reverse=True)
+            high_return_count = max(1, len(sorted_indices) // 3)
+            for i in range(high_return_count):
+                weights[sorted_indices[i]] += (remaining_allocation * 0.6) / high_return_count
+            low_return_indices = sorted_indices[high_return_count:]
+            if len(low_return_indices) > 0:
+                for i in low_return_indices:
+                    weights[i] += (remaining_allocation * 0.4) / len(low_return_indices)
+            else:
+                for i in range(high_return_count):
+                    weights[sorted_indices[i]] += (remaining_allocation * 0.4) / high_return_count
+
+    portfolio_return = np.sum(expected_returns * weights)
+    portfolio_risk = np.sqrt(weights.T @ covariance_matrix @ weights)
+    if portfolio_risk < 1e-8:
+        sharpe_ratio = 0.0 if portfolio_return <= risk_free_rate else 1000.0
+    else:
+        sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_risk
+    return weights, portfolio_return, portfolio_risk, sharpe_ratio, total_cost, redistributed
+
+
+def random_market(n_assets, seed):
+    """Expected returns, covariance, prices and a QUBO for a small random universe"""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n_assets, n_assets))
+    covariance_matrix = factors @ factors.T / n_assets * 0.04
+    expected_returns = rng.normal(0.12, 0.08, n_assets)
+    prices = rng.uniform(50.0, 5000.0, n_assets)
+    return expected_returns, covariance_matrix, prices, covariance_matrix - np.diag(expected_returns)
+
+
+@pytest.mark.parametrize('n_assets, seed', [(6, 0), (10, 1)])
+def test_engine_matches_per_portfolio_evaluation(n_assets, seed):
+    expected_returns, covariance_matrix, prices, qubo_matrix = random_market(n_assets, seed)
+    masks = enumerate_subset_masks(n_assets)
+    selections = masks_to_selections(masks, n_assets).astype(np.float64)
+
+    metrics = PortfolioMetricsEngine(expected_returns, covariance_matrix, prices, 0.07, qubo_matrix,
+                                     chunk_size=100).evaluate(masks)
+
+    expected = [reference_metrics(selection.copy(), expected_returns, covariance_matrix, prices, 0.07)
+                for selection in selections]
+    # Float leftovers below 100% must occur, or the redistribution rule goes untested
+    assert any(row[5] for row in expected)
+    np.testing.assert_allclose(metrics['weights'], [row[0] for row in expected], rtol=0, atol=1e-15)
+    np.testing.assert_allclose(metrics['return'], [row[1] for row in expected], rtol=1e-12)
+    np.testing.assert_allclose(metrics['risk'], [row[2] for row in expected], rtol=1e-12)
+    np.testing.assert_allclose(metrics['sharpe'], [row[3] for row in expected], rtol=1e-12)
+    np.testing.assert_allclose(metrics['cost'], [row[4] for row in expected], rtol=1e-12)
+    np.testing.assert_allclose(metrics['qubo_value'],
+                               [selection @ qubo_matrix @ selection for selection in selections], rtol=1e-12)
+
+
+def test_optimizer_evaluation_matches_per_portfolio_evaluation():
+    n_assets = 7
+    expected_returns, covariance_matrix, prices, qubo_matrix = random_market(n_assets, 2)
+    tickers = [f'T{i}' for i in range(n_assets)]
+    masks = enumerate_subset_masks(n_assets)
+    portfolios = [{'selected_indices': mask_to_indices(int(mask))} for mask in masks]
+    ranking = PortfolioRanking(5, np.intp)
+
+    result = PortfolioOptimizer()._evaluate_portfolios_precise(
+        portfolios, tickers, expected_returns, covariance_matrix, prices, 100000.0, 0.07, qubo_matrix,
+        ranking, sample_size=len(portfolios))
+
+    assert result['count'] == len(portfolios)
+    assert len(result['sample']) == len(portfolios)
+    for portfolio in result['sample']:
+        selection = np.array(portfolio['selection'], dtype=np.float64)
+        weights, portfolio_return, portfolio_risk, sharpe_ratio, _, _ = reference_metrics(
+            selection, expected_returns, covariance_matrix, prices, 0.07)
+        np.testing.assert_allclose(portfolio['weights'], weights, rtol=0, atol=1e-15)
+        assert portfolio['return'] == pytest.approx(portfolio_return, rel=1e-12)
+        assert portfolio['risk'] == pytest.approx(portfolio_risk, rel=1e-12)
+        assert portfolio['sharpe'] == pytest.approx(sharpe_ratio, rel=1e-12)
+
+
+@pytest.mark.parametrize('k, n_items, chunk', [(5, 100, 7), (10, 4, 3), (3, 60, 1), (8, 50, 50)])
+def test_top_k_selector_matches_sorted(k, n_items, chunk):
+    rng = np.random.default_rng(k * n_items)
+    # Few distinct keys, so ties are common
+    keys = rng.integers(0, 10, n_items).astype(np.float64)
+    masks = np.arange(n_items, dtype=np.uint64) + 1
+    selector = TopKSelector(k, np.uint64)
+
+    for start in range(0, n_items, chunk):
+        selector.push(masks[start:start + chunk], keys[start:start + chunk])
+
+    expected = sorted(range(n_items), key=lambda i: keys[i])[:k]
+    assert selector.masks.tolist() == masks[expected].tolist()
+    assert selector.keys.tolist() == keys[expected].tolist()
+
+
+def test_portfolio_ranking_matches_sorted_per_criterion():
+    n_assets = 8
+    expected_returns, covariance_matrix, prices, qubo_matrix = random_market(n_assets, 3)
+    engine = PortfolioMetricsEngine(expected_returns, covariance_matrix, prices, 0.07, qubo_matrix)
+    masks = enumerate_subset_masks(n_assets)
+    metrics = engine.evaluate(masks)
+    ranking = PortfolioRanking(12, masks.dtype, engine=engine)
+    merged = PortfolioRanking(12, masks.dtype)
+
+    for start in range(0, len(masks), 37):
+        ranking.push(masks[start:start + 37])
+    # Rankings over disjoint halves merge into the ranking of the whole
+    for half in (masks[::2], masks[1::2]):
+        partial = PortfolioRanking(12, masks.dtype, engine=engine)
+        partial.push(half)
+        merged.merge(partial.partial())
+
+    for criterion, (metric, sign) in PortfolioRanking.CRITERIA.items():
+        expected = sorted(range(len(masks)), key=lambda i: sign * metrics[metric][i])[:12]
+        assert ranking.top(criterion).tolist() == masks[expected].tolist()
+        np.testing.assert_array_equal(np.sort(merged.top(criterion)), np.sort(masks[expected]))
+    assert set(ranking.ids().tolist()) == set(np.concatenate(
+        [ranking.top(criterion) for criterion in PortfolioRanking.CRITERIA]).tolist())
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from backend.candidate_space import conflict_masks
+from backend.sharded_scan import sharded_scan
+
+
+def random_market(n_assets, seed):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(size=(250, 3)) @ rng.normal(size=(3, n_assets)) * 0.01 + rng.normal(0, 0.01, (250, n_assets))
+    covariance_matrix = np.cov(returns, rowvar=False) * 252
+    expected_returns = returns.mean(axis=0) * 252
+    prices = rng.uniform(100.0, 3000.0, n_assets)
+    qubo_matrix = 0.5 * covariance_matrix - np.diag(expected_returns)
+    conflicts = conflict_masks(np.corrcoef(returns, rowvar=False), 0.6)
+    return qubo_matrix, expected_returns, covariance_matrix, prices, conflicts
+
+
+@pytest.mark.parametrize('max_assets', [None, 4])
+def test_sharded_scan_matches_single_process(max_assets):
+    inputs = random_market(14, 0)
+
+    single = sharded_scan(*inputs[:4], 0.07, inputs[4], 2, max_assets=max_assets, n_workers=1, n_shards=1)
+    sharded = sharded_scan(*inputs[:4], 0.07, inputs[4], 2, max_assets=max_assets, n_workers=2, n_shards=13)
+
+    assert sharded['shards'] > 1
+    assert sharded['feasible_count'] == single['feasible_count']
+    assert sharded['best_energy'] == pytest.approx(single['best_energy'])
+    assert [portfolio['selected_indices'] for portfolio in sharded['portfolios']] == \
+        [portfolio['selected_indices'] for portfolio in single['portfolios']]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from backend.statevector_qaoa import StatevectorQAOA, qubo_diagonal
+
+
+def explicit_energies(qubo_matrix):
+    """x^T Q x for every basis state, with bit i of the state index as qubit i"""
+    n_qubits = len(qubo_matrix)
+    bits = (np.arange(1 << n_qubits)[:, None] >> np.arange(n_qubits)) & 1
+    return np.einsum('bi,ij,bj->b', bits, qubo_matrix, bits)
+
+
+def explicit_state(qubo_matrix, gammas, betas):
+    """QAOA state from dense matrices: diagonal cost unitary and the full RX mixer"""
+    n_qubits = len(qubo_matrix)
+    energies = explicit_energies(qubo_matrix)
+    spread = energies.max() - energies.min()
+    cost_hamiltonian = np.diag((energies - energies.min()) / (spread if spread > 0 else 1.0))
+    psi = np.full(1 << n_qubits, (1 << n_qubits) ** -0.5, dtype=np.complex128)
+    for gamma, beta in zip(gammas, betas):
+        psi = np.diag(np.exp(-1j * gamma * np.diag(cost_hamiltonian))) @ psi
+        rx = np.array([[np.cos(beta), -1j * np.sin(beta)], [-1j * np.sin(beta), np.cos(beta)]])
+        mixer = np.ones((1, 1))
+        for _ in range(n_qubits):
+            mixer = np.kron(mixer, rx)
+        psi = mixer @ psi
+    return psi
+
+
+# 7 qubits spans two mixer blocks
+@pytest.mark.parametrize('n_qubits, reps', [(1, 1), (2, 2), (3, 1), (4, 3), (7, 2)])
+def test_expectation_matches_explicit_hamiltonian(n_qubits, reps):
+    rng = np.random.default_rng(n_qubits * 10 + reps)
+    qubo_matrix = rng.normal(size=(n_qubits, n_qubits))
+    params = rng.uniform(-np.pi, np.pi, 2 * reps)
+    engine = StatevectorQAOA(qubo_matrix, reps=reps)
+
+    energies = explicit_energies(qubo_matrix)
+    psi = explicit_state(qubo_matrix, params[:reps], params[reps:])
+
+    np.testing.assert_allclose(qubo_diagonal(qubo_matrix), energies, atol=1e-12)
+    np.testing.assert_allclose(engine.state(params[:reps], params[reps:]), psi, atol=1e-12)
+    assert engine.expectation(params) == pytest.approx(float(np.abs(psi) ** 2 @ energies), abs=1e-12)
+
+
+def test_sample_uses_qiskit_bit_order():
+    # Only basis state 0b0001 (asset 0 held) has nonzero probability
+    engine = StatevectorQAOA(np.zeros((4, 4)))
+    probabilities = np.zeros(16)
+    probabilities[1] = 1.0
+
+    counts = engine.sample_probabilities(probabilities, 100, seed=0)
+
+    assert counts == {'0001': 100}
@@ -0,0 +1,25 @@
+import pytest
+
+from backend.work_queue import SQLiteWorkQueue, WorkQueue
+
+
+def test_work_queue_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
+
+
+def test_purge_finished_keeps_unfinished_jobs(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / 'queue.sqlite'))
+    queue.publish('done', {}, [{'start': 0, 'stop': 1}])
+    queue.publish('running', {}, [{'start': 0, 'stop': 1}])
+    task = queue.claim('worker')
+    queue.complete(task['job_id'], task['task_id'], 'worker', {'scanned': 1})
+
+    assert queue.purge_finished(0.0) == 1
+    assert queue.status('done') == {'pending': 0, 'claimed': 0, 'done': 0, 'failed': 0}
+    assert queue.status('running')['pending'] == 1
+    with pytest.raises(KeyError):
+        queue.context('done')
+
+    queue.purge('running')
+    assert queue.claim('worker') is None